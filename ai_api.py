@@ -1,24 +1,19 @@
 from fastapi import FastAPI
 from pydantic import BaseModel
 import pandas as pd
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import json
-import re
+import os
+
+from recommendation_engine import shared_engine, simple_preprocess  # noqa: F401 (simple_preprocess kept importable)
+from traffic_replay import CAPTURE_SAMPLE, TrafficCapture
 
 app = FastAPI(title="AVSARSETU Recommendation API")
 
-# Simple preprocessing
-def simple_preprocess(text):
-    if text is None:
-        text = ""
-    text = str(text).lower()
-    text = re.sub(r"[^a-z0-9\s]", " ", text)
-    tokens = text.split()
-    stopwords = {"a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "he", "in", "is", "it", "its", "of", "on", "that", "the", "to", "was", "will", "with", "i", "you", "this", "but", "they", "have"}
-    tokens = [t for t in tokens if t not in stopwords and len(t) > 1]
-    return " ".join(tokens)
+# opt-in request capture for traffic_replay.py (AVSARSETU_CAPTURE_SAMPLE=0.05 keeps 5% of /recommend/* calls)
+if CAPTURE_SAMPLE > 0:
+    app.add_middleware(TrafficCapture)
+
+# "simple" (no NLTK data needed) or "nltk" (lemmatized, as recommendation_model.py)
+ANALYZER = os.environ.get("AVSARSETU_ANALYZER", "simple")
 
 # Load sample data
 internships_data = [
@@ -40,47 +35,20 @@ class ProfilePayload(BaseModel):
     skills: str = ""
     interests: str = ""
 
+# Internship documents are preprocessed and vectorized once (at startup, or on first use);
+# replacing internships_df builds a new engine for the new catalog
+@app.on_event("startup")
+def build_engine():
+    shared_engine(internships_df, analyzer=ANALYZER)
+
 @app.post("/recommend/profile")
 def recommend_by_profile(payload: ProfilePayload):
     profile_text = ((payload.skills or "") + " " + (payload.interests or "")).strip()
     if not profile_text:
         return {"status": "error", "message": "Please provide skills and/or interests"}
 
-    # Build internship documents
-    internship_docs = []
-    for _, row in internships_df.iterrows():
-        doc = f"{row['title']} {row['description']} {row['required_skills']}"
-        internship_docs.append(simple_preprocess(doc))
-
-    # Create TF-IDF vectors
-    vectorizer = TfidfVectorizer()
-    student_doc = simple_preprocess(profile_text)
-    all_docs = [student_doc] + internship_docs
-    tfidf_matrix = vectorizer.fit_transform(all_docs)
-
-    # Calculate similarities
-    student_vector = tfidf_matrix[0:1]
-    internship_vectors = tfidf_matrix[1:]
-    similarities = cosine_similarity(student_vector, internship_vectors).flatten()
-
-    # Rank internships
-    internships_df_copy = internships_df.copy()
-    internships_df_copy["match_score"] = similarities
-    ranked = internships_df_copy.sort_values(by="match_score", ascending=False).reset_index(drop=True)
-
-    # Return top recommendations
-    recommendations = []
-    for _, row in ranked.head(5).iterrows():
-        recommendations.append({
-            "internship_id": row.get("internship_id"),
-            "title": row.get("title"),
-            "match_score": round(float(row.get("match_score", 0.0)), 4)
-        })
-
-    return {
-        "status": "success",
-        "recommendations": recommendations
-    }
+    # Return top recommendations (top 5 by cosine similarity against the precomputed index)
+    return shared_engine(internships_df, analyzer=ANALYZER).recommend(profile_text, top_n=5)
 
 @app.get("/")
 def root():
@@ -0,0 +1,393 @@
+"""
+artifact_store.py
+
+AVSARSETU - Memory-mappable model artifact format
+A directory (instead of one pickled .joblib file) holding manifest.json (format version, matrix
+shape, vectorizer params, column names / dtypes, and the name of the data directory) and one
+data directory per saved version with:
+- vectors.data.npy / .indices.npy / .indptr.npy   the CSR internship matrix as raw arrays
+- idf.npy + vocabulary.txt           IDF weights and terms in feature-index order
+- columns/<i>.npy                    numeric / datetime / bool internship columns (dtype kept)
+- columns/<i>.bytes.npy + .offsets.npy   other columns as UTF-8 values and their offsets (non-string
+                                     values JSON-encoded), columns/<i>.nulls.npy marks None / NaN cells
+- documents.txt                      cleaned internship documents (read only when needed)
+- active.npy                         tombstone mask (only for incrementally updated indexes)
+- lsa.<name>.npy                     LSA embeddings / IVF lists (only if built, see lsa_engine.py)
+- filters.<attribute>.npy            packed attribute-value bitmaps (values in the manifest, see attribute_filters.py)
+
+Text files hold values joined by the ASCII unit separator (\x1f).
+load_mmap_artifacts() memory-maps every array (np.load(mmap_mode="r")), so N uvicorn workers share
+one page-cache copy of the matrix and of the metadata columns, and startup does not unpickle
+anything: ids / titles are read-only views of the mapped columns, and the internships DataFrame
+(equal to the saved one, dtypes and missing values included) is only built when something reads it.
+A save writes a new data directory and then replaces manifest.json, so readers see the old or the
+new version, never a missing or half-written one; the previous data directory is kept for workers
+still serving it.
+
+How to use:
+   python recommendation_model.py --artifact_format mmap --model_out avsarsetu_model.mmap
+   python artifact_store.py convert avsarsetu_model.joblib avsarsetu_model.mmap
+   AVSARSETU_ARTIFACTS=avsarsetu_model.mmap uvicorn recommendation_model:app
+"""
+
+import os
+import json
+import time
+import shutil
+import operator
+import argparse
+from collections.abc import Sequence
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+FORMAT_VERSION = 2
+SEPARATOR = "\x1f"
+LOAD_ATTEMPTS = 3  # a save that replaces the data directory mid-load makes the load start over
+
+# ---------------------------
+# Save
+# ---------------------------
+def _write_text_column(path: str, values: List[Any]) -> None:
+    text = SEPARATOR.join("" if v is None else str(v).replace(SEPARATOR, " ") for v in values)
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(text)
+
+def _is_null(value: Any) -> bool:
+    import pandas as pd
+    return value is None or value is pd.NA or value is pd.NaT or (isinstance(value, float) and value != value)
+
+def _write_column(directory: str, i: int, series) -> Dict[str, Any]:
+    """
+    Save one internship column and return its manifest entry.
+    """
+    meta = {"name": str(series.name), "dtype": str(series.dtype)}
+    values = series.to_numpy()
+    if values.dtype.kind in "biufcmM":
+        np.save(os.path.join(directory, "columns", f"{i}.npy"), values)
+        meta["storage"] = "npy"
+        return meta
+    values = series.astype(object).tolist()
+    nulls = np.array([0 if not _is_null(v) else 1 if v is None else 2 for v in values], dtype=np.int8)
+    text = all(isinstance(v, str) for v, null in zip(values, nulls) if not null)
+    meta["storage"] = "text" if text else "json"
+    encoded = [b"" if null else (v if text else json.dumps(v, default=str)).encode("utf-8")
+               for v, null in zip(values, nulls)]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    np.save(os.path.join(directory, "columns", f"{i}.bytes.npy"), np.frombuffer(b"".join(encoded), dtype=np.uint8))
+    np.save(os.path.join(directory, "columns", f"{i}.offsets.npy"), offsets)
+    if nulls.any():
+        np.save(os.path.join(directory, "columns", f"{i}.nulls.npy"), nulls)
+        meta["nulls"] = True
+    return meta
+
+def _vectorizer_params(vectorizer) -> Dict[str, Any]:
+    params = {}
+    for name, value in vectorizer.get_params().items():
+        if name == "dtype":
+            value = np.dtype(value).name
+        elif isinstance(value, tuple):
+            value = list(value)
+        elif callable(value):
+            raise ValueError(f"Vectorizer parameter '{name}' is a callable and cannot be stored in the mmap format.")
+        params[name] = value
+    return params
+
+def save_mmap_artifacts(artifacts: Dict[str, Any], path: str) -> str:
+    """
+    Write artifacts as a memory-mappable directory. The arrays go to a new data directory inside
+    `path` and manifest.json is replaced last, so readers never see a half-written model.
+    Returns the data directory.
+    """
+    import scipy.sparse as sp
+    vectorizer = artifacts["vectorizer"]
+    vectors = sp.csr_matrix(artifacts["internship_vectors"])
+    internships_df = artifacts["internships_df"]
+
+    if os.path.exists(path) and not os.path.isdir(path):
+        os.remove(path)
+    previous = _manifest(path).get("data") if os.path.exists(os.path.join(path, "manifest.json")) else None
+    data_name = f"data-{time.time_ns()}-{os.getpid()}"
+    tmp_path = os.path.join(path, data_name)
+    os.makedirs(os.path.join(tmp_path, "columns"))
+
+    np.save(os.path.join(tmp_path, "vectors.data.npy"), vectors.data)
+    np.save(os.path.join(tmp_path, "vectors.indices.npy"), vectors.indices)
+    np.save(os.path.join(tmp_path, "vectors.indptr.npy"), vectors.indptr)
+    np.save(os.path.join(tmp_path, "idf.npy"), np.asarray(vectorizer.idf_))
+
+    terms = [None] * len(vectorizer.vocabulary_)
+    for term, i in vectorizer.vocabulary_.items():
+        terms[i] = term
+    _write_text_column(os.path.join(tmp_path, "vocabulary.txt"), terms)
+
+    columns = [_write_column(tmp_path, i, internships_df[column]) for i, column in enumerate(internships_df.columns)]
+    has_documents = artifacts.get("documents") is not None or bool(artifacts.get("documents_path"))
+    if artifacts.get("documents") is not None:
+        _write_text_column(os.path.join(tmp_path, "documents.txt"), artifacts["documents"])
+    elif artifacts.get("documents_path"):
+        # documents not loaded (mmap artifacts / streaming ingestion): copy the file as is
+        shutil.copyfile(artifacts["documents_path"], os.path.join(tmp_path, "documents.txt"))
+    if artifacts.get("active") is not None:
+        np.save(os.path.join(tmp_path, "active.npy"), np.asarray(artifacts["active"], dtype=bool))
+    lsa_meta = None
+    if artifacts.get("lsa") is not None:
+        lsa_meta = {}
+        for name, value in artifacts["lsa"].items():
+            if isinstance(value, np.ndarray):
+                np.save(os.path.join(tmp_path, f"lsa.{name}.npy"), value)
+            else:
+                lsa_meta[name] = list(value) if isinstance(value, tuple) else value
+
+    filters_meta = None
+    if artifacts.get("filters") is not None:
+        filters_meta = {"rows": artifacts["filters"]["rows"], "attributes": {}}
+        for attribute, indexed in artifacts["filters"]["attributes"].items():
+            filters_meta["attributes"][attribute] = list(indexed["values"])
+            np.save(os.path.join(tmp_path, f"filters.{attribute}.npy"), np.asarray(indexed["bits"]))
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "data": data_name,
+        "shape": list(vectors.shape),
+        "vectorizer_params": _vectorizer_params(vectorizer),
+        "columns": columns,
+        "has_documents": has_documents,
+        "lsa": lsa_meta,
+        "filters": filters_meta
+    }
+    manifest_tmp = os.path.join(path, f"manifest.json.tmp-{os.getpid()}")
+    with open(manifest_tmp, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    os.replace(manifest_tmp, os.path.join(path, "manifest.json"))
+
+    # keep the version workers may still be serving (its documents are read lazily); older data
+    # directories and the files of the flat format-1 layout go (mapped files stay valid on POSIX)
+    for name in os.listdir(path):
+        if name in ("manifest.json", data_name, previous):
+            continue
+        target = os.path.join(path, name)
+        if os.path.isdir(target):
+            shutil.rmtree(target, ignore_errors=True)
+        else:
+            try:
+                os.remove(target)
+            except OSError:
+                pass
+    return tmp_path
+
+# ---------------------------
+# Load
+# ---------------------------
+def read_text_column(path: str, n_values: int) -> List[str]:
+    with open(path, "r", encoding="utf-8") as fh:
+        text = fh.read()
+    if not text:
+        # "" is both zero values and n empty values; the caller knows which
+        return [""] * n_values
+    return text.split(SEPARATOR)
+
+class MappedColumn(Sequence):
+    """
+    Read-only list view of a text / JSON column stored as UTF-8 bytes + offsets (memory-mapped):
+    values are decoded on access, so every worker shares the page-cache copy.
+    """
+    __slots__ = ("data", "offsets", "nulls", "storage")
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray, nulls: Optional[np.ndarray], storage: str):
+        self.data = data
+        self.offsets = offsets
+        self.nulls = nulls
+        self.storage = storage
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = operator.index(i)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("column index out of range")
+        if self.nulls is not None and self.nulls[i]:
+            return None if self.nulls[i] == 1 else np.nan
+        value = bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+        return value if self.storage == "text" else json.loads(value)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __reduce__(self):
+        # pickled (joblib) as a plain list
+        return list, (list(self),)
+
+class MappedArtifacts(dict):
+    """
+    Artifacts loaded by load_mmap_artifacts: internships_df is built from the mapped columns the
+    first time it is read (serving only needs the ids / titles views).
+    """
+
+    def __getitem__(self, key):
+        if key == "internships_df" and not dict.__contains__(self, key):
+            dict.__setitem__(self, key, _dataframe(self._columns))
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __contains__(self, key) -> bool:
+        return dict.__contains__(self, key) or key == "internships_df"
+
+    def keys(self):
+        return list(dict.keys(self)) + ([] if dict.__contains__(self, "internships_df") else ["internships_df"])
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __reduce__(self):
+        return dict, (dict(self.items()),)
+
+def _manifest(path: str) -> Dict[str, Any]:
+    with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    if manifest.get("format_version") not in (1, FORMAT_VERSION):
+        raise ValueError(f"Unsupported artifact format version {manifest.get('format_version')} at {path}")
+    return manifest
+
+def data_directory(path: str) -> str:
+    """
+    The directory holding the arrays of the version currently saved at `path`.
+    """
+    data = _manifest(path).get("data")
+    return os.path.join(path, data) if data else path
+
+def _read_column(directory: str, i: int, meta: Dict[str, Any]):
+    base = os.path.join(directory, "columns", str(i))
+    if meta["storage"] == "npy":
+        return np.load(f"{base}.npy", mmap_mode="r")
+    nulls = np.load(f"{base}.nulls.npy", mmap_mode="r") if meta.get("nulls") else None
+    return MappedColumn(np.load(f"{base}.bytes.npy", mmap_mode="r"), np.load(f"{base}.offsets.npy", mmap_mode="r"),
+                        nulls, meta["storage"])
+
+def _dataframe(columns: List[Any]):
+    import pandas as pd
+    data = {}
+    for meta, values in columns:
+        series = pd.Series(np.array(values) if isinstance(values, np.ndarray) else list(values),
+                           dtype=None if isinstance(values, np.ndarray) else object)
+        if str(series.dtype) != meta["dtype"]:
+            try:
+                series = series.astype(meta["dtype"])
+            except (TypeError, ValueError):
+                pass
+        data[meta["name"]] = series
+    return pd.DataFrame(data, columns=[meta["name"] for meta, _ in columns])
+
+def _ranking_column(columns: List[Any], name: str, n_rows: int):
+    for meta, values in columns:
+        if meta["name"] == name:
+            # text columns stay shared views; numeric ones become plain Python values (JSON responses)
+            return values.tolist() if isinstance(values, np.ndarray) else values
+    return [None] * n_rows
+
+def load_mmap_artifacts(path: str) -> Dict[str, Any]:
+    """
+    Load a directory written by save_mmap_artifacts. Matrix arrays and columns are memory-mapped
+    (read-only); the vectorizer is rebuilt from vocabulary + IDF; cleaned documents are not read
+    until needed (artifacts["documents_path"]).
+    """
+    for attempt in range(LOAD_ATTEMPTS):
+        manifest = _manifest(path)
+        try:
+            return _load(path, manifest)
+        except FileNotFoundError:
+            # a concurrent save replaced the data directory after we read the manifest
+            if attempt == LOAD_ATTEMPTS - 1:
+                raise
+
+def _load(path: str, manifest: Dict[str, Any]) -> Dict[str, Any]:
+    import scipy.sparse as sp
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    directory = os.path.join(path, manifest["data"]) if manifest.get("data") else path
+    n_rows, n_features = manifest["shape"]
+    data = np.load(os.path.join(directory, "vectors.data.npy"), mmap_mode="r")
+    indices = np.load(os.path.join(directory, "vectors.indices.npy"), mmap_mode="r")
+    indptr = np.load(os.path.join(directory, "vectors.indptr.npy"), mmap_mode="r")
+    internship_vectors = sp.csr_matrix((data, indices, indptr), shape=(n_rows, n_features), copy=False)
+
+    params = dict(manifest["vectorizer_params"])
+    params["ngram_range"] = tuple(params["ngram_range"])
+    params["dtype"] = np.dtype(params["dtype"]).type
+    vectorizer = TfidfVectorizer(**params)
+    terms = read_text_column(os.path.join(directory, "vocabulary.txt"), n_features)
+    vectorizer.vocabulary_ = {term: i for i, term in enumerate(terms)}
+    vectorizer.idf_ = np.load(os.path.join(directory, "idf.npy"))
+
+    if manifest["format_version"] == 1:
+        # every value was saved as its str()
+        columns = [({"name": name, "dtype": "object"},
+                    read_text_column(os.path.join(directory, "columns", f"{i}.txt"), n_rows))
+                   for i, name in enumerate(manifest["columns"])]
+    else:
+        columns = [(meta, _read_column(directory, i, meta)) for i, meta in enumerate(manifest["columns"])]
+    for meta, values in columns:
+        if len(values) != n_rows:
+            raise ValueError(f"Column '{meta['name']}' has {len(values)} values for {n_rows} rows at {path}")
+
+    artifacts = MappedArtifacts({
+        "vectorizer": vectorizer,
+        "internship_vectors": internship_vectors,
+        "internship_ids": _ranking_column(columns, "internship_id", n_rows),
+        "internship_titles": _ranking_column(columns, "title", n_rows),
+        "artifact_path": path
+    })
+    artifacts._columns = columns
+    if manifest.get("has_documents"):
+        artifacts["documents_path"] = os.path.join(directory, "documents.txt")
+    if os.path.exists(os.path.join(directory, "active.npy")):
+        artifacts["active"] = np.load(os.path.join(directory, "active.npy"))
+    if manifest.get("lsa") is not None:
+        lsa = dict(manifest["lsa"])
+        lsa["shape"] = tuple(lsa["shape"])
+        for name in os.listdir(directory):
+            if name.startswith("lsa.") and name.endswith(".npy"):
+                lsa[name[len("lsa."):-len(".npy")]] = np.load(os.path.join(directory, name), mmap_mode="r")
+        artifacts["lsa"] = lsa
+    if manifest.get("filters") is not None:
+        artifacts["filters"] = {
+            "rows": manifest["filters"]["rows"],
+            "attributes": {
+                attribute: {"values": values,
+                            "bits": np.load(os.path.join(directory, f"filters.{attribute}.npy"), mmap_mode="r")}
+                for attribute, values in manifest["filters"]["attributes"].items()
+            }
+        }
+    return artifacts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AVSARSETU - model artifact format tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert = sub.add_parser("convert", help="Convert a .joblib artifact into the memory-mappable format")
+    convert.add_argument("source", help="Path to the .joblib artifact")
+    convert.add_argument("target", help="Output directory")
+    args = parser.parse_args()
+
+    import joblib
+    save_mmap_artifacts(joblib.load(args.source), args.target)
+    print(f"Model artifacts saved to: {args.target}")
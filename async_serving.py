@@ -0,0 +1,225 @@
+"""
+async_serving.py
+
+AVSARSETU - Async serving with request micro-batching
+- Requests are queued on a MicroBatcher instead of being scored one by one on the
+  server's threads. A batch is flushed after BATCH_WINDOW_MS or as soon as BATCH_MAX
+  requests are waiting, whichever comes first.
+- Each batch is scored by one batched call (one preprocess + transform + engine pass)
+  on a dedicated executor, so the event loop only awaits; every caller gets its own result.
+- Back-pressure: at most MAX_QUEUE requests may be waiting or in flight; beyond that
+  submit() raises QueueFullError (HTTP 503 in the API) instead of queueing unbounded work.
+- Metrics: queue depth (current / max), batch size histogram, wait time, rejections.
+
+Enabled with AVSARSETU_ASYNC=1 (see recommendation_model.py); GET /async/stats shows the metrics.
+Results are identical to the synchronous endpoints.
+
+Tuning (environment):
+   AVSARSETU_BATCH_WINDOW_MS=2  AVSARSETU_BATCH_MAX=32  AVSARSETU_ASYNC_MAX_QUEUE=1024  AVSARSETU_BATCH_WORKERS=1
+"""
+
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+import recommendation_model as rm
+
+BATCH_WINDOW_MS = float(os.environ.get("AVSARSETU_BATCH_WINDOW_MS", "2"))
+BATCH_MAX = int(os.environ.get("AVSARSETU_BATCH_MAX", "32"))
+MAX_QUEUE = int(os.environ.get("AVSARSETU_ASYNC_MAX_QUEUE", "1024"))
+BATCH_WORKERS = int(os.environ.get("AVSARSETU_BATCH_WORKERS", "1"))
+
+class QueueFullError(RuntimeError):
+    """
+    Raised by MicroBatcher.submit when MAX_QUEUE requests are already waiting or being scored.
+    """
+
+class MicroBatcher:
+    """
+    Coalesces concurrent submit() calls into batched calls of score_batch(items) -> results (same order).
+    """
+
+    def __init__(self, score_batch: Callable[[List[Any]], List[Any]], name: str = "batch",
+                 window_ms: float = BATCH_WINDOW_MS, max_batch: int = BATCH_MAX, max_queue: int = MAX_QUEUE,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        self.score_batch = score_batch
+        self.name = name
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.executor = executor or ThreadPoolExecutor(max_workers=BATCH_WORKERS,
+                                                       thread_name_prefix=f"avsarsetu-{name}")
+        self._pending = []  # (item, future, enqueued_at)
+        self._timer = None
+        self._lock = threading.Lock()  # metrics are read from other threads
+        self.depth = 0                 # waiting + being scored
+        self.max_depth = 0
+        self.requests = 0
+        self.rejected = 0
+        self.batches = 0
+        self.batch_sizes = {}          # batch size -> count
+        self.wait_seconds = 0.0
+        self.score_seconds = 0.0
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.depth >= self.max_queue:
+                self.rejected += 1
+                raise QueueFullError(f"{self.name}: {self.depth} requests queued (limit {self.max_queue})")
+            self.depth += 1
+            self.max_depth = max(self.max_depth, self.depth)
+            self.requests += 1
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch:
+            self._flush(loop)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush, loop)
+        return await future
+
+    def _flush(self, loop) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        if self._pending:
+            self._timer = loop.call_later(self.window, self._flush, loop)
+        if batch:
+            loop.create_task(self._run(loop, batch))
+
+    async def _run(self, loop, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        started = time.perf_counter()
+        try:
+            results = await loop.run_in_executor(self.executor, self.score_batch, [item for item, _, _ in batch])
+        except Exception as e:
+            results, error = None, e
+        else:
+            error = None
+        finished = time.perf_counter()
+        with self._lock:
+            self.depth -= len(batch)
+            self.batches += 1
+            self.batch_sizes[len(batch)] = self.batch_sizes.get(len(batch), 0) + 1
+            self.wait_seconds += sum(started - enqueued for _, _, enqueued in batch)
+            self.score_seconds += finished - started
+        for i, (_, future, _) in enumerate(batch):
+            if future.done():  # caller went away
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(results[i])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            scored = sum(size * count for size, count in self.batch_sizes.items())
+            return {
+                "queue_depth": self.depth,
+                "max_queue_depth": self.max_depth,
+                "queue_limit": self.max_queue,
+                "requests": self.requests,
+                "rejected": self.rejected,
+                "batches": self.batches,
+                "mean_batch_size": round(scored / self.batches, 2) if self.batches else None,
+                "batch_sizes": dict(sorted(self.batch_sizes.items())),
+                "mean_wait_ms": round(self.wait_seconds / scored * 1000, 3) if scored else None,
+                "mean_batch_ms": round(self.score_seconds / self.batches * 1000, 3) if self.batches else None,
+                "window_ms": self.window * 1000,
+                "max_batch": self.max_batch
+            }
+
+# ---------------------------
+# Batched scoring functions (items grouped by their request parameters)
+# ---------------------------
+def _grouped(items: List[Tuple], key: Callable[[Tuple], Any], score: Callable[[Any, List[int]], List[Any]]) -> List[Any]:
+    groups = {}
+    for i, item in enumerate(items):
+        groups.setdefault(key(item), []).append(i)
+    results = [None] * len(items)
+    for group_key, positions in groups.items():
+        for i, result in zip(positions, score(group_key, positions)):
+            results[i] = result
+    return results
+
+def score_profiles(items: List[Tuple[str, int, float, Optional[str], Tuple]]) -> List[Dict[str, Any]]:
+    """
+    items: (profile_text, top_n, match_threshold, engine, filters) with filters normalized
+    (attribute_filters.normalize_filters). Response-cache misses are scored with one
+    recommend_batch call per parameter set.
+    """
+    from response_cache import cached_recommend_batch
+    artifacts = rm.MODEL_ARTIFACTS
+
+    def score(params, positions):
+        top_n, match_threshold, engine, filters = params
+        try:
+            return cached_recommend_batch([items[i][0] for i in positions], artifacts, top_n=top_n,
+                                          match_threshold=match_threshold, engine=engine, filters=filters)
+        except ValueError as e:  # filter on an attribute that is not indexed
+            return [{"status": "error", "code": 400, "message": str(e)} for _ in positions]
+
+    return _grouped(items, lambda item: item[1:], score)
+
+def score_students(items: List[Tuple[str, str, str, int, float, Tuple]]) -> List[Dict[str, Any]]:
+    """
+    items: (student_id, students_csv, internships_csv, top_n, match_threshold, filters).
+    Cached student vectors of one store are stacked and scored in one engine call.
+    """
+    import scipy.sparse as sp
+    from student_store import get_student_store
+
+    def score(params, positions):
+        students_csv, internships_csv, top_n, match_threshold, filters = params
+        store = get_student_store(students_csv)
+        index = rm.INTERNSHIP_INDEX_CACHE.get_for_path(internships_csv)
+        try:
+            mask = rm.eligible_mask(index, filters)
+        except ValueError as e:
+            return [{"status": "error", "code": 400, "message": str(e)} for _ in positions]
+        results = [None] * len(positions)
+        found, vectors = [], []
+        started = time.perf_counter()
+        for j, i in enumerate(positions):
+            vector = store.vector(items[i][0], index["vectorizer"])
+            if vector is None:
+                results[j] = {"status": "error", "message": f"Student ID {items[i][0]} not found."}
+            else:
+                found.append(j)
+                vectors.append(vector)
+        stages = {"vector": time.perf_counter() - started}
+        if vectors:
+            vectorized = time.perf_counter()
+            ranked = rm.get_engine()(sp.vstack(vectors, format="csr"), index, rm._clip_top_n(top_n), mask)
+            stages["score"] = time.perf_counter() - vectorized
+            records = [store.get(items[positions[j]][0]) for j in found]
+            course_texts = [r.get("skills", "") + " " + r.get("interests", "") for r in records]
+            for j, result in zip(found, rm._timed_results(ranked, index, match_threshold, course_texts, stages)):
+                results[j] = result
+        rm._record("student", results, stages)
+        return results
+
+    return _grouped(items, lambda item: item[1:], score)
+
+# ---------------------------
+# Process-wide batchers
+# ---------------------------
+_BATCHERS = {}
+_BATCHERS_LOCK = threading.Lock()
+
+def get_batcher(name: str) -> MicroBatcher:
+    """
+    "profile" or "student" batcher (created on first use).
+    """
+    with _BATCHERS_LOCK:
+        if name not in _BATCHERS:
+            score_batch = {"profile": score_profiles, "student": score_students}[name]
+            _BATCHERS[name] = MicroBatcher(score_batch, name=name)
+        return _BATCHERS[name]
+
+def batcher_stats() -> Dict[str, Dict[str, Any]]:
+    with _BATCHERS_LOCK:
+        return {name: batcher.stats() for name, batcher in _BATCHERS.items()}
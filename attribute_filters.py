@@ -0,0 +1,200 @@
+"""
+attribute_filters.py
+
+AVSARSETU - Precomputed attribute bitmaps for filtered recommendations
+- At training time every indexed internship attribute (location, sector, education_level by
+  default; whichever of them the catalog has) gets one bitmap per distinct value: bit i is set
+  if internship row i has that value (cells may list several values separated by commas).
+  Bitmaps are np.packbits rows (n_rows / 8 bytes per value) stored with the artifacts
+  (artifacts["filters"]; filters.<attribute>.npy in the mmap format).
+- A query filter such as {"location": ["Delhi", "Remote"], "sector": "IT"} is combined before
+  scoring: values of one attribute are OR-ed, attributes are AND-ed, then AND-ed with the
+  tombstone mask of an incrementally updated index. The scoring engines only rank eligible rows,
+  so top-k is full whenever at least k internships are eligible.
+- Values are matched case-insensitively. Filtering on an attribute that is not indexed raises
+  ValueError (HTTP 400 in the API); an unknown value simply matches nothing.
+
+Example:
+    recommend_with_artifacts("Python, SQL", artifacts, filters={"location": "Delhi", "sector": "IT"})
+    GET /recommend/student/101?location=Delhi,Remote&sector=IT
+"""
+
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+import numpy as np
+
+import recommendation_model as rm
+
+FILTER_ATTRIBUTES = ("location", "sector", "education_level")
+VALUE_SEPARATOR = ","
+MASK_CACHE_SIZE = 256  # combined masks kept per filter index
+
+FilterSpec = Union[Dict[str, Any], Tuple[Tuple[str, Tuple[str, ...]], ...]]
+
+def _normalize_value(value: Any) -> str:
+    return str(value).strip().lower()
+
+def normalize_filters(filters: Optional[FilterSpec]) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    """
+    Canonical, hashable form of a filter spec: ((attribute, (value, ...)), ...) sorted, empty parts dropped.
+    A string value may list alternatives separated by commas ("Delhi,Remote").
+    """
+    if not filters:
+        return ()
+    normalized = []
+    for attribute, values in dict(filters).items():
+        if values is None:
+            continue
+        if isinstance(values, str):
+            values = values.split(VALUE_SEPARATOR)
+        values = tuple(sorted({_normalize_value(v) for v in values if _normalize_value(v)}))
+        if values:
+            normalized.append((str(attribute), values))
+    return tuple(sorted(normalized))
+
+# ---------------------------
+# Build (training time)
+# ---------------------------
+def build_filter_index(internships_df: "pd.DataFrame", attributes=FILTER_ATTRIBUTES) -> Dict[str, Any]:
+    """
+    {"rows": n, "attributes": {attribute: {"values": [...], "bits": uint8 (n_values, ceil(n / 8))}}}
+    for the attributes present in internships_df.
+    """
+    n = len(internships_df)
+    index = {"rows": n, "attributes": {}}
+    for attribute in attributes:
+        if attribute not in internships_df.columns:
+            continue
+        rows_by_value = {}
+        for row, cell in enumerate(internships_df[attribute].fillna("").astype(str).tolist()):
+            for value in cell.split(VALUE_SEPARATOR):
+                value = _normalize_value(value)
+                if value:
+                    rows_by_value.setdefault(value, []).append(row)
+        values = sorted(rows_by_value)
+        bits = np.empty((len(values), (n + 7) // 8), dtype=np.uint8)
+        row_mask = np.zeros(n, dtype=bool)
+        for i, value in enumerate(values):
+            rows = rows_by_value[value]
+            row_mask[rows] = True
+            bits[i] = np.packbits(row_mask)
+            row_mask[rows] = False
+        index["attributes"][attribute] = {"values": values, "bits": bits}
+    return index
+
+def attach_filter_index(artifacts: Dict[str, Any], attributes=FILTER_ATTRIBUTES) -> Optional[Dict[str, Any]]:
+    """
+    Build the bitmaps for the artifacts' catalog and store them in artifacts["filters"] (saved with
+    the model). Catalogs without any of the attributes are left unchanged.
+    """
+    index = build_filter_index(artifacts["internships_df"], attributes)
+    if not index["attributes"]:
+        return None
+    artifacts["filters"] = index
+    return index
+
+def get_filter_index(artifacts: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The stored bitmaps if they still describe the catalog, else bitmaps derived from internships_df
+    (artifacts trained before filters existed, or compacted by incremental updates). For an
+    incremental snapshot these are the bitmaps of its base segment.
+    """
+    artifacts = rm.base_artifacts(artifacts)
+    stored = artifacts.get("filters")
+    if stored is not None and stored["rows"] == artifacts["internship_vectors"].shape[0]:
+        return stored
+    return rm.derived_artifact(artifacts, "filters", lambda a: build_filter_index(a["internships_df"]))
+
+# ---------------------------
+# Query time
+# ---------------------------
+_CACHES = {}  # id(filter index) -> (filter index, OrderedDict: spec -> (active mask it was combined with, mask))
+_CACHES_LOCK = threading.Lock()
+
+def _mask_cache(index: Dict[str, Any]) -> OrderedDict:
+    with _CACHES_LOCK:
+        entry = _CACHES.get(id(index))
+        if entry is None or entry[0] is not index:
+            if len(_CACHES) >= 16:
+                _CACHES.clear()
+            entry = _CACHES[id(index)] = (index, OrderedDict())
+        return entry[1]
+
+def filter_mask(artifacts: Dict[str, Any], filters: Optional[FilterSpec]) -> Optional[np.ndarray]:
+    """
+    Boolean mask of the internships eligible for `filters` (and not removed), or the tombstone
+    mask alone (None if nothing is removed) when there are no filters.
+    Raises ValueError for attributes without a bitmap index.
+    """
+    active = artifacts.get("active")
+    spec = normalize_filters(filters)
+    if not spec:
+        return active
+    segments = artifacts.get("segments")
+    index = get_filter_index(artifacts)
+    # what a cached mask was combined with: tombstones (copy-on-write), or the snapshot's segments
+    source = active if segments is None else segments
+    cache = _mask_cache(index)
+    with _CACHES_LOCK:
+        cached = cache.get(spec)
+        if cached is not None and cached[0] is source:
+            cache.move_to_end(spec)
+            return cached[1]
+
+    if segments is None:
+        mask = _spec_mask(index, spec)
+    else:
+        # rows of the delta segment: small bitmaps of their own, derived once per delta; an
+        # attribute only one segment has a column for (added by an update) matches nothing in the other
+        delta_index = get_filter_index(segments["delta"])
+        indexed = set(index["attributes"]) | set(delta_index["attributes"])
+        for attribute, _ in spec:
+            if attribute not in indexed:
+                raise _unindexed(attribute, indexed)
+        mask = np.concatenate([_spec_mask(index, spec, strict=False),
+                               _spec_mask(delta_index, spec, strict=False)])
+    if active is not None:
+        mask &= np.asarray(active, dtype=bool)
+    mask.setflags(write=False)
+    with _CACHES_LOCK:
+        cache[spec] = (source, mask)
+        while len(cache) > MASK_CACHE_SIZE:
+            cache.popitem(last=False)
+    return mask
+
+def _unindexed(attribute: str, indexed) -> ValueError:
+    return ValueError(f"Cannot filter on '{attribute}': indexed attributes are "
+                      f"{sorted(indexed) or 'none (the catalog has no such columns)'}.")
+
+def _spec_mask(index: Dict[str, Any], spec, strict: bool = True) -> np.ndarray:
+    """
+    Rows of a filter index matching a normalized spec (values OR-ed, attributes AND-ed). An
+    attribute without bitmaps raises ValueError, or matches nothing when not `strict`.
+    """
+    n = index["rows"]
+    packed = None
+    for attribute, values in spec:
+        indexed = index["attributes"].get(attribute)
+        if indexed is None and not strict:
+            return np.zeros(n, dtype=bool)
+        if indexed is None:
+            raise _unindexed(attribute, index["attributes"])
+        positions = np.searchsorted(indexed["values"], values)  # values are sorted
+        positions = [p for p, value in zip(positions, values)
+                     if p < len(indexed["values"]) and indexed["values"][p] == value]
+        if positions:
+            bits = np.bitwise_or.reduce(indexed["bits"][positions], axis=0)
+        else:
+            bits = np.zeros(indexed["bits"].shape[1], dtype=np.uint8)
+        packed = bits if packed is None else packed & bits
+    return np.unpackbits(packed, count=n).astype(bool)
+
+def filter_stats(artifacts: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Indexed attributes with their number of values and bitmap bytes.
+    """
+    index = get_filter_index(artifacts)
+    return {attribute: {"values": len(a["values"]), "bytes": int(a["bits"].nbytes)}
+            for attribute, a in index["attributes"].items()}
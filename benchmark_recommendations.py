@@ -0,0 +1,480 @@
+"""
+benchmark_recommendations.py
+
+AVSARSETU - Benchmarks for the recommendation engine
+- Generates a seeded synthetic internship catalog (vocabulary taken from internships.csv).
+- ranking: compares the previous DataFrame copy + full sort ranking with the partial top-k
+  ranking used by recommend_with_artifacts, on the same similarity scores.
+- engines: per-query latency of the scoring engines ("exact" brute force vs "inverted" postings)
+  on the same profiles, and whether their top-k rows/scores are identical.
+- preprocess: compares the reference NLTK preprocessing with the memoized fast path
+  on a large synthetic corpus of internship documents and (repeating) profile strings.
+- courses: upskill course lookup with the compiled keyword matcher (course_matcher.py) vs the
+  original loop over every keyword, on catalogs of growing size (same suggestions checked).
+- skills: skill-graph engine (skill_graph.py) on synthetic user_skills edge lists of growing
+  size: CSV load + matrix build, co-occurrence precompute, similar skills / users lookups,
+  skill-based internship scores and the blended recommend_with_artifacts call.
+- pipeline: end-to-end microbenchmarks at each catalog size (seeded synthetic internships and
+  students, vocabulary from the sample CSVs and COURSE_MAPPING): preprocess_text,
+  train_and_save_model, get_recommendations, recommend_with_artifacts, ai_api's engine build
+  and its /recommend/profile handler (timed on the warm engine). Reports p50/p99 latency, throughput and peak memory, optionally
+  as JSON (--json) and compared against a previous run (--baseline) to catch regressions.
+
+How to use:
+   python benchmark_recommendations.py ranking --sizes 10000 100000 --queries 200
+   python benchmark_recommendations.py engines --sizes 10000 100000 --queries 200
+   python benchmark_recommendations.py engines --sizes 100000 1000000 --engines exact sharded
+   python benchmark_recommendations.py preprocess --docs 100000
+   python benchmark_recommendations.py courses --sizes 16 1000 10000 --queries 2000
+   python benchmark_recommendations.py skills --sizes 100000 1000000 5000000 --queries 200
+   python benchmark_recommendations.py pipeline --sizes 1000 10000 100000 1000000 --json bench.json
+   python benchmark_recommendations.py pipeline --sizes 1000 10000 --baseline bench.json --tolerance 0.25
+"""
+
+import os
+import sys
+import json
+import argparse
+import platform
+import tempfile
+import time
+import tracemalloc
+from typing import List, Dict, Any, Callable
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+import recommendation_model as rm
+
+# ---------------------------
+# Synthetic catalog
+# ---------------------------
+SAMPLE_BLOCK = 100_000  # rows drawn per block (bounds the without-replacement sampling matrix)
+
+def _split_values(column: pd.Series) -> List[str]:
+    return sorted({s.strip() for row in column for s in row.split(",") if s.strip()})
+
+def _course_vocabulary() -> List[str]:
+    """
+    COURSE_MAPPING keywords and course names, title-cased like the sample skills.
+    """
+    keywords = [k.title() if len(k) > 4 else k.upper() for k in rm.COURSE_MAPPING]
+    courses = [c for names in rm.COURSE_MAPPING.values() for c in names]
+    return sorted(set(keywords + courses))
+
+def _sample_phrases(rng: np.random.Generator, pool: List[str], n: int, k: int, sep: str,
+                    distinct: bool = False) -> List[str]:
+    """
+    n strings of k values from pool joined by sep (without repetition inside a string if distinct).
+    """
+    values = np.asarray(pool, dtype=object)
+    phrases = []
+    for start in range(0, n, SAMPLE_BLOCK):
+        size = min(SAMPLE_BLOCK, n - start)
+        if distinct:
+            idx = np.argsort(rng.random((size, len(pool))), axis=1)[:, :k]
+        else:
+            idx = rng.integers(len(pool), size=(size, k))
+        phrases.extend(sep.join(row) for row in values[idx].tolist())
+    return phrases
+
+def synthetic_internships(n: int, seed: int = 42, internships_path: str = "internships.csv",
+                          course_vocabulary: bool = False) -> pd.DataFrame:
+    """
+    Build n internships by recombining the title/description/skill vocabulary of the sample catalog
+    (plus the COURSE_MAPPING skills if course_vocabulary=True).
+    """
+    rng = np.random.default_rng(seed)
+    sample = pd.read_csv(internships_path, dtype=str).fillna("")
+    titles = sample["title"].tolist()
+    desc_words = " ".join(sample["description"]).lower().replace(",", " ").split()
+    skills = _split_values(sample["required_skills"])
+    if course_vocabulary:
+        skills = sorted(set(skills) | set(_course_vocabulary()))
+
+    return pd.DataFrame({
+        "internship_id": [str(100000 + i) for i in range(n)],
+        "title": [titles[i] for i in rng.integers(len(titles), size=n)],
+        "description": _sample_phrases(rng, desc_words, n, 8, " "),
+        "required_skills": _sample_phrases(rng, skills, n, 3, ", ", distinct=True)
+    })
+
+def synthetic_students(n: int, seed: int = 42, students_path: str = "students.csv") -> pd.DataFrame:
+    """
+    Build n students with skills/interests drawn from the sample students and COURSE_MAPPING.
+    """
+    rng = np.random.default_rng(seed + 1)
+    sample = pd.read_csv(students_path, dtype=str).fillna("")
+    skills = sorted(set(_split_values(sample["skills"])) | set(_course_vocabulary()))
+    interests = _split_values(sample["interests"])
+    return pd.DataFrame({
+        "student_id": [str(1000000 + i) for i in range(n)],
+        "skills": _sample_phrases(rng, skills, n, 3, ", ", distinct=True),
+        "interests": _sample_phrases(rng, interests, n, 2, ", ", distinct=True)
+    })
+
+def synthetic_artifacts(internships_df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Artifacts for a synthetic catalog. Docs are already lowercase words, so NLTK preprocessing
+    is skipped here (it is not what this benchmark measures).
+    """
+    docs = internships_df.apply(rm.build_internship_document, axis=1).str.lower().tolist()
+    tfidf = TfidfVectorizer(ngram_range=(1, 2), max_features=5000)
+    vectors = tfidf.fit_transform(docs)
+    return {
+        "vectorizer": tfidf,
+        "internship_vectors": vectors,
+        "internships_df": internships_df,
+        "documents": docs,
+        "internship_ids": internships_df["internship_id"].tolist(),
+        "internship_titles": internships_df["title"].tolist()
+    }
+
+# ---------------------------
+# Previous ranking implementation (reference)
+# ---------------------------
+def legacy_rank(similarities: np.ndarray, artifacts: Dict[str, Any], top_n: int = 5) -> List[Dict[str, Any]]:
+    internships_df = artifacts["internships_df"].copy()
+    internships_df["match_score"] = similarities
+    ranked = internships_df.sort_values(by="match_score", ascending=False).reset_index(drop=True)
+    recommendations = []
+    for _, row in ranked.head(top_n).iterrows():
+        recommendations.append({
+            "internship_id": row.get("internship_id"),
+            "title": row.get("title"),
+            "match_score": round(float(row.get("match_score", 0.0)), 4)
+        })
+    return recommendations
+
+def _time_per_call(fn, inputs) -> float:
+    start = time.perf_counter()
+    for x in inputs:
+        fn(x)
+    return (time.perf_counter() - start) / max(1, len(inputs))
+
+# ---------------------------
+# Ranking benchmark
+# ---------------------------
+def bench_ranking(sizes: List[int], n_queries: int, seed: int = 42) -> None:
+    students_df = pd.read_csv("students.csv", dtype=str).fillna("")
+    profiles = students_df.apply(rm.build_student_document, axis=1).str.lower().tolist()
+    profiles = (profiles * (n_queries // len(profiles) + 1))[:n_queries]
+
+    print(f"{'internships':>12} {'legacy ms':>10} {'top-k ms':>10} {'speedup':>8} {'same scores':>12}")
+    for n in sizes:
+        artifacts = synthetic_artifacts(synthetic_internships(n, seed=seed))
+        query_vectors = artifacts["vectorizer"].transform(profiles)
+        scores = cosine_similarity(query_vectors, artifacts["internship_vectors"])
+
+        legacy = _time_per_call(lambda row: legacy_rank(row, artifacts), scores)
+        fast = _time_per_call(lambda row: rm._rank_scores(row, artifacts, 5, 0.0, ""), scores)
+
+        same = all(
+            [r["match_score"] for r in legacy_rank(row, artifacts)] ==
+            [r["match_score"] for r in rm._rank_scores(row, artifacts, 5, 0.0, "")["recommendations"]]
+            for row in scores
+        )
+        print(f"{n:>12} {legacy * 1000:>10.3f} {fast * 1000:>10.3f} {legacy / fast:>7.1f}x {str(same):>12}")
+
+# ---------------------------
+# Scoring engine benchmark
+# ---------------------------
+def bench_engines(sizes: List[int], n_queries: int, seed: int = 42, engines: List[str] = ("exact", "inverted")) -> None:
+    students_df = pd.read_csv("students.csv", dtype=str).fillna("")
+    profiles = students_df.apply(rm.build_student_document, axis=1).str.lower().tolist()
+    profiles = (profiles * (n_queries // len(profiles) + 1))[:n_queries]
+
+    print(f"{'internships':>12} " + " ".join(f"{name + ' ms':>12}" for name in engines) + f" {'same top-k':>11}")
+    for n in sizes:
+        artifacts = synthetic_artifacts(synthetic_internships(n, seed=seed))
+        query_vectors = artifacts["vectorizer"].transform(profiles)
+        rows = [query_vectors[i] for i in range(query_vectors.shape[0])]
+        timings, outputs = [], []
+        for name in engines:
+            engine = rm.get_engine(name)
+            rm.prepare_engine(artifacts, name, wait=True)  # background-built indexes (lsa, sharded)
+            engine(rows[0], artifacts, 5)  # build derived structures outside the timing
+            timings.append(_time_per_call(lambda q: engine(q, artifacts, 5), rows))
+            outputs.append([engine(q, artifacts, 5)[0] for q in rows])
+        same = all(
+            np.array_equal(a[0], b[0]) and np.array_equal(a[1], b[1])
+            for other in outputs[1:] for a, b in zip(outputs[0], other)
+        )
+        print(f"{n:>12} " + " ".join(f"{t * 1000:>12.3f}" for t in timings) + f" {str(same):>11}")
+
+# ---------------------------
+# Preprocessing benchmark
+# ---------------------------
+def bench_preprocess(n_docs: int, seed: int = 42) -> None:
+    """
+    Time preprocess_text_nltk (reference) vs preprocess_text (fast tokenizer + caches).
+    The corpus mixes unique internship documents with profile strings drawn from a small pool,
+    which is what the serving path sees.
+    """
+    rng = np.random.default_rng(seed)
+    internships = synthetic_internships(n_docs // 2, seed=seed)
+    documents = internships.apply(rm.build_internship_document, axis=1).tolist()
+    students_df = pd.read_csv("students.csv", dtype=str).fillna("")
+    profile_pool = students_df.apply(rm.build_student_document, axis=1).tolist()
+    profiles = [profile_pool[i] for i in rng.integers(len(profile_pool), size=n_docs - len(documents))]
+    corpus = documents + profiles
+
+    start = time.perf_counter()
+    reference = [rm.preprocess_text_nltk(t) for t in corpus]
+    t_reference = time.perf_counter() - start
+
+    rm.clear_preprocess_caches()
+    start = time.perf_counter()
+    fast_docs = [rm.preprocess_document(t) for t in documents]
+    fast_profiles = [rm.preprocess_text(t) for t in profiles]
+    t_fast = time.perf_counter() - start
+
+    same = reference == fast_docs + fast_profiles
+    print(f"{'texts':>8} {'nltk s':>8} {'fast s':>8} {'speedup':>8} {'same output':>12}")
+    print(f"{len(corpus):>8} {t_reference:>8.2f} {t_fast:>8.2f} {t_reference / t_fast:>7.1f}x {str(same):>12}")
+    print("cache stats:", rm.preprocess_cache_stats())
+
+# ---------------------------
+# Upskill course lookup benchmark
+# ---------------------------
+def legacy_courses(cleaned: str, mapping: Dict[str, List[str]], fallback: List[str], top_k: int = 3) -> List[str]:
+    tokens = set(cleaned.split())
+    suggestions = []
+    for kw, courses in mapping.items():
+        if kw in cleaned or kw in tokens:
+            for c in courses:
+                if c not in suggestions:
+                    suggestions.append(c)
+    return (suggestions or fallback)[:top_k]
+
+def synthetic_course_mapping(n_keywords: int, seed: int = 42) -> Dict[str, List[str]]:
+    """
+    COURSE_MAPPING followed by n_keywords - len(COURSE_MAPPING) made-up keyword -> course entries.
+    """
+    rng = np.random.default_rng(seed)
+    mapping = dict(rm.COURSE_MAPPING)
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    while len(mapping) < n_keywords:
+        keyword = "".join(rng.choice(letters, size=int(rng.integers(4, 12))))
+        mapping.setdefault(keyword, [f"{keyword.title()} Essentials", f"Applied {keyword.title()}"])
+    return mapping
+
+def bench_courses(sizes: List[int], n_queries: int, seed: int = 42) -> None:
+    from course_matcher import CourseCatalog, FALLBACK_COURSES
+    students = synthetic_students(n_queries, seed=seed)
+    cleaned = [rm.preprocess_text(s + " " + i) for s, i in zip(students["skills"], students["interests"])]
+
+    print(f"{'keywords':>9} {'loop us':>10} {'matcher us':>11} {'speedup':>8} {'same courses':>13}")
+    for n in sizes:
+        mapping = synthetic_course_mapping(n, seed=seed)
+        catalog = CourseCatalog.from_mapping(mapping)
+        loop = _time_per_call(lambda text: legacy_courses(text, mapping, FALLBACK_COURSES), cleaned)
+        fast = _time_per_call(catalog.recommend, cleaned)
+        same = all(legacy_courses(text, mapping, FALLBACK_COURSES) == catalog.recommend(text) for text in cleaned)
+        print(f"{len(mapping):>9} {loop * 1e6:>10.2f} {fast * 1e6:>11.2f} {loop / fast:>7.1f}x {str(same):>13}")
+
+# ---------------------------
+# Skill-graph benchmark
+# ---------------------------
+SKILL_USERS_PER_EDGE = 0.2   # synthetic users hold 5 skills on average
+SKILL_POPULARITY = 0.8       # Zipf-like exponent of skill popularity
+
+def synthetic_user_skills(n_edges: int, n_skills: int, seed: int = 42) -> pd.DataFrame:
+    """
+    n_edges (user_id, skill_id) rows; skill ids 1..n_skills with skewed popularity, users u1..uN.
+    """
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, n_skills + 1) ** SKILL_POPULARITY
+    skills = rng.choice(n_skills, size=n_edges, p=popularity / popularity.sum()) + 1
+    users = rng.integers(0, max(1, int(n_edges * SKILL_USERS_PER_EDGE)), size=n_edges)
+    return pd.DataFrame({"user_id": np.char.add("u", users.astype(str)), "skill_id": skills})
+
+def bench_skills(sizes: List[int], n_queries: int, seed: int = 42, n_internships: int = 10000) -> None:
+    import skill_graph
+    names = _split_values(pd.read_csv("internships.csv", dtype=str).fillna("")["required_skills"])
+    names += [f"Skill {i}" for i in range(len(names), 2000)]
+    skills_df = pd.DataFrame({"id": np.arange(1, len(names) + 1), "name": names})
+    internships = synthetic_internships(n_internships, seed=seed)
+    artifacts = synthetic_artifacts(internships)
+    students = synthetic_students(n_queries, seed=seed)
+    profiles = (students["skills"] + " " + students["interests"]).tolist()
+
+    print(f"{'edges':>9} {'users':>8} {'load s':>7} {'MB':>6} {'skills us':>10} {'users us':>9} "
+          f"{'scores us':>10} {'blend ms':>9} {'cosine ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        skills_path = os.path.join(tmp, "skills.csv")
+        skills_df.to_csv(skills_path, index=False)
+        for n in sizes:
+            edges_path = os.path.join(tmp, "user_skills.csv")
+            synthetic_user_skills(n, len(names), seed=seed).to_csv(edges_path, index=False)
+            started = time.perf_counter()
+            graph = skill_graph.SkillGraph.from_csv(edges_path, skills_path)
+            load = time.perf_counter() - started
+            stats = graph.stats()
+
+            rng = np.random.default_rng(seed)
+            skill_queries = [graph.skill_ids[i] for i in rng.integers(0, len(names), n_queries)]
+            user_queries = [str(graph.user_ids[i]) for i in rng.integers(0, stats["users"], n_queries)]
+            graph.internship_matrix(artifacts)  # built once per catalog, like the other derived indexes
+            t_skills = _time_per_call(graph.similar_skills, skill_queries)
+            t_users = _time_per_call(graph.similar_users, user_queries)
+            t_scores = _time_per_call(lambda p: graph.internship_scores(p, artifacts), profiles)
+            t_cosine = _time_per_call(lambda p: rm.recommend_with_artifacts(p, artifacts, skill_weight=0), profiles)
+            skill_graph.set_skill_graph(graph)
+            t_blend = _time_per_call(lambda p: rm.recommend_with_artifacts(p, artifacts, skill_weight=0.3), profiles)
+            print(f"{stats['edges']:>9} {stats['users']:>8} {load:>7.2f} {stats['bytes'] / 1e6:>6.1f} "
+                  f"{t_skills * 1e6:>10.1f} {t_users * 1e6:>9.1f} {t_scores * 1e6:>10.1f} "
+                  f"{t_blend * 1e3:>9.2f} {t_cosine * 1e3:>10.2f}")
+    skill_graph.set_skill_graph(None)
+
+# ---------------------------
+# End-to-end pipeline benchmark
+# ---------------------------
+# ai_api builds its own engine (own analyzer, own TF-IDF fit over every document) once per catalog;
+# above this size that build alone dominates the suite's run time, so the stage is skipped
+AI_API_MAX_ROWS = 100_000
+AI_API_QUERIES = 20
+
+def _latency_stats(latencies: List[float], units: int = None) -> Dict[str, Any]:
+    """
+    p50/p99/mean latency (ms) and throughput (units per second; units default to the number of calls).
+    """
+    total = float(np.sum(latencies))
+    units = len(latencies) if units is None else units
+    return {
+        "calls": len(latencies),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 4),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 4),
+        "mean_ms": round(total / len(latencies) * 1000, 4),
+        "throughput_per_s": round(units / total, 2) if total > 0 else None
+    }
+
+def _measure(fn: Callable[[Any], Any], inputs: List[Any], trace_memory: bool = True,
+             units: int = None) -> Dict[str, Any]:
+    """
+    Time fn on every input, then run it once more under tracemalloc for the peak allocation
+    (Python allocations of this process only: fn must not hand work to child processes).
+    """
+    latencies = []
+    for x in inputs:
+        start = time.perf_counter()
+        fn(x)
+        latencies.append(time.perf_counter() - start)
+    stats = _latency_stats(latencies, units)
+    if trace_memory:
+        tracemalloc.start()
+        fn(inputs[0])
+        stats["peak_alloc_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+        tracemalloc.stop()
+    from streaming_ingest import peak_rss_mb
+    stats["peak_rss_mb"] = peak_rss_mb()
+    return stats
+
+def bench_pipeline(sizes: List[int], n_queries: int, seed: int = 42, trace_memory: bool = True) -> Dict[str, Any]:
+    """
+    Returns a JSON-serializable report: {"environment": ..., "results": [{"rows": n, "stages": {...}}]}.
+    """
+    import ai_api
+
+    report = {
+        "suite": "pipeline",
+        "seed": seed,
+        "queries": n_queries,
+        "environment": {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+                        "machine": platform.machine(), "cpus": os.cpu_count(), "engine": rm.SCORING_ENGINE},
+        "results": []
+    }
+    rm.warm_nltk()  # one-off stopword/WordNet load is not part of any stage
+    for n in sizes:
+        internships = synthetic_internships(n, seed=seed, course_vocabulary=True)
+        students = synthetic_students(n, seed=seed)
+        queries = students.sample(n=min(n_queries, n), random_state=seed)
+        profiles = (queries["skills"] + " " + queries["interests"]).tolist()
+        stages = {}
+
+        rm.clear_preprocess_caches()  # cold: every profile is new to the caches
+        stages["preprocess_text"] = _measure(rm.preprocess_text, profiles, trace_memory)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            model_path = os.path.join(tmp, "model.joblib")
+            # serial: tracemalloc (peak MB) only sees this process, not preprocessing worker processes
+            stages["train_and_save_model"] = _measure(lambda df: rm.train_and_save_model(df, model_path, workers=1),
+                                                      [internships], trace_memory, units=n)
+            artifacts = rm.load_model_artifacts(model_path)
+
+        stages["get_recommendations"] = _measure(
+            lambda sid: rm.get_recommendations(sid, students, internships, index=artifacts),
+            queries["student_id"].tolist(), trace_memory)
+        stages["recommend_with_artifacts"] = _measure(lambda text: rm.recommend_with_artifacts(text, artifacts),
+                                                      profiles, trace_memory)
+        if n <= AI_API_MAX_ROWS:
+            ai_api.internships_df = internships
+            # reassigning the catalog makes the next call build a new engine; do that outside the timed calls
+            stages["ai_api.build_engine"] = _measure(lambda _: ai_api.build_engine(), [None], trace_memory=False,
+                                                     units=n)
+            payloads = [ai_api.ProfilePayload(skills=s, interests=i)
+                        for s, i in zip(queries["skills"], queries["interests"])][:AI_API_QUERIES]
+            stages["ai_api.recommend_by_profile"] = _measure(ai_api.recommend_by_profile, payloads, trace_memory)
+
+        report["results"].append({"rows": n, "stages": stages})
+        print(f"{n} rows")
+        print(f"   {'stage':<30} {'p50 ms':>10} {'p99 ms':>10} {'per s':>12} {'peak MB':>9}")
+        for stage, s in stages.items():
+            print(f"   {stage:<30} {s['p50_ms']:>10.3f} {s['p99_ms']:>10.3f} {s['throughput_per_s'] or 0:>12.1f} "
+                  f"{s.get('peak_alloc_mb', s['peak_rss_mb']) or 0:>9.1f}")
+        del artifacts
+    return report
+
+def compare_reports(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Stages whose p50 latency grew by more than `tolerance` (fraction) against the baseline report.
+    """
+    previous = {(r["rows"], stage): s for r in baseline["results"] for stage, s in r["stages"].items()}
+    regressions = []
+    for r in report["results"]:
+        for stage, s in r["stages"].items():
+            before = previous.get((r["rows"], stage))
+            if before and before["p50_ms"] > 0 and s["p50_ms"] > before["p50_ms"] * (1 + tolerance):
+                regressions.append(f"{stage} @ {r['rows']} rows: p50 {before['p50_ms']} -> {s['p50_ms']} ms")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AVSARSETU - recommendation benchmarks")
+    parser.add_argument("suite", nargs="?", default="ranking",
+                        choices=["ranking", "engines", "preprocess", "courses", "skills", "pipeline"],
+                        help="Which benchmark to run")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="Synthetic catalog sizes")
+    parser.add_argument("--queries", type=int, default=200, help="Number of profile queries per size")
+    parser.add_argument("--engines", type=str, nargs="+", default=["exact", "inverted"],
+                        help="engines: scoring engines to compare (e.g. exact inverted lsa sharded)")
+    parser.add_argument("--docs", type=int, default=100000, help="Corpus size for the preprocess benchmark")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the synthetic catalog")
+    parser.add_argument("--json", type=str, default=None, help="pipeline: write the report to this JSON file")
+    parser.add_argument("--baseline", type=str, default=None, help="pipeline: JSON report of a previous run to compare")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="pipeline: allowed p50 slowdown vs the baseline")
+    parser.add_argument("--no_memory", action="store_true", help="pipeline: skip the tracemalloc peak measurement")
+    args = parser.parse_args()
+    if args.suite == "pipeline":
+        report = bench_pipeline(args.sizes, args.queries, seed=args.seed, trace_memory=not args.no_memory)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as fh:
+                json.dump(report, fh, indent=2)
+            print(f"Report written to {args.json}")
+        if args.baseline:
+            with open(args.baseline, encoding="utf-8") as fh:
+                regressions = compare_reports(report, json.load(fh), args.tolerance)
+            for line in regressions:
+                print("REGRESSION:", line)
+            sys.exit(1 if regressions else 0)
+    elif args.suite == "skills":
+        bench_skills(args.sizes, args.queries, seed=args.seed)
+    elif args.suite == "courses":
+        bench_courses(args.sizes, args.queries, seed=args.seed)
+    elif args.suite == "preprocess":
+        bench_preprocess(args.docs, seed=args.seed)
+    elif args.suite == "engines":
+        bench_engines(args.sizes, args.queries, seed=args.seed, engines=args.engines)
+    else:
+        bench_ranking(args.sizes, args.queries, seed=args.seed)
@@ -0,0 +1,167 @@
+"""
+bulk_scoring.py
+
+AVSARSETU - Offline bulk scoring of every student (nightly recommendations)
+- Fits the internship index once (or loads saved artifacts) and shares it with worker
+  processes through a memory-mapped artifact directory (artifact_store.py).
+- Streams students.csv in chunks; each chunk is scored as one matrix in a worker
+  (recommend_students) and written to JSONL as soon as it finishes.
+- At most MAX_IN_FLIGHT_PER_WORKER chunks per worker are queued, so memory stays bounded
+  no matter how many students there are.
+- Resumable: students already present in the output file are skipped, and a line cut off
+  by a crash is dropped before appending.
+
+Each output line: {"student_id": "...", "status": "success"/"upskill", ...same fields as get_recommendations}
+Lines are written in completion order, not CSV order.
+
+How to use:
+   python recommendation_model.py bulk --students students.csv --internships internships.csv --out recs.jsonl
+   python recommendation_model.py bulk --artifacts avsarsetu_model.mmap --workers 8 --chunk_size 2000
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from typing import List, Dict, Any, Optional, Iterator, Set
+
+import recommendation_model as rm
+
+CHUNK_SIZE = 1000
+MAX_IN_FLIGHT_PER_WORKER = 2
+
+# ---------------------------
+# Worker side
+# ---------------------------
+_WORKER_ARTIFACTS = None
+
+def _init_worker(artifacts_path: str) -> None:
+    global _WORKER_ARTIFACTS
+    _WORKER_ARTIFACTS = rm.load_model_artifacts(artifacts_path)
+
+def _score_chunk(records: List[Dict[str, str]], top_n: int, match_threshold: float,
+                 engine: Optional[str]) -> List[str]:
+    """
+    Score one chunk of student records; returns JSON lines (without newlines).
+    """
+    import pandas as pd
+    students_df = pd.DataFrame(records)
+    results = rm.recommend_students(students_df, _WORKER_ARTIFACTS, top_n=top_n,
+                                    match_threshold=match_threshold, engine=engine)
+    return [json.dumps({"student_id": record["student_id"], **result}) for record, result in zip(records, results)]
+
+# ---------------------------
+# Resume support
+# ---------------------------
+def completed_student_ids(out_path: str) -> Set[str]:
+    """
+    Student ids already written to out_path. A trailing partial line (crash mid-write) is truncated away.
+    """
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    valid_bytes = 0
+    with open(out_path, "rb") as fh:
+        for line in fh:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(str(json.loads(line)["student_id"]))
+            except (ValueError, KeyError):
+                break
+            valid_bytes += len(line)
+    if valid_bytes != os.path.getsize(out_path):
+        print(f"Dropping incomplete output after byte {valid_bytes} of {out_path}")
+        with open(out_path, "r+b") as fh:
+            fh.truncate(valid_bytes)
+    return done
+
+def iter_student_chunks(students_csv: str, chunk_size: int = CHUNK_SIZE,
+                        skip_ids: Optional[Set[str]] = None) -> Iterator[List[Dict[str, str]]]:
+    """
+    Read students_csv in chunks of plain dict records, leaving out students in skip_ids.
+    """
+    from streaming_ingest import iter_csv_chunks
+    for chunk in iter_csv_chunks(students_csv, chunk_size):
+        if skip_ids:
+            chunk = chunk[~chunk["student_id"].isin(skip_ids)]
+        if not chunk.empty:
+            yield chunk.to_dict("records")
+
+# ---------------------------
+# Driver
+# ---------------------------
+def bulk_score(students_csv: str = "students.csv",
+               out_path: str = "recs.jsonl",
+               internships_csv: str = "internships.csv",
+               artifacts_path: Optional[str] = None,
+               chunk_size: int = CHUNK_SIZE,
+               workers: int = 0,
+               top_n: int = 5,
+               match_threshold: float = 0.4,
+               engine: Optional[str] = None,
+               resume: bool = True) -> Dict[str, Any]:
+    """
+    Score every student in students_csv and append the results to out_path (JSONL).
+    artifacts_path: saved artifacts to use (an mmap directory is shared by all workers without copies);
+                    when omitted the index is fitted once on internships_csv.
+    workers: process count (0 = os.cpu_count(); 1 = score in this process).
+    Returns run statistics.
+    """
+    workers = workers or os.cpu_count() or 1
+    skip_ids = completed_student_ids(out_path) if resume else set()
+    if skip_ids:
+        print(f"Resuming: {len(skip_ids)} students already scored in {out_path}")
+    elif not resume and os.path.exists(out_path):
+        os.remove(out_path)
+
+    tmp_dir = None
+    if artifacts_path is None:
+        import pandas as pd
+        from artifact_store import save_mmap_artifacts
+        print(f"Fitting internship index on {internships_csv}...")
+        internships_df = pd.read_csv(internships_csv, dtype=str).fillna("")
+        tmp_dir = tempfile.mkdtemp(prefix="avsarsetu-bulk-")
+        artifacts_path = os.path.join(tmp_dir, "model.mmap")
+        save_mmap_artifacts(rm.build_internship_index(internships_df), artifacts_path)
+
+    start = time.perf_counter()
+    scored = 0
+    try:
+        with open(out_path, "a", encoding="utf-8") as out:
+            def write(lines: List[str]) -> None:
+                nonlocal scored
+                out.write("".join(line + "\n" for line in lines))
+                out.flush()
+                scored += len(lines)
+                elapsed = time.perf_counter() - start
+                print(f"Scored {scored} students ({scored / max(elapsed, 1e-9):.0f}/s)")
+
+            chunks = iter_student_chunks(students_csv, chunk_size, skip_ids)
+            if workers == 1:
+                _init_worker(artifacts_path)
+                for records in chunks:
+                    write(_score_chunk(records, top_n, match_threshold, engine))
+            else:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                         initargs=(artifacts_path,)) as pool:
+                    pending = set()
+                    for records in chunks:
+                        pending.add(pool.submit(_score_chunk, records, top_n, match_threshold, engine))
+                        if len(pending) >= workers * MAX_IN_FLIGHT_PER_WORKER:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                write(future.result())
+                    for future in as_completed(pending):
+                        write(future.result())
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    elapsed = time.perf_counter() - start
+    stats = {"scored": scored, "skipped": len(skip_ids), "seconds": round(elapsed, 3), "workers": workers,
+             "out": out_path}
+    print(f"Bulk scoring finished: {stats}")
+    return stats
@@ -0,0 +1,108 @@
+"""
+catalog_log.py
+
+AVSARSETU - Durable, shared log of the catalog write endpoints
+- POST /internships, PUT and DELETE /internships/{id} change the served artifacts in memory only
+  (incremental_index.py). Without this log those changes are lost on restart, hot reload,
+  watcher reload or rollback, and with `uvicorn --workers N` only the worker that took the
+  request sees them.
+- Every change is appended to a local SQLite file next to the artifacts (like the shared
+  response cache, every worker process on the host reads and writes it). Each worker replays
+  the entries it has not applied yet onto its IncrementalIndex, and replays the whole log onto
+  a freshly loaded or rolled-back model version.
+- Replay is an upsert: an "add" of a live id updates it, an update or removal of an unknown id is
+  skipped, so replaying onto a model that was retrained with some of the postings is harmless.
+  Vocabulary refreshes are not logged (they are recomputed from the live catalog).
+
+Environment:
+   AVSARSETU_CATALOG_LOG=<artifacts path>.catalog.sqlite   log file ("" keeps changes in memory only)
+   AVSARSETU_CATALOG_SYNC_SECONDS=1                       how often a worker checks for new entries
+
+Example:
+    log = CatalogLog("avsarsetu_model.joblib.catalog.sqlite")
+    log.append([("add", "I-900", {"internship_id": "I-900", "title": "ML intern"})])
+    apply_ops(index, [op for _, *op in log.read(after=0)])
+"""
+
+import json
+import time
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+import pandas as pd
+
+class CatalogLog:
+    """
+    Append-only (op, internship_id, fields) entries with increasing sequence numbers.
+    """
+
+    def __init__(self, path: str):
+        import sqlite3
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS ops (seq INTEGER PRIMARY KEY AUTOINCREMENT, op TEXT, "
+                         "internship_id TEXT, fields TEXT, logged_at REAL)")
+        self._db.commit()
+
+    def append(self, ops: List[Tuple[str, str, Optional[Dict[str, Any]]]]) -> None:
+        """
+        Append ("add" | "update" | "remove", internship_id, fields) entries in one transaction.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.executemany("INSERT INTO ops (op, internship_id, fields, logged_at) VALUES (?, ?, ?, ?)",
+                                 [(op, str(internship_id), json.dumps(fields or {}), now)
+                                  for op, internship_id, fields in ops])
+            self._db.commit()
+
+    def read(self, after: int = 0) -> List[Tuple[int, str, str, Dict[str, Any]]]:
+        """
+        (seq, op, internship_id, fields) entries logged after sequence number `after`, in order.
+        """
+        with self._lock:
+            rows = self._db.execute("SELECT seq, op, internship_id, fields FROM ops WHERE seq > ? ORDER BY seq",
+                                    (after,)).fetchall()
+        return [(seq, op, internship_id, json.loads(fields)) for seq, op, internship_id, fields in rows]
+
+    def last_seq(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM ops").fetchone()[0]
+
+    def clear(self) -> None:
+        """
+        Drop every entry (e.g. once a retrained model includes the logged postings).
+        """
+        with self._lock:
+            self._db.execute("DELETE FROM ops")
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+def apply_ops(index, ops: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+    """
+    Replay (op, internship_id, fields) entries onto an IncrementalIndex with upsert semantics.
+    Consecutive adds of new ids are appended as one batch.
+    """
+    batch, pending = [], set()
+
+    def flush():
+        if batch:
+            index.add_internships(pd.DataFrame(batch))
+            batch.clear()
+            pending.clear()
+
+    for op, internship_id, fields in ops:
+        if op == "add" and internship_id not in pending and internship_id not in index.artifacts["id_to_row"]:
+            batch.append(dict(fields, internship_id=internship_id))
+            pending.add(internship_id)
+            continue
+        flush()
+        if op == "remove":
+            index.remove_internship(internship_id)
+        else:
+            index.update_internship(internship_id, {k: v for k, v in fields.items() if k != "internship_id"})
+    flush()
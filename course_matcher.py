@@ -0,0 +1,208 @@
+"""
+course_matcher.py
+
+AVSARSETU - Compiled keyword matcher and course catalog for the upskill fallback
+- The catalog maps keywords to courses (COURSE_MAPPING by default, or a SWAYAM / Skill India
+  export loaded from a file). All keywords are compiled into one Aho-Corasick automaton, so a
+  profile is scanned once, character by character, whatever the number of keywords.
+- Matching keeps the semantics of the original loop: a keyword matches if it occurs anywhere
+  in the cleaned profile text (substring, not only whole tokens).
+- Courses are ranked by the weight of their strongest matched keyword; ties keep catalog
+  order (keyword order, then course order). With the default catalog every weight is 1, so
+  the suggestions are exactly the ones the keyword loop produced.
+
+Catalog files:
+- .json: {"keyword": ["Course", ...], ...} (COURSE_MAPPING shape), or
+         [{"keyword": "python", "courses": ["..."], "weight": 2.0}, ...]
+- .csv:  keyword,course[,weight]  (one row per keyword/course pair, rows in priority order)
+Keywords from files are cleaned like profiles (preprocess_text), so "Machine Learning" or
+"Node.js" match what the cleaned profile text contains.
+
+How to use:
+   AVSARSETU_COURSE_CATALOG=swayam_courses.csv uvicorn recommendation_model:app
+   python course_matcher.py swayam_courses.csv "Python, SQL and data analysis"
+"""
+
+import os
+import sys
+import json
+import threading
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+
+import recommendation_model as rm
+
+COURSE_CATALOG_PATH = os.environ.get("AVSARSETU_COURSE_CATALOG") or None
+FALLBACK_COURSES = [
+    "Data Science with Python",
+    "Full-Stack Web Development",
+    "Fundamentals of Machine Learning"
+]
+
+def _clean_keyword(keyword: str) -> str:
+    """
+    A catalog keyword in the form it takes inside a cleaned profile (stopword-only keywords stay raw).
+    """
+    return rm.preprocess_text(keyword) or str(keyword).strip().lower()
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over characters: find() returns the ids of all keywords occurring in a text.
+    """
+
+    def __init__(self, keywords: List[str]):
+        self._goto = [{}]       # state -> {char: state}
+        self._fail = [0]
+        self._out = [()]        # state -> ids of keywords ending here (including via fail links)
+        for keyword_id, keyword in enumerate(keywords):
+            if keyword:
+                self._insert(keyword, keyword_id)
+        self._link()
+
+    def _insert(self, keyword: str, keyword_id: int) -> None:
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        self._out[state] = self._out[state] + (keyword_id,)
+
+    def _link(self) -> None:
+        queue = list(self._goto[0].values())  # depth-1 states fail to the root
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> set:
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+    @property
+    def states(self) -> int:
+        return len(self._goto)
+
+class CourseCatalog:
+    """
+    Keyword -> courses catalog with a compiled matcher.
+    entries: (keyword, courses, weight) in priority order.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, List[str], float]], fallback: Optional[List[str]] = None,
+                 source: str = "COURSE_MAPPING"):
+        merged = {}  # keyword -> [courses, weight]; repeated keywords (CSV rows) are merged in order
+        for keyword, courses, weight in entries:
+            keyword = str(keyword).strip().lower()
+            if not keyword:
+                continue
+            entry = merged.setdefault(keyword, [[], float(weight)])
+            entry[0].extend(c for c in courses if c not in entry[0])
+            entry[1] = max(entry[1], float(weight))
+        self.keywords = list(merged)
+        self.courses = [merged[k][0] for k in self.keywords]
+        self.weights = [merged[k][1] for k in self.keywords]
+        self.fallback = list(FALLBACK_COURSES if fallback is None else fallback)
+        self.source = source
+        self.matcher = KeywordMatcher(self.keywords)
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict[str, List[str]], fallback: Optional[List[str]] = None,
+                     source: str = "COURSE_MAPPING") -> "CourseCatalog":
+        return cls(((keyword, courses, 1.0) for keyword, courses in mapping.items()), fallback, source)
+
+    @classmethod
+    def from_file(cls, path: str, fallback: Optional[List[str]] = None) -> "CourseCatalog":
+        if path.lower().endswith(".json"):
+            with open(path, encoding="utf-8") as fh:
+                data = json.load(fh)
+            if isinstance(data, dict):
+                entries = [(keyword, courses, 1.0) for keyword, courses in data.items()]
+            else:
+                entries = [(row["keyword"], row.get("courses") or [row["course"]], row.get("weight", 1.0))
+                           for row in data]
+        elif path.lower().endswith(".csv"):
+            import pandas as pd
+            rows = pd.read_csv(path, dtype=str).fillna("")
+            weights = rows["weight"].replace("", "1").astype(float) if "weight" in rows.columns else [1.0] * len(rows)
+            entries = [(keyword, [course] if course else [], weight)
+                       for keyword, course, weight in zip(rows["keyword"], rows["course"].str.strip(), weights)]
+        else:
+            raise ValueError(f"Unknown course catalog format: {path} (expected .json or .csv)")
+        return cls([(_clean_keyword(keyword), courses, weight) for keyword, courses, weight in entries],
+                   fallback, source=path)
+
+    def recommend(self, cleaned_text: str, top_k: int = 3) -> List[str]:
+        """
+        Courses for an already preprocessed profile text (fallback courses if no keyword matches).
+        """
+        matched = self.matcher.find(cleaned_text)
+        if not matched:
+            return self.fallback[:top_k]
+        best, order = {}, {}
+        for keyword_id in sorted(matched):
+            weight = self.weights[keyword_id]
+            for course in self.courses[keyword_id]:
+                if course not in best:
+                    best[course] = weight
+                    order[course] = len(order)
+                elif weight > best[course]:
+                    best[course] = weight
+        if not best:
+            return self.fallback[:top_k]
+        return sorted(best, key=lambda c: (-best[c], order[c]))[:top_k]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"source": self.source, "keywords": len(self.keywords),
+                "courses": len({c for courses in self.courses for c in courses}), "matcher_states": self.matcher.states}
+
+# ---------------------------
+# Process-wide catalog
+# ---------------------------
+_CATALOG = None
+_CATALOG_LOCK = threading.Lock()
+
+def get_course_catalog() -> CourseCatalog:
+    """
+    The catalog used by recommend_courses_from_skills: AVSARSETU_COURSE_CATALOG if set, else COURSE_MAPPING.
+    """
+    global _CATALOG
+    if _CATALOG is None:
+        with _CATALOG_LOCK:
+            if _CATALOG is None:
+                if COURSE_CATALOG_PATH:
+                    _CATALOG = CourseCatalog.from_file(COURSE_CATALOG_PATH)
+                else:
+                    _CATALOG = CourseCatalog.from_mapping(rm.COURSE_MAPPING)
+    return _CATALOG
+
+def set_course_catalog(catalog: Optional[CourseCatalog]) -> None:
+    """
+    Replace the process-wide catalog (None: rebuild from the default source on next use).
+    """
+    global _CATALOG
+    with _CATALOG_LOCK:
+        _CATALOG = catalog
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("usage: python course_matcher.py <catalog.json|catalog.csv> <profile text> [top_k]")
+        sys.exit(2)
+    catalog = CourseCatalog.from_file(sys.argv[1])
+    print(catalog.stats())
+    print(catalog.recommend(rm.preprocess_text(sys.argv[2]), int(sys.argv[3]) if len(sys.argv) > 3 else 3))
@@ -0,0 +1,547 @@
+"""
+incremental_index.py
+
+AVSARSETU - Incremental updates for the served internship index
+- add / update / retire internships on loaded artifacts without a full retrain.
+- New postings are transformed with the current (stable) vocabulary & IDF and appended to a
+  small delta segment next to the base segment (the trained rows), so they are searchable as
+  soon as the call returns. Queries score the base with the configured engine (its inverted /
+  LSA / sharded index survives updates) and the delta exactly, then merge the two top-k lists.
+- Retired rows are tombstoned in their segment's bitmap (copy-on-write, artifacts["active"] is
+  the concatenation); once either grows past its threshold a background thread merges the delta
+  into a new base and drops tombstoned rows, so no write pays a catalog-sized cost.
+- The vocabulary & IDF can be refreshed in a background thread as well. Updates made while a
+  merge or refit runs are replayed onto its result before it is swapped in.
+
+Every operation builds a new snapshot (SegmentedArtifacts) that shares the base segment and
+copies only what it changes, and swaps it in atomically, so concurrent queries always see a
+consistent snapshot; the combined matrix / DataFrame are only built for consumers that read them. Listeners (add_listener) also receive
+what changed, so derived state (e.g. topk_store.py) can be patched instead of rebuilt:
+    ("add", start, end)   rows start..end-1 were appended
+    ("remove", row)       row was tombstoned
+    ("compact", keep)     only rows `keep` (old positions, ascending) remain, renumbered 0..len(keep)-1
+    ("rebuild",)          vocabulary / IDF changed: every vector is new
+
+Example:
+    index = IncrementalIndex(load_model_artifacts("avsarsetu_model.joblib"))
+    index.add_internships(new_rows_df)
+    recommend_with_artifacts("Python, NLP", index.artifacts)
+"""
+
+import operator
+import itertools
+import threading
+import contextlib
+from collections.abc import Sequence
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+import recommendation_model as rm
+
+# compact once this share of rows are tombstones (and at least COMPACT_MIN_TOMBSTONES of them)
+COMPACT_RATIO = 0.25
+COMPACT_MIN_TOMBSTONES = 32
+# merge the delta segment into the base once it holds this share of the base rows (and at least DELTA_MIN_ROWS)
+DELTA_RATIO = 0.05
+DELTA_MIN_ROWS = 1024
+
+class IncrementalIndex:
+    """
+    Holds the current artifacts snapshot and applies catalog changes to it.
+    `on_swap(artifacts)` is called after every change (e.g. to publish the snapshot to the API),
+    then every listener as `listener(artifacts, changes)`.
+    """
+
+    def __init__(self, artifacts: Dict[str, Any],
+                 on_swap: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 compact_ratio: float = COMPACT_RATIO):
+        self.compact_ratio = compact_ratio
+        self.on_swap = on_swap
+        self._listeners = []
+        self._lock = threading.RLock()
+        self._log = []  # ops applied while a background merge / refresh is running
+        self._background = None  # "merge" or "refresh" while one runs
+        self._thread = None
+        self._artifacts = _prepare(artifacts)
+
+    @property
+    def artifacts(self) -> Dict[str, Any]:
+        return self._artifacts
+
+    def add_listener(self, listener: Callable[[Dict[str, Any], List[Tuple]], None]) -> None:
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    # ---------------------------
+    # Catalog operations
+    # ---------------------------
+    def add_internships(self, internships_df: pd.DataFrame) -> List[str]:
+        """
+        Append new internships (DataFrame with internship_id, title, description, required_skills).
+        Returns the ids that were added. Raises ValueError for ids that are already live.
+        """
+        new_rows = internships_df.fillna("").astype(str).reset_index(drop=True)
+        with self._lock:
+            ids = new_rows["internship_id"].tolist()
+            live = self._artifacts["id_to_row"]
+            seen, duplicates = set(), set()
+            for internship_id in ids:
+                if internship_id in live or internship_id in seen:
+                    duplicates.add(internship_id)
+                seen.add(internship_id)
+            if duplicates:
+                raise ValueError(f"Internship IDs already exist: {sorted(duplicates)}. Use update_internship().")
+            start = len(self._artifacts["internship_ids"])
+            self._swap(_append(self._artifacts, new_rows), [("add", start, start + len(new_rows))])
+            self._record(("add", new_rows))
+            self._maybe_merge()
+            return ids
+
+    def update_internship(self, internship_id: str, fields: Dict[str, Any]) -> bool:
+        """
+        Replace fields of a live internship (retire the old row, append the updated one).
+        Returns False if the id is unknown.
+        """
+        internship_id = str(internship_id)
+        with self._lock:
+            row = self._artifacts["id_to_row"].get(internship_id)
+            if row is None:
+                return False
+            record = _record_at(self._artifacts, row)
+            record.update({k: "" if v is None else str(v) for k, v in fields.items()})
+            record["internship_id"] = internship_id
+            new_rows = pd.DataFrame([record])
+            start = len(self._artifacts["internship_ids"])
+            updated = _append(_retire(self._artifacts, internship_id), new_rows)
+            self._swap(updated, [("remove", row), ("add", start, start + 1)])
+            self._record(("remove", internship_id))
+            self._record(("add", new_rows))
+            self._maybe_merge()
+            return True
+
+    def remove_internship(self, internship_id: str) -> bool:
+        """
+        Retire an internship (tombstone). Returns False if the id is unknown.
+        """
+        internship_id = str(internship_id)
+        with self._lock:
+            if internship_id not in self._artifacts["id_to_row"]:
+                return False
+            changes = [("remove", self._artifacts["id_to_row"][internship_id])]
+            self._swap(_retire(self._artifacts, internship_id), changes)
+            self._record(("remove", internship_id))
+            self._maybe_merge()
+            return True
+
+    def compact(self) -> None:
+        """
+        Drop tombstoned rows now, in the calling thread (row positions of live internships change).
+        """
+        with self._idle():
+            if _tombstones(self._artifacts):
+                keep = np.flatnonzero(self._artifacts["active"])
+                self._swap(_compact(self._artifacts), [("compact", keep)])
+
+    # ---------------------------
+    # Vocabulary / IDF refresh
+    # ---------------------------
+    def refresh_vocabulary(self, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Refit TF-IDF on the live documents (new terms become searchable, IDF reflects the catalog).
+        With background=True the refit runs in a daemon thread and the thread is returned.
+        """
+        if background:
+            with self._lock:
+                return None if self._background is not None else self._start("refresh", self._refit)
+        with self._idle():
+            thread = self._start("refresh", self._refit)
+        thread.join()
+        return None
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for the running background merge / refresh (if any) to be swapped in.
+        """
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        artifacts = self._artifacts
+        return {
+            "rows": len(artifacts["internship_ids"]),
+            "live": len(artifacts["id_to_row"]),
+            "tombstones": _tombstones(artifacts),
+            "delta_rows": len(artifacts["internship_ids"]) - _n_base(artifacts),
+            "vocabulary_size": len(artifacts["vectorizer"].vocabulary_),
+            "refreshing": self._background == "refresh",
+            "merging": self._background == "merge"
+        }
+
+    def _refit(self, snapshot: Dict[str, Any]) -> None:
+        try:
+            live = _compact(snapshot)
+            refit = rm.index_from_documents(live["internships_df"], list(live["documents"]))
+            with self._lock:
+                # replay what happened while we were fitting
+                self._swap(self._replay(_prepare(refit)), [("rebuild",)])
+        finally:
+            self._finish()
+
+    def _merge(self, snapshot: Dict[str, Any]) -> None:
+        """
+        Merge the delta of `snapshot` into a new base and drop its tombstones, then replay the
+        updates made meanwhile. Rows keep their order, so listeners get one "compact" change.
+        """
+        try:
+            merged = _compact(snapshot)
+            with self._lock:
+                merged = self._replay(merged)
+                n_snapshot = len(snapshot["internship_ids"])
+                n_rows = len(self._artifacts["internship_ids"])
+                changes = []
+                if _tombstones(snapshot):
+                    # the snapshot's live rows, then every row appended since (replayed in order)
+                    keep = np.concatenate([np.flatnonzero(snapshot["active"]), np.arange(n_snapshot, n_rows)])
+                    changes.append(("compact", keep))
+                self._swap(merged, changes)
+        finally:
+            self._finish()
+
+    @contextlib.contextmanager
+    def _idle(self):
+        """
+        Hold the lock with no background merge / refresh running (waits for the running one).
+        """
+        while True:
+            self.join()
+            with self._lock:
+                if self._background is None:
+                    self._log = []
+                    yield
+                    return
+
+    def _replay(self, artifacts: Dict[str, Any]) -> Dict[str, Any]:
+        # caller holds self._lock
+        for op, payload in self._log:
+            if op == "add":
+                artifacts = _append(artifacts, payload)
+            elif payload in artifacts["id_to_row"]:
+                artifacts = _retire(artifacts, payload)
+        return artifacts
+
+    def _start(self, kind: str, target: Callable[[Dict[str, Any]], None]) -> threading.Thread:
+        # caller holds self._lock
+        self._background = kind
+        self._log = []
+        self._thread = threading.Thread(target=target, args=(self._artifacts,), daemon=True,
+                                        name=f"incremental-index-{kind}")
+        self._thread.start()
+        return self._thread
+
+    def _finish(self) -> None:
+        with self._lock:
+            self._background = None
+            self._log = []
+            self._maybe_merge()
+
+    def _record(self, op) -> None:
+        if self._background is not None:
+            self._log.append(op)
+
+    def _maybe_merge(self) -> None:
+        """
+        Start a background merge once the tombstones or the delta segment pass their threshold.
+        """
+        # caller holds self._lock
+        if self._background is not None:
+            return
+        artifacts = self._artifacts
+        n_rows = len(artifacts["internship_ids"])
+        tombstones = _tombstones(artifacts)
+        n_delta = n_rows - _n_base(artifacts)
+        if ((tombstones >= COMPACT_MIN_TOMBSTONES and tombstones >= self.compact_ratio * n_rows)
+                or (n_delta >= DELTA_MIN_ROWS and n_delta >= DELTA_RATIO * (n_rows - n_delta))):
+            self._start("merge", self._merge)
+
+    def _swap(self, artifacts: Dict[str, Any], changes: List[Tuple]) -> None:
+        self._artifacts = artifacts
+        if self.on_swap is not None:
+            self.on_swap(artifacts)
+        for listener in self._listeners:
+            listener(artifacts, changes)
+
+# ---------------------------
+# Segmented snapshots
+# ---------------------------
+class _Concat(Sequence):
+    """
+    Read-only list view of a base list followed by a (small) delta list.
+    """
+    __slots__ = ("base", "delta")
+
+    def __init__(self, base: List[Any], delta: List[Any]):
+        self.base = base
+        self.delta = delta
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self.delta)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = operator.index(i)
+        n_base = len(self.base)
+        if i < 0:
+            i += n_base + len(self.delta)
+        return self.base[i] if i < n_base else self.delta[i - n_base]
+
+    def __iter__(self):
+        return itertools.chain(self.base, self.delta)
+
+class _RowMap:
+    """
+    Live internship id -> row: the base segment's map (shared by every snapshot until compaction,
+    filtered through its tombstones) overlaid by the delta segment's small map.
+    """
+    __slots__ = ("base", "base_active", "delta", "size")
+
+    def __init__(self, base: Dict[str, int], base_active: Optional[np.ndarray], delta: Dict[str, int], size: int):
+        self.base = base
+        self.base_active = base_active
+        self.delta = delta
+        self.size = size
+
+    def get(self, internship_id: str, default=None):
+        row = self.delta.get(internship_id)
+        if row is not None:
+            return row
+        row = self.base.get(internship_id)
+        if row is None or (self.base_active is not None and not self.base_active[row]):
+            return default
+        return row
+
+    def __getitem__(self, internship_id: str) -> int:
+        row = self.get(internship_id)
+        if row is None:
+            raise KeyError(internship_id)
+        return row
+
+    def __contains__(self, internship_id: str) -> bool:
+        return self.get(internship_id) is not None
+
+    def __len__(self) -> int:
+        return self.size
+
+class SegmentedArtifacts(dict):
+    """
+    Artifacts snapshot of an IncrementalIndex: the base segment (trained or last compacted rows,
+    shared by every snapshot until the next compaction) plus a small append-only delta segment,
+    each with its own tombstone bitmap, in artifacts["segments"].
+    internship_vectors, internships_df and active over all rows are only materialized when read
+    (once per snapshot); the scoring engines (recommendation_model.get_engine), attribute filters
+    and the top-k table work on the segments directly.
+    """
+    LAZY = ("internship_vectors", "internships_df", "active")
+
+    def __getitem__(self, key):
+        if key in SegmentedArtifacts.LAZY and not dict.__contains__(self, key):
+            dict.__setitem__(self, key, self._materialize(key))
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __contains__(self, key) -> bool:
+        return dict.__contains__(self, key) or key in SegmentedArtifacts.LAZY
+
+    def keys(self):
+        return list(dict.keys(self)) + [key for key in SegmentedArtifacts.LAZY if not dict.__contains__(self, key)]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __reduce__(self):
+        # saved (joblib) as plain artifacts: every row in one matrix / DataFrame / list
+        plain = {key: value for key, value in self.items() if key not in ("segments", "id_to_row")}
+        for key in ("documents", "internship_ids", "internship_titles"):
+            if isinstance(plain.get(key), _Concat):
+                plain[key] = list(plain[key])
+        return dict, (plain,)
+
+    def _materialize(self, key: str):
+        segments = dict.__getitem__(self, "segments")
+        base, delta = segments["base"], segments["delta"]
+        n_delta = delta["internship_vectors"].shape[0]
+        if key == "internship_vectors":
+            if not n_delta:
+                return base["internship_vectors"]
+            return sp.vstack([base["internship_vectors"], delta["internship_vectors"]], format="csr")
+        if key == "internships_df":
+            if not n_delta:
+                return base["internships_df"]
+            return pd.concat([base["internships_df"], delta["internships_df"]], ignore_index=True).fillna("")
+        base_active = segments["base_active"]
+        if base_active is None and bool(delta["active"].all()):
+            return None
+        n_base = base["internship_vectors"].shape[0]
+        base_active = np.ones(n_base, dtype=bool) if base_active is None else base_active
+        return np.concatenate([base_active, delta["active"]])
+
+# snapshot keys that describe the base segment's rows only
+_BASE_ONLY = SegmentedArtifacts.LAZY + ("lsa", "filters", "segments", "id_to_row")
+
+def _delta_segment(vectorizer, columns) -> Dict[str, Any]:
+    return {
+        "internship_vectors": sp.csr_matrix((0, len(vectorizer.vocabulary_))),
+        "internships_df": pd.DataFrame(columns=columns),
+        "documents": [],
+        "internship_ids": [],
+        "internship_titles": [],
+        "active": np.ones(0, dtype=bool)
+    }
+
+def _snapshot(previous: Dict[str, Any], segments: Dict[str, Any], id_to_row: _RowMap) -> SegmentedArtifacts:
+    """
+    New snapshot sharing everything with `previous` but the segments (O(delta), nothing is materialized).
+    """
+    snapshot = SegmentedArtifacts({key: value for key, value in dict.items(previous)
+                                   if key not in _BASE_ONLY and not key.startswith("_derived_")})
+    base, delta = segments["base"], segments["delta"]
+    snapshot["documents"] = _Concat(base["documents"], delta["documents"])
+    snapshot["internship_ids"] = _Concat(base["internship_ids"], delta["internship_ids"])
+    snapshot["internship_titles"] = _Concat(base["internship_titles"], delta["internship_titles"])
+    snapshot["id_to_row"] = id_to_row
+    snapshot["segments"] = segments
+    return snapshot
+
+def _prepare(artifacts: Dict[str, Any]) -> SegmentedArtifacts:
+    """
+    Make `artifacts` the base segment of a new snapshot (empty delta) and add the bookkeeping an
+    incremental index needs: cleaned documents, ranking columns and the id -> row map.
+    """
+    if isinstance(artifacts, SegmentedArtifacts):
+        return artifacts
+    base = dict(artifacts)
+    base["internships_df"] = base["internships_df"].reset_index(drop=True)
+    if "documents" not in base and base.get("documents_path"):
+        from artifact_store import read_text_column
+        base["documents"] = read_text_column(base["documents_path"], len(base["internships_df"]))
+    if "documents" not in base:
+        docs = base["internships_df"].apply(rm.build_internship_document, axis=1).astype(str)
+        base["documents"] = docs.apply(rm.preprocess_document).tolist()
+    base["documents"] = list(base["documents"])
+    ids, titles = rm._ranking_columns(base)
+    base["internship_ids"], base["internship_titles"] = list(ids), list(titles)
+    if not sp.isspmatrix_csr(base["internship_vectors"]):
+        base["internship_vectors"] = sp.csr_matrix(base["internship_vectors"])
+    base_active = base.pop("active", None)
+    base.pop("version", None)
+    base_map = {
+        str(internship_id): row for row, internship_id in enumerate(base["internship_ids"])
+        if base_active is None or base_active[row]
+    }
+    segments = {"base": base, "base_active": base_active,
+                "delta": _delta_segment(base["vectorizer"], base["internships_df"].columns)}
+    return _snapshot(artifacts, segments, _RowMap(base_map, base_active, {}, len(base_map)))
+
+def _n_base(artifacts: Dict[str, Any]) -> int:
+    return artifacts["segments"]["base"]["internship_vectors"].shape[0]
+
+def _record_at(artifacts: Dict[str, Any], row: int) -> Dict[str, Any]:
+    n_base = _n_base(artifacts)
+    if row < n_base:
+        return artifacts["segments"]["base"]["internships_df"].iloc[row].to_dict()
+    return artifacts["segments"]["delta"]["internships_df"].iloc[row - n_base].to_dict()
+
+def _tombstones(artifacts: Dict[str, Any]) -> int:
+    return len(artifacts["internship_ids"]) - len(artifacts["id_to_row"])
+
+# ---------------------------
+# Copy-on-write helpers (each returns a new snapshot)
+# ---------------------------
+def _append(artifacts: Dict[str, Any], new_rows: pd.DataFrame) -> SegmentedArtifacts:
+    """
+    Add rows to the delta segment; the base segment (matrix, DataFrame, lists, derived indexes) is shared.
+    """
+    docs = new_rows.apply(rm.build_internship_document, axis=1).astype(str)
+    docs_clean = docs.apply(rm.preprocess_document).tolist()
+    # vocabulary & IDF stay fixed; unseen terms are ignored until the next refresh
+    new_vectors = artifacts["vectorizer"].transform(docs_clean)
+
+    segments, id_to_row = artifacts["segments"], artifacts["id_to_row"]
+    delta = segments["delta"]
+    start = len(artifacts["internship_ids"])
+    columns = list(delta["internships_df"].columns)
+    columns += [c for c in new_rows.columns if c not in columns]
+    updated_delta = {
+        "internship_vectors": sp.vstack([delta["internship_vectors"], new_vectors], format="csr"),
+        "internships_df": pd.concat([delta["internships_df"].reindex(columns=columns),
+                                     new_rows.reindex(columns=columns)], ignore_index=True).fillna(""),
+        "documents": delta["documents"] + docs_clean,
+        "internship_ids": delta["internship_ids"] + rm._column_values(new_rows, "internship_id"),
+        "internship_titles": delta["internship_titles"] + rm._column_values(new_rows, "title"),
+        "active": np.concatenate([delta["active"], np.ones(len(new_rows), dtype=bool)])
+    }
+    delta_map = dict(id_to_row.delta)
+    for offset, internship_id in enumerate(updated_delta["internship_ids"][start - _n_base(artifacts):]):
+        delta_map[str(internship_id)] = start + offset
+    return _snapshot(artifacts, dict(segments, delta=updated_delta),
+                     _RowMap(id_to_row.base, id_to_row.base_active, delta_map, id_to_row.size + len(new_rows)))
+
+def _retire(artifacts: Dict[str, Any], internship_id: str) -> SegmentedArtifacts:
+    """
+    Tombstone a live row: only the bitmap of the segment holding it is copied.
+    """
+    segments, id_to_row = artifacts["segments"], artifacts["id_to_row"]
+    row = id_to_row[internship_id]
+    n_base = _n_base(artifacts)
+    if row < n_base:
+        base_active = segments["base_active"]
+        base_active = np.ones(n_base, dtype=bool) if base_active is None else base_active.copy()
+        base_active[row] = False
+        return _snapshot(artifacts, dict(segments, base_active=base_active),
+                         _RowMap(id_to_row.base, base_active, id_to_row.delta, id_to_row.size - 1))
+    delta = dict(segments["delta"])
+    delta["active"] = delta["active"].copy()
+    delta["active"][row - n_base] = False
+    delta_map = dict(id_to_row.delta)
+    del delta_map[internship_id]
+    return _snapshot(artifacts, dict(segments, delta=delta),
+                     _RowMap(id_to_row.base, id_to_row.base_active, delta_map, id_to_row.size - 1))
+
+def _compact(artifacts: Dict[str, Any]) -> SegmentedArtifacts:
+    """
+    Merge the delta into a new base segment and drop tombstoned rows (O(rows); derived indexes of
+    the new base are rebuilt on demand).
+    """
+    active = artifacts.get("active")
+    base = {key: value for key, value in artifacts.items()
+            if key not in ("active", "segments", "id_to_row") and not key.startswith("_derived_")}
+    ids, titles, documents = base["internship_ids"], base["internship_titles"], base["documents"]
+    if active is None:
+        base["internship_ids"], base["internship_titles"], base["documents"] = list(ids), list(titles), list(documents)
+    else:
+        keep = np.flatnonzero(active)
+        base["internship_vectors"] = base["internship_vectors"][keep]
+        base["internships_df"] = base["internships_df"].iloc[keep].reset_index(drop=True)
+        base["documents"] = [documents[i] for i in keep]
+        base["internship_ids"] = [ids[i] for i in keep]
+        base["internship_titles"] = [titles[i] for i in keep]
+    return _prepare(base)
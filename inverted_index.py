@@ -0,0 +1,148 @@
+"""
+inverted_index.py
+
+AVSARSETU - Inverted-index candidate generation for TF-IDF recommendations
+- term -> postings (internship rows, L2-normalised TF-IDF weights), built once per artifacts
+  from the CSR matrix (a CSC transpose) and memoized next to it.
+- A query only touches the postings of its own terms (score-at-a-time accumulation),
+  so latency follows the number of matching internships, not the catalog size.
+- MaxScore early termination: terms are visited by decreasing upper bound; once the
+  remaining terms cannot lift an unseen internship to the current k-th score, only
+  existing candidates are updated and hopeless candidates are dropped.
+- Final candidates are rescored with cosine_similarity on their rows, so scores, ordering
+  and tie-breaking are identical to the brute-force ("exact") engine.
+
+How to use:
+   recommend_with_artifacts(profile_text, artifacts, engine="inverted")
+   AVSARSETU_ENGINE=inverted uvicorn recommendation_model:app
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+import recommendation_model as rm
+
+# scores are accumulated in a different order than the exact sparse product, so
+# pruning decisions keep this much slack to never drop a true top-k internship
+PRUNE_EPSILON = 1e-9
+
+class InvertedIndex:
+    """
+    Postings lists for every vocabulary term of an internship matrix.
+    """
+
+    def __init__(self, internship_vectors):
+        from sklearn.preprocessing import normalize
+        normalized = normalize(internship_vectors, norm="l2", copy=True)
+        csc = normalized.tocsc()
+        csc.sort_indices()
+        self.n_rows = internship_vectors.shape[0]
+        self.indptr = csc.indptr
+        self.postings = csc.indices.astype(np.int64)  # internship rows, ascending within each term
+        self.weights = csc.data
+        # upper bound of any internship's weight for each term
+        lengths = np.diff(self.indptr)
+        self.max_weight = np.zeros(len(lengths))
+        nonempty = lengths > 0
+        self.max_weight[nonempty] = np.maximum.reduceat(self.weights, self.indptr[:-1][nonempty])
+
+    def postings_for(self, term: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.indptr[term], self.indptr[term + 1]
+        return self.postings[start:end], self.weights[start:end]
+
+    def candidates(self, terms: np.ndarray, query_weights: np.ndarray, k: int,
+                   mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Rows that can still be in the top-k for a (normalised) query, sorted ascending.
+        """
+        bounds = query_weights * self.max_weight[terms]
+        order = np.argsort(-bounds, kind="stable")
+        remaining = np.concatenate([np.cumsum(bounds[order][::-1])[::-1][1:], [0.0]])
+
+        cand_rows = np.empty(0, dtype=np.int64)
+        cand_scores = np.empty(0)
+        open_set = True  # unseen rows may still enter the top-k
+        for position, t in enumerate(order):
+            rows, weights = self.postings_for(terms[t])
+            if mask is not None and rows.size:
+                keep = mask[rows]
+                rows, weights = rows[keep], weights[keep]
+            contribution = weights * query_weights[t]
+
+            if open_set:
+                merged = np.concatenate([cand_rows, rows])
+                cand_rows, inverse = np.unique(merged, return_inverse=True)
+                cand_scores = np.bincount(inverse, weights=np.concatenate([cand_scores, contribution]),
+                                          minlength=cand_rows.size)
+            elif rows.size and cand_rows.size:
+                pos = np.searchsorted(rows, cand_rows)
+                pos[pos == rows.size] = 0
+                hit = rows[pos] == cand_rows
+                cand_scores[hit] += contribution[pos[hit]]
+
+            if cand_rows.size >= k:
+                theta = np.partition(cand_scores, cand_scores.size - k)[cand_scores.size - k]
+                if open_set and remaining[position] < theta - PRUNE_EPSILON:
+                    open_set = False
+                if not open_set:
+                    # candidates that cannot reach the k-th score even with every remaining term
+                    alive = cand_scores + remaining[position] >= theta - PRUNE_EPSILON
+                    cand_rows, cand_scores = cand_rows[alive], cand_scores[alive]
+        return cand_rows
+
+def get_inverted_index(artifacts: Dict[str, Any]) -> InvertedIndex:
+    """
+    The inverted index for these artifacts (built on first use, rebuilt if the matrix changes).
+    """
+    return rm.derived_artifact(artifacts, "inverted_index", lambda a: InvertedIndex(a["internship_vectors"]))
+
+def _zero_score_rows(n_rows: int, k: int, exclude: np.ndarray, mask: Optional[np.ndarray]) -> np.ndarray:
+    """
+    First k rows (catalog order) that are allowed by mask and not in `exclude` (sorted).
+    The exact engine ranks these zero-score rows after every matching internship.
+    """
+    found = []
+    needed = k
+    chunk = max(1024, 2 * k)
+    for start in range(0, n_rows, chunk):
+        rows = np.arange(start, min(n_rows, start + chunk))
+        if mask is not None:
+            rows = rows[mask[rows]]
+        if exclude.size:
+            rows = rows[~np.isin(rows, exclude, assume_unique=True)]
+        found.append(rows[:needed])
+        needed -= found[-1].size
+        if needed <= 0:
+            break
+    return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+def inverted_engine(query_vectors, artifacts: Dict[str, Any], k: int,
+                    mask: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Scoring engine with the same contract and results as recommendation_model._exact_engine.
+    """
+    from sklearn.metrics.pairwise import cosine_similarity
+    from sklearn.preprocessing import normalize
+    index = get_inverted_index(artifacts)
+    internship_vectors = artifacts["internship_vectors"]
+    query_vectors = query_vectors.tocsr()
+    normalized = normalize(query_vectors, norm="l2", copy=True)
+
+    results = []
+    for i in range(query_vectors.shape[0]):
+        row = normalized[i]
+        candidates = index.candidates(row.indices, row.data, k, mask) if row.nnz else np.empty(0, dtype=np.int64)
+        if candidates.size:
+            # exact rescoring of the survivors (same arithmetic as the brute-force product)
+            scores = cosine_similarity(query_vectors[i:i + 1], internship_vectors[candidates]).ravel()
+            local = rm._top_k_indices(scores, k)
+            top, top_scores = candidates[local], scores[local]
+        else:
+            top, top_scores = np.empty(0, dtype=np.int64), np.empty(0)
+        if top.size < k:
+            filler = _zero_score_rows(index.n_rows, k - top.size, candidates, mask)
+            top = np.concatenate([top, filler])
+            top_scores = np.concatenate([top_scores, np.zeros(filler.size)])
+        results.append((top, top_scores))
+    return results
@@ -0,0 +1,396 @@
+"""
+lsa_engine.py
+
+AVSARSETU - Dense LSA embeddings with an approximate nearest-neighbour (IVF) index
+- Projects the TF-IDF internship_vectors into a low-dimensional space with truncated SVD
+  (latent semantic analysis) and L2-normalises the embeddings.
+- Stores the embeddings as int8 codes + one float32 scale per row (or plain float32),
+  about n_internships * n_components bytes (x4 for float32), laid out list by list so a
+  probed list is one contiguous slice (and a few contiguous pages when memory-mapped).
+- IVF index: spherical k-means centroids; every internship sits in the list of its nearest
+  centroid. A query scores the centroids, probes the N_PROBE closest lists, ranks their
+  members by the quantized dot product and reranks the best RERANK_FACTOR * k of them with
+  the exact TF-IDF cosine, so match scores (and match_threshold) mean the same as for "exact".
+- The index is a dict of plain NumPy arrays in artifacts["lsa"]: it is pickled with the
+  .joblib artifacts and memory-mapped from the mmap artifact directory (artifact_store.py).
+- When the catalog matrix changes (incremental updates) the stored index no longer fits; a
+  background thread refits it (one refit at a time, superseded catalogs are skipped) while
+  queries fall back to the exact engine. Refits are logged (logger "lsa_engine") and reported
+  as the avsarsetu_lsa_refit_seconds / avsarsetu_lsa_index_ready gauges.
+
+How to use:
+   python recommendation_model.py --lsa_components 128          (train + build the index)
+   python lsa_engine.py build avsarsetu_model.joblib            (add the index to saved artifacts)
+   python lsa_engine.py report --synthetic 1000000 --probes 1 4 16
+   AVSARSETU_ENGINE=lsa uvicorn recommendation_model:app
+"""
+
+import os
+import time
+import logging
+import argparse
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+import recommendation_model as rm
+from inverted_index import _zero_score_rows
+
+LSA_COMPONENTS = 128
+LSA_QUANTIZE = "int8"       # "int8" or "float32"
+N_PROBE = int(os.environ.get("AVSARSETU_LSA_PROBE", "16"))
+RERANK_FACTOR = 20          # exact TF-IDF rerank of the best RERANK_FACTOR * k approximate candidates
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+PROJECT_CHUNK = 65536
+
+logger = logging.getLogger("lsa_engine")
+
+# ---------------------------
+# Building the index
+# ---------------------------
+def _project_rows(matrix, components: np.ndarray) -> np.ndarray:
+    """
+    Sparse rows -> L2-normalised float32 embeddings (chunked to bound the float64 temporaries).
+    """
+    out = np.empty((matrix.shape[0], components.shape[0]), dtype=np.float32)
+    for start in range(0, matrix.shape[0], PROJECT_CHUNK):
+        block = np.asarray(matrix[start:start + PROJECT_CHUNK] @ components.T, dtype=np.float32)
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        out[start:start + PROJECT_CHUNK] = block / np.where(norms > 0, norms, 1.0)
+    return out
+
+def _nearest_centroid(embeddings: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    assignment = np.empty(embeddings.shape[0], dtype=np.int64)
+    for start in range(0, embeddings.shape[0], PROJECT_CHUNK):
+        assignment[start:start + PROJECT_CHUNK] = np.argmax(embeddings[start:start + PROJECT_CHUNK] @ centroids.T, axis=1)
+    return assignment
+
+def _spherical_kmeans(embeddings: np.ndarray, n_lists: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Cosine k-means on a sample of the embeddings; returns unit-length float32 centroids.
+    """
+    n_sample = min(embeddings.shape[0], max(n_lists * KMEANS_SAMPLE_PER_LIST, 10000))
+    sample = embeddings[rng.choice(embeddings.shape[0], size=n_sample, replace=False)]
+    centroids = sample[rng.choice(n_sample, size=n_lists, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = _nearest_centroid(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        norms = np.linalg.norm(sums, axis=1)
+        empty = norms == 0
+        # empty lists restart from random sample points
+        sums[empty] = sample[rng.choice(n_sample, size=int(empty.sum()))]
+        centroids = (sums / np.linalg.norm(sums, axis=1, keepdims=True)).astype(np.float32)
+    return centroids
+
+def build_lsa_index(internship_vectors,
+                    n_components: int = LSA_COMPONENTS,
+                    quantize: str = LSA_QUANTIZE,
+                    n_lists: Optional[int] = None,
+                    seed: int = 42) -> Dict[str, Any]:
+    """
+    Fit truncated SVD + IVF lists on a TF-IDF matrix. Returns the artifacts["lsa"] dict.
+    n_lists defaults to ~sqrt(n_internships).
+    """
+    from sklearn.decomposition import TruncatedSVD
+    if quantize not in ("int8", "float32"):
+        raise ValueError(f"Unknown LSA quantization: {quantize} (expected 'int8' or 'float32')")
+    n_rows, n_features = internship_vectors.shape
+    n_components = max(1, min(n_components, n_features - 1, n_rows - 1))
+    n_lists = n_lists or int(np.sqrt(n_rows))
+    n_lists = max(1, min(n_lists, n_rows))
+    rng = np.random.default_rng(seed)
+
+    if n_features < 2:
+        # TruncatedSVD needs two features; a one-term vocabulary is its own (exact) embedding
+        components = np.eye(n_features, dtype=np.float32)
+    else:
+        svd = TruncatedSVD(n_components=n_components, algorithm="randomized", random_state=seed)
+        svd.fit(internship_vectors)
+        components = svd.components_.astype(np.float32)
+    embeddings = _project_rows(internship_vectors, components)
+
+    centroids = _spherical_kmeans(embeddings, n_lists, rng)
+    assignment = _nearest_centroid(embeddings, centroids)
+    list_rows = np.argsort(assignment, kind="stable")  # rows grouped by list, ascending within a list
+    list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+    embeddings = embeddings[list_rows]  # position p holds internship list_rows[p]
+
+    if quantize == "int8":
+        scales = np.abs(embeddings).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.round(embeddings / scales[:, None]).astype(np.int8)
+    else:
+        scales = np.ones(n_rows, dtype=np.float32)
+        codes = embeddings
+    return {
+        "components": components,
+        "codes": codes,
+        "scales": scales.astype(np.float32),
+        "centroids": centroids,
+        "list_rows": list_rows.astype(np.int32 if n_rows < 2 ** 31 else np.int64),
+        "list_offsets": list_offsets.astype(np.int64),
+        "shape": (n_rows, n_features),
+        "nnz": int(internship_vectors.nnz),
+        "quantize": quantize
+    }
+
+def attach_lsa_index(artifacts: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+    """
+    Build the index for these artifacts and store it in artifacts["lsa"] (saved with them).
+    """
+    start = time.perf_counter()
+    artifacts["lsa"] = build_lsa_index(artifacts["internship_vectors"], **kwargs)
+    lsa = artifacts["lsa"]
+    print(f"LSA index: {lsa['codes'].shape[1]} components, {len(lsa['list_offsets']) - 1} lists, "
+          f"{lsa['quantize']}, {index_nbytes(lsa) / 1e6:.1f} MB, built in {time.perf_counter() - start:.1f}s")
+    return artifacts
+
+def index_nbytes(lsa: Dict[str, Any]) -> int:
+    return sum(v.nbytes for v in lsa.values() if isinstance(v, np.ndarray))
+
+def _matches(lsa: Dict[str, Any], internship_vectors) -> bool:
+    return tuple(lsa["shape"]) == tuple(internship_vectors.shape) and int(lsa["nnz"]) == internship_vectors.nnz
+
+# ---------------------------
+# Background refits
+# ---------------------------
+_REFIT_LOCK = threading.Lock()        # guards the memo lookup / refit start
+_REFIT_BUILD_LOCK = threading.Lock()  # one SVD + k-means fit at a time
+_LATEST_REFIT = None
+
+class _Refit:
+    """
+    An index being fitted for one matrix; index stays None until the fit finishes (or if it was skipped).
+    """
+
+    def __init__(self, internship_vectors):
+        self.internship_vectors = internship_vectors
+        self.index = None
+        self.error = None
+        self.wanted = False  # a caller is blocked on this matrix: fit it even if superseded
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="lsa-refit", daemon=True)
+
+    def _run(self) -> None:
+        try:
+            with _REFIT_BUILD_LOCK:
+                if self is not _LATEST_REFIT and not self.wanted:
+                    logger.info("LSA refit for %s rows skipped: a newer catalog is queued",
+                                self.internship_vectors.shape[0])
+                    return
+                start = time.perf_counter()
+                self.index = build_lsa_index(self.internship_vectors)
+                seconds = time.perf_counter() - start
+            logger.info("LSA index refitted for %s rows in %.1fs", self.internship_vectors.shape[0], seconds)
+            _set_gauge("avsarsetu_lsa_refit_seconds", round(seconds, 3))
+            if self is _LATEST_REFIT:
+                _set_gauge("avsarsetu_lsa_index_ready", 1)
+        except Exception as e:
+            self.error = e
+            logger.exception("LSA refit failed; queries keep using the exact engine")
+        finally:
+            self.done.set()
+
+def _set_gauge(name: str, value: float) -> None:
+    metrics = rm._metrics()
+    if metrics is not None:
+        metrics.set_gauge(name, value)
+
+def _start_refit(artifacts: Dict[str, Any]) -> _Refit:
+    global _LATEST_REFIT
+    refit = _Refit(artifacts["internship_vectors"])
+    _LATEST_REFIT = refit
+    logger.info("LSA index missing or stale for %s rows; refitting in the background",
+                artifacts["internship_vectors"].shape[0])
+    _set_gauge("avsarsetu_lsa_index_ready", 0)
+    refit.thread.start()
+    return refit
+
+def get_lsa_index(artifacts: Dict[str, Any], wait: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    The stored index if it was built for this matrix. Otherwise (e.g. after incremental updates
+    changed the catalog) a refit for this matrix is started in the background, memoized next to
+    the matrix, and None is returned until it is ready (wait=True blocks for it instead).
+    """
+    lsa = artifacts.get("lsa")
+    if lsa is not None and _matches(lsa, artifacts["internship_vectors"]):
+        return lsa
+    with _REFIT_LOCK:
+        refit = rm.derived_artifact(artifacts, "lsa_refit", _start_refit)
+    if wait and refit.index is None:
+        refit.wanted = True
+        refit.done.wait()
+        if refit.index is None and refit.error is None:
+            # skipped as superseded before anyone waited for it
+            refit.index = build_lsa_index(artifacts["internship_vectors"])
+    return refit.index
+
+# ---------------------------
+# Search
+# ---------------------------
+def _project_query(lsa: Dict[str, Any], query_row) -> np.ndarray:
+    # only the columns of the query's terms are touched
+    q = lsa["components"][:, query_row.indices] @ query_row.data.astype(np.float32)
+    norm = np.linalg.norm(q)
+    return q / norm if norm > 0 else q
+
+def _probe_candidates(lsa: Dict[str, Any], q: np.ndarray, n_candidates: int, n_probe: int,
+                      mask: Optional[np.ndarray]) -> np.ndarray:
+    """
+    Rows of the n_probe closest lists (more if the mask leaves too few), best n_candidates by approximate score.
+    """
+    offsets, list_rows, codes, scales = lsa["list_offsets"], lsa["list_rows"], lsa["codes"], lsa["scales"]
+    order = np.argsort(-(lsa["centroids"] @ q), kind="stable")
+    found, approx, total, probed = [], [], 0, 0
+    while probed < order.size and (probed < n_probe or total < n_candidates):
+        for lst in order[probed:probed + n_probe]:
+            start, end = offsets[lst], offsets[lst + 1]
+            rows = np.asarray(list_rows[start:end], dtype=np.int64)
+            scores = (codes[start:end].astype(np.float32) @ q) * scales[start:end]
+            if mask is not None:
+                keep = mask[rows]
+                rows, scores = rows[keep], scores[keep]
+            found.append(rows)
+            approx.append(scores)
+            total += rows.size
+        probed += n_probe
+    if not found:
+        return np.empty(0, dtype=np.int64)
+    rows, approx = np.concatenate(found), np.concatenate(approx)
+    if rows.size > n_candidates:
+        rows = rows[np.argpartition(-approx, n_candidates - 1)[:n_candidates]]
+    return np.sort(rows)
+
+def _row_norms(internship_vectors) -> np.ndarray:
+    return np.sqrt(np.asarray(internship_vectors.multiply(internship_vectors).sum(axis=1)).ravel())
+
+def _rerank(row, candidates: np.ndarray, internship_vectors, row_norms: np.ndarray) -> np.ndarray:
+    """
+    TF-IDF cosine of one query row against the candidate rows (no sklearn input validation per query).
+    """
+    query = np.zeros(internship_vectors.shape[1])
+    query[row.indices] = row.data
+    query_norm = np.linalg.norm(row.data)
+    norms = row_norms[candidates] * query_norm
+    dots = internship_vectors[candidates] @ query
+    return np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+
+def lsa_search(query_vectors, artifacts: Dict[str, Any], k: int, mask: Optional[np.ndarray] = None,
+               n_probe: int = N_PROBE, rerank_factor: int = RERANK_FACTOR) -> List[Tuple[np.ndarray, np.ndarray]]:
+    lsa = get_lsa_index(artifacts)
+    if lsa is None:
+        # index still being refitted for this catalog: exact results meanwhile
+        return rm._exact_engine(query_vectors, artifacts, k, mask)
+    internship_vectors = artifacts["internship_vectors"]
+    row_norms = rm.derived_artifact(artifacts, "row_norms", lambda a: _row_norms(a["internship_vectors"]))
+    query_vectors = query_vectors.tocsr()
+
+    results = []
+    for i in range(query_vectors.shape[0]):
+        row = query_vectors[i]
+        if row.nnz:
+            candidates = _probe_candidates(lsa, _project_query(lsa, row), max(k, rerank_factor * k), n_probe, mask)
+            scores = _rerank(row, candidates, internship_vectors, row_norms)
+            local = rm._top_k_indices(scores, k)
+            top, top_scores = candidates[local], scores[local]
+        else:
+            candidates = top = np.empty(0, dtype=np.int64)
+            top_scores = np.empty(0)
+        if top.size < k:
+            # like the exact engine: zero-score rows in catalog order after the matches
+            filler = _zero_score_rows(internship_vectors.shape[0], k - top.size, np.sort(candidates), mask)
+            top = np.concatenate([top, filler])
+            top_scores = np.concatenate([top_scores, np.zeros(filler.size)])
+        results.append((top, top_scores))
+    return results
+
+def lsa_engine(query_vectors, artifacts: Dict[str, Any], k: int,
+               mask: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Approximate scoring engine (same contract as recommendation_model._exact_engine).
+    """
+    return lsa_search(query_vectors, artifacts, k, mask)
+
+# ---------------------------
+# Recall@k report against the exact engine
+# ---------------------------
+def recall_report(artifacts: Dict[str, Any], query_vectors, k: int = 5,
+                  probes: List[int] = (1, 2, 4, 8, 16)) -> List[Dict[str, Any]]:
+    """
+    recall@k = share of the exact engine's top-k rows (with a positive score) that the LSA engine
+    also returns, averaged over queries that have any match; plus mean latency per query.
+    """
+    rows = [query_vectors[i] for i in range(query_vectors.shape[0])]
+    exact = rm.get_engine("exact")
+    start = time.perf_counter()
+    truth = [exact(q, artifacts, k)[0] for q in rows]
+    exact_ms = (time.perf_counter() - start) / len(rows) * 1000
+    truth = [set(top[scores > 0].tolist()) for top, scores in truth]
+
+    get_lsa_index(artifacts, wait=True)  # load / build the index outside the timing
+    report = [{"engine": "exact", "n_probe": None, "recall": 1.0, "ms_per_query": exact_ms}]
+    for n_probe in probes:
+        start = time.perf_counter()
+        found = [lsa_search(q, artifacts, k, n_probe=n_probe)[0][0] for q in rows]
+        ms = (time.perf_counter() - start) / len(rows) * 1000
+        recalls = [len(t & set(f.tolist())) / len(t) for t, f in zip(truth, found) if t]
+        report.append({"engine": "lsa", "n_probe": n_probe,
+                       "recall": float(np.mean(recalls)) if recalls else 1.0, "ms_per_query": ms})
+    return report
+
+def _report_cli(args) -> None:
+    import pandas as pd
+    students_df = pd.read_csv(args.students, dtype=str).fillna("")
+    if args.synthetic:
+        import benchmark_recommendations as bench
+        artifacts = bench.synthetic_artifacts(bench.synthetic_internships(args.synthetic, seed=args.seed))
+        profiles = students_df.apply(rm.build_student_document, axis=1).str.lower().tolist()
+    else:
+        artifacts = rm.load_model_artifacts(args.artifacts)
+        profiles = students_df.apply(rm.build_student_document, axis=1).apply(rm.preprocess_text).tolist()
+    if "lsa" not in artifacts:
+        attach_lsa_index(artifacts, n_components=args.components, quantize=args.quantize, n_lists=args.lists)
+    profiles = (profiles * (args.queries // len(profiles) + 1))[:args.queries]
+    query_vectors = artifacts["vectorizer"].transform(profiles)
+
+    tfidf_mb = sum(a.nbytes for a in (artifacts["internship_vectors"].data, artifacts["internship_vectors"].indices,
+                                      artifacts["internship_vectors"].indptr)) / 1e6
+    print(f"internships: {artifacts['internship_vectors'].shape[0]}  TF-IDF matrix: {tfidf_mb:.1f} MB  "
+          f"LSA index: {index_nbytes(get_lsa_index(artifacts, wait=True)) / 1e6:.1f} MB")
+    print(f"{'engine':>8} {'n_probe':>8} {'recall@' + str(args.k):>10} {'ms/query':>10}")
+    for row in recall_report(artifacts, query_vectors, k=args.k, probes=args.probes):
+        n_probe = "-" if row["n_probe"] is None else row["n_probe"]
+        print(f"{row['engine']:>8} {n_probe:>8} {row['recall']:>10.3f} {row['ms_per_query']:>10.3f}")
+
+def _build_cli(args) -> None:
+    artifacts = rm.load_model_artifacts(args.artifacts)
+    attach_lsa_index(artifacts, n_components=args.components, quantize=args.quantize, n_lists=args.lists)
+    rm.save_model_artifacts(artifacts, args.artifacts,
+                            artifact_format="mmap" if os.path.isdir(args.artifacts) else "joblib")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AVSARSETU - LSA / approximate nearest-neighbour engine")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("build", "report"):
+        p = sub.add_parser(name, help="Add an LSA index to saved artifacts" if name == "build"
+                           else "recall@k and latency of the LSA engine vs the exact engine")
+        p.add_argument("--components", type=int, default=LSA_COMPONENTS, help="SVD dimensions")
+        p.add_argument("--quantize", type=str, default=LSA_QUANTIZE, choices=["int8", "float32"])
+        p.add_argument("--lists", type=int, default=None, help="IVF lists (default: sqrt(n_internships))")
+    sub.choices["build"].add_argument("artifacts", help="Path to .joblib artifacts or mmap artifact directory")
+    report = sub.choices["report"]
+    report.add_argument("--artifacts", type=str, default="avsarsetu_model.joblib", help="Saved artifacts to evaluate")
+    report.add_argument("--synthetic", type=int, default=0, help="Evaluate on a synthetic catalog of this size instead")
+    report.add_argument("--students", type=str, default="students.csv", help="Profiles used as queries")
+    report.add_argument("--queries", type=int, default=200, help="Number of queries")
+    report.add_argument("--k", type=int, default=5, help="k for recall@k")
+    report.add_argument("--probes", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="n_probe values to compare")
+    report.add_argument("--seed", type=int, default=42, help="Seed of the synthetic catalog")
+    args = parser.parse_args()
+    if args.command == "build":
+        _build_cli(args)
+    else:
+        _report_cli(args)
@@ -0,0 +1,231 @@
+"""
+model_registry.py
+
+AVSARSETU - Hot reload of served model artifacts
+- Loads a new artifact version (the .joblib file or mmap directory at ARTIFACTS_PATH) in a
+  background thread, validates it, and only then swaps the served reference. Requests that
+  already hold the old artifacts finish on them; new requests see the new version.
+- Triggers: POST /admin/reload (needs X-Admin-Token = AVSARSETU_ADMIN_TOKEN; always reloads the
+  configured path), or a watcher thread that polls the path's (mtime, size) every
+  AVSARSETU_WATCH_SECONDS seconds.
+- Keeps the last KEEP_VERSIONS loaded versions in memory for instant rollback
+  (POST /admin/rollback).
+- The active version is reported in the X-Model-Version header of every response.
+
+Example:
+    registry = ModelRegistry("avsarsetu_model.joblib", on_swap=publish)
+    registry.reload(background=False)
+    registry.start_watching(5.0)
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable
+
+import recommendation_model as rm
+
+KEEP_VERSIONS = int(os.environ.get("AVSARSETU_KEEP_VERSIONS", "3"))
+VALIDATION_PROFILE = "Python, Machine Learning, Data Analysis"
+
+class ModelValidationError(ValueError):
+    """
+    Raised when freshly loaded artifacts fail validation; the served version is left unchanged.
+    """
+
+def validate_artifacts(artifacts: Dict[str, Any]) -> None:
+    """
+    Structural checks plus a smoke recommendation (not recorded in metrics); raises ModelValidationError.
+    """
+    for key in ("vectorizer", "internship_vectors", "internships_df"):
+        if key not in artifacts:
+            raise ModelValidationError(f"Artifacts are missing '{key}'.")
+    vectors = artifacts["internship_vectors"]
+    ids, _ = rm._ranking_columns(artifacts)
+    # a DataFrame that is not built yet (mmap / segmented artifacts) is derived from checked columns
+    internships_df = dict.get(artifacts, "internships_df")
+    if vectors.shape[0] != len(ids) or (internships_df is not None and vectors.shape[0] != len(internships_df)):
+        raise ModelValidationError(f"Matrix has {vectors.shape[0]} rows but the catalog has {len(ids)} internships.")
+    if vectors.shape[0] == 0:
+        raise ModelValidationError("Catalog is empty.")
+    vocabulary = getattr(artifacts["vectorizer"], "vocabulary_", None)
+    if not vocabulary or vectors.shape[1] != len(vocabulary):
+        raise ModelValidationError("Vectorizer vocabulary does not match the matrix width.")
+    try:
+        # Scored with the exact engine directly so the smoke query never reaches the served
+        # request metrics (recommend_with_artifacts records into the "profile" histograms).
+        query = artifacts["vectorizer"].transform([rm.preprocess_text(VALIDATION_PROFILE)])
+        (top, top_scores), = rm._exact_engine(query, artifacts, 5)
+        result = rm._result_from_top_k(top, top_scores, artifacts, 0.4, course_text=VALIDATION_PROFILE)
+    except Exception as e:
+        raise ModelValidationError(f"Smoke recommendation failed: {e}") from e
+    if result.get("status") not in ("success", "upskill"):
+        raise ModelValidationError(f"Smoke recommendation returned {result}")
+
+def _stamp(path: str):
+    stamp_path = os.path.join(path, "manifest.json") if os.path.isdir(path) else path
+    try:
+        st = os.stat(stamp_path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+class ModelRegistry:
+    """
+    Loaded artifact versions (newest last) and the one being served.
+    on_swap(artifacts) publishes a version (called for loads and rollbacks).
+    """
+
+    def __init__(self, path: str, on_swap: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 keep: int = KEEP_VERSIONS):
+        self.path = path
+        self.on_swap = on_swap
+        self.keep = max(1, keep)
+        self._versions = OrderedDict()  # version -> {"artifacts", "path", "loaded_at", "load_seconds"}
+        self._active = None
+        self._lock = threading.Lock()
+        self._loading = False
+        self._loaded_stamp = None
+        self._watcher = None
+        self._stop = threading.Event()
+        self.last_error = None
+        self.reloads = 0
+        self.failures = 0
+
+    @property
+    def active_version(self) -> Optional[str]:
+        return self._active
+
+    def artifacts(self, version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        entry = self._versions.get(version or self._active)
+        return None if entry is None else entry["artifacts"]
+
+    # ---------------------------
+    # Load / validate / swap
+    # ---------------------------
+    def reload(self, path: Optional[str] = None, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Load `path` (default: the registry path), validate it and swap it in.
+        With background=True the work runs in a daemon thread (returned; None if a load is already running).
+        With background=False errors are raised (ModelValidationError, FileNotFoundError, ...).
+        """
+        path = path or self.path
+        with self._lock:
+            if self._loading:
+                return None
+            self._loading = True
+        if not background:
+            self._load(path, raise_errors=True)
+            return None
+        thread = threading.Thread(target=self._load, args=(path, False), daemon=True, name="avsarsetu-model-reload")
+        thread.start()
+        return thread
+
+    def _load(self, path: str, raise_errors: bool) -> None:
+        try:
+            stamp = _stamp(path)
+            started = time.perf_counter()
+            artifacts = rm.load_model_artifacts(path)
+            validate_artifacts(artifacts)
+            version = rm.artifact_version(artifacts)
+            with self._lock:
+                self._versions.pop(version, None)
+                self._versions[version] = {"artifacts": artifacts, "path": os.path.abspath(path),
+                                           "loaded_at": time.time(),
+                                           "load_seconds": round(time.perf_counter() - started, 3)}
+                while len(self._versions) > self.keep:
+                    oldest = next(iter(self._versions))
+                    if oldest == version:
+                        break
+                    self._versions.pop(oldest)
+                if path == self.path:
+                    self._loaded_stamp = stamp
+                self.reloads += 1
+                self.last_error = None
+                self._swap(version)
+            print(f"Model version {version} loaded from {path} and activated.")
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                if path == self.path:
+                    # do not retry the same broken file on every poll
+                    self._loaded_stamp = _stamp(path)
+            print(f"Model reload from {path} failed; keeping version {self._active}. ({self.last_error})")
+            if raise_errors:
+                raise
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def rollback(self, version: Optional[str] = None) -> str:
+        """
+        Serve a kept version again (default: the one loaded before the active one). Returns it.
+        Raises KeyError if there is nothing to roll back to.
+        """
+        with self._lock:
+            versions = list(self._versions)
+            if version is None:
+                if self._active not in versions or versions.index(self._active) == 0:
+                    raise KeyError("No earlier model version is kept.")
+                version = versions[versions.index(self._active) - 1]
+            if version not in self._versions:
+                raise KeyError(f"Model version {version} is not kept (available: {versions}).")
+            self._swap(version)
+            return version
+
+    def _swap(self, version: str) -> None:
+        self._active = version
+        if self.on_swap is not None:
+            self.on_swap(self._versions[version]["artifacts"])
+
+    # ---------------------------
+    # Watching the artifact path
+    # ---------------------------
+    def check_for_update(self) -> bool:
+        """
+        Start a background reload if the artifact path changed since the last load. Returns True if started.
+        """
+        stamp = _stamp(self.path)
+        if stamp is None or stamp == self._loaded_stamp:
+            return False
+        return self.reload(background=True) is not None
+
+    def start_watching(self, interval: float) -> None:
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while not self._stop.wait(interval):
+                try:
+                    self.check_for_update()
+                except Exception as e:  # keep watching
+                    print(f"Model watcher error: {e}")
+
+        self._stop.clear()
+        self._watcher = threading.Thread(target=watch, daemon=True, name="avsarsetu-model-watcher")
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+        self._watcher = None
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            versions: List[Dict[str, Any]] = [
+                {"version": version, "path": entry["path"], "loaded_at": entry["loaded_at"],
+                 "load_seconds": entry["load_seconds"], "active": version == self._active}
+                for version, entry in self._versions.items()
+            ]
+            return {
+                "path": self.path,
+                "active_version": self._active,
+                "versions": versions,
+                "keep": self.keep,
+                "loading": self._loading,
+                "watching": self._watcher is not None,
+                "reloads": self.reloads,
+                "failures": self.failures,
+                "last_error": self.last_error
+            }
@@ -0,0 +1,126 @@
+"""
+recommendation_engine.py
+
+AVSARSETU - One precomputed recommendation engine for the lightweight entry points
+ai_api.py and simple_recommendation_demo.py used to rebuild every internship document
+(iterrows) and refit a TfidfVectorizer on student + internships on every call. They now share
+a RecommendationEngine that preprocesses and vectorizes the catalog once; a request is one
+analyzer call, one tfidf.transform and a top-k over the scoring engine (recommendation_model).
+
+Analyzers (how profile and internship text is cleaned):
+- "simple": lowercase, strip punctuation, small stopword list (no NLTK data needed);
+            vectorized with a default unigram TfidfVectorizer, as ai_api / the demo did.
+- "nltk":   preprocess_text / preprocess_document from recommendation_model (lemmatized),
+            with the same vectorizer settings as train_and_save_model.
+
+Example:
+    engine = shared_engine(internships_df, analyzer="simple")
+    engine.recommend("Python, Machine Learning")   # {"status": "success", "recommendations": [...]}
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+import recommendation_model as rm
+
+DEFAULT_ANALYZER = "simple"
+
+_NON_ALNUM = re.compile(r"[^a-z0-9\s]")
+SIMPLE_STOPWORDS = {"a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "he", "in", "is", "it",
+                    "its", "of", "on", "that", "the", "to", "was", "will", "with", "i", "you", "this", "but", "they",
+                    "have"}
+
+def simple_preprocess(text) -> str:
+    """
+    Text preprocessing without NLTK: lowercase, punctuation to spaces, drop stopwords and 1-letter tokens.
+    """
+    if text is None:
+        text = ""
+    text = _NON_ALNUM.sub(" ", str(text).lower())
+    return " ".join(t for t in text.split() if t not in SIMPLE_STOPWORDS and len(t) > 1)
+
+# analyzer name -> (profile cleaner, document cleaner, TfidfVectorizer kwargs)
+ANALYZERS = {
+    "simple": (simple_preprocess, simple_preprocess, {}),
+    "nltk": (lambda text: rm.preprocess_text(text), lambda text: rm.preprocess_document(text),
+             {"ngram_range": (1, 2), "max_features": 5000}),
+}
+
+class RecommendationEngine:
+    """
+    Internship index built once for a catalog and an analyzer; recommend() only transforms the profile.
+    """
+
+    def __init__(self, internships_df: "pd.DataFrame", analyzer: str = DEFAULT_ANALYZER,
+                 engine: Optional[str] = None):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        if analyzer not in ANALYZERS:
+            raise ValueError(f"Unknown analyzer: {analyzer} (expected one of {sorted(ANALYZERS)})")
+        self.internships_df = internships_df
+        self.analyzer = analyzer
+        self.engine = engine
+        self._clean_profile, clean_document, vectorizer_params = ANALYZERS[analyzer]
+
+        catalog = internships_df.reset_index(drop=True).fillna("").astype(str)
+        documents = [clean_document(doc) for doc in rm.build_internship_documents(catalog)]
+        vectorizer = TfidfVectorizer(**vectorizer_params)
+        self.artifacts = {
+            "vectorizer": vectorizer,
+            "internship_vectors": vectorizer.fit_transform(documents),
+            "internships_df": catalog,
+            "documents": documents,
+            "internship_ids": rm._column_values(catalog, "internship_id"),
+            "internship_titles": rm._column_values(catalog, "title")
+        }
+
+    def rank(self, profile_text: str, top_n: int = 5) -> List[Dict[str, Any]]:
+        """
+        The top_n internships for a raw profile text, best first, whatever their score.
+        """
+        vector = self.artifacts["vectorizer"].transform([self._clean_profile(profile_text)])
+        top, top_scores = rm.get_engine(self.engine)(vector, self.artifacts, max(0, int(top_n)))[0]
+        ids, titles = rm._ranking_columns(self.artifacts)
+        return [{"internship_id": ids[i], "title": titles[i], "match_score": round(float(score), 4)}
+                for i, score in zip(top, top_scores)]
+
+    def recommend(self, profile_text: str, top_n: int = 5, match_threshold: Optional[float] = None) -> Dict[str, Any]:
+        """
+        {"status": "success", "recommendations": [...]}; with a match_threshold, a best score below it
+        gives the upskill response of recommend_with_artifacts instead.
+        """
+        recommendations = self.rank(profile_text, top_n)
+        if match_threshold is not None and (not recommendations or recommendations[0]["match_score"] < match_threshold):
+            return {"status": "upskill", "message": rm.UPSKILL_MESSAGE,
+                    "courses": rm.recommend_courses_from_skills(profile_text)}
+        return {"status": "success", "recommendations": recommendations}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"analyzer": self.analyzer, "internships": self.artifacts["internship_vectors"].shape[0],
+                "features": self.artifacts["internship_vectors"].shape[1]}
+
+# ---------------------------
+# Engines shared per catalog DataFrame
+# ---------------------------
+_ENGINES = OrderedDict()  # (id(df), analyzer, engine) -> RecommendationEngine (which keeps df alive)
+_ENGINES_LOCK = threading.Lock()
+MAX_SHARED_ENGINES = 4
+
+def shared_engine(internships_df: "pd.DataFrame", analyzer: str = DEFAULT_ANALYZER,
+                  engine: Optional[str] = None) -> RecommendationEngine:
+    """
+    The engine for this catalog DataFrame and analyzer, built on first use and reused afterwards.
+    A different DataFrame object (e.g. a reloaded catalog) gets a new engine.
+    """
+    key = (id(internships_df), analyzer, engine)
+    with _ENGINES_LOCK:
+        cached = _ENGINES.get(key)
+        if cached is not None and cached.internships_df is internships_df:
+            _ENGINES.move_to_end(key)
+            return cached
+        built = RecommendationEngine(internships_df, analyzer=analyzer, engine=engine)
+        _ENGINES[key] = built
+        while len(_ENGINES) > MAX_SHARED_ENGINES:
+            _ENGINES.popitem(last=False)
+        return built
@@ -0,0 +1,188 @@
+"""
+recommendation_metrics.py
+
+AVSARSETU - Per-stage latency metrics for the recommendation paths
+- Every computed recommendation records how long each stage took:
+     preprocess  (preprocess_text)           transform  (tfidf.transform)
+     vector      (cached student vector)     score      (scoring engine: cosine_similarity / postings / LSA + top-k)
+     rank        (building the ranked list)  upskill    (course fallback below match_threshold)
+     lookup      (top-k table read, topk_store.py)
+  into fixed-bucket histograms per path ("profile", "batch", "students", "student", "topk"), plus
+  result counts by status (success / upskill / error; "cache" counts response-cache hits).
+- HTTP requests are counted by route, method and status code, with a latency histogram.
+- Gauges: artifact load time, catalog size (rows / active rows), vocabulary size, model version.
+- Optional sampled trace log: AVSARSETU_TRACE_SAMPLE=0.01 writes 1% of recommendation calls
+  (per-stage milliseconds) as JSON lines to AVSARSETU_TRACE_LOG.
+
+Everything is exposed in Prometheus text format at GET /metrics. Recording costs a few
+perf_counter() calls and one lock per call; AVSARSETU_METRICS=0 turns it off.
+"""
+
+import os
+import json
+import time
+import random
+import threading
+from bisect import bisect_left
+from typing import List, Dict, Any, Optional, Iterable, Union
+
+import recommendation_model as rm
+
+TRACE_SAMPLE = float(os.environ.get("AVSARSETU_TRACE_SAMPLE", "0"))
+TRACE_LOG = os.environ.get("AVSARSETU_TRACE_LOG", "avsarsetu_traces.jsonl")
+# seconds; 100us .. 10s covers a cached profile up to a full scan of a very large catalog
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class Histogram:
+    """
+    Cumulative-bucket histogram (Prometheus semantics); callers hold the Metrics lock.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot: above the largest bucket
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str) -> List[str]:
+        out, cumulative = [], 0
+        sep = "," if labels else ""
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            out.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+        out.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        out.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        out.append(f"{name}_count{{{labels}}} {self.count}")
+        return out
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(**labels) -> str:
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+
+class Metrics:
+    """
+    Process-wide recommendation and HTTP metrics.
+    """
+
+    def __init__(self, trace_sample: float = TRACE_SAMPLE, trace_log: Optional[str] = TRACE_LOG):
+        self._lock = threading.Lock()
+        self._stages = {}         # (path, stage) -> Histogram
+        self._latency = {}        # path -> Histogram (sum of stages)
+        self._outcomes = {}       # (path, status) -> count
+        self._http = {}           # (route, method, code) -> count
+        self._http_latency = {}   # route -> Histogram
+        self._gauges = {}         # name -> value
+        self.trace_sample = trace_sample
+        self.trace_log = trace_log
+        self._trace_file = None
+
+    # ---------------------------
+    # Recording
+    # ---------------------------
+    def record(self, path: str, statuses: Union[str, Iterable[str]], stages: Dict[str, float]) -> None:
+        """
+        One recommendation call: per-stage seconds, and the status of each result it produced.
+        """
+        if isinstance(statuses, str):
+            statuses = (statuses,)
+        total = sum(stages.values())
+        with self._lock:
+            for stage, seconds in stages.items():
+                histogram = self._stages.get((path, stage))
+                if histogram is None:
+                    histogram = self._stages[(path, stage)] = Histogram()
+                histogram.observe(seconds)
+            if stages:
+                histogram = self._latency.get(path)
+                if histogram is None:
+                    histogram = self._latency[path] = Histogram()
+                histogram.observe(total)
+            n = 0
+            for status in statuses:
+                self._outcomes[(path, status)] = self._outcomes.get((path, status), 0) + 1
+                n += 1
+        if self.trace_sample > 0 and random.random() < self.trace_sample:
+            self._trace({"ts": time.time(), "path": path, "results": n, "total_ms": round(total * 1000, 4),
+                         "stages_ms": {stage: round(seconds * 1000, 4) for stage, seconds in stages.items()}})
+
+    def record_request(self, route: str, method: str, code: int, seconds: float) -> None:
+        with self._lock:
+            key = (route, method, code)
+            self._http[key] = self._http.get(key, 0) + 1
+            histogram = self._http_latency.get(route)
+            if histogram is None:
+                histogram = self._http_latency[route] = Histogram()
+            histogram.observe(seconds)
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def _trace(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            if self._trace_file is None:
+                self._trace_file = open(self.trace_log, "a", encoding="utf-8", buffering=1)
+            self._trace_file.write(line)
+
+    # ---------------------------
+    # Exposition
+    # ---------------------------
+    def render(self, artifacts: Optional[Dict[str, Any]] = None) -> str:
+        """
+        All metrics in Prometheus text format; catalog gauges are read from `artifacts` (the served model).
+        """
+        lines = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            family("avsarsetu_stage_seconds", "histogram", "Time spent per recommendation stage.")
+            for (path, stage), histogram in sorted(self._stages.items()):
+                lines.extend(histogram.lines("avsarsetu_stage_seconds", _labels(path=path, stage=stage)))
+            family("avsarsetu_recommend_seconds", "histogram", "Total recommendation time (sum of stages).")
+            for path, histogram in sorted(self._latency.items()):
+                lines.extend(histogram.lines("avsarsetu_recommend_seconds", _labels(path=path)))
+            family("avsarsetu_recommendations_total", "counter", "Recommendation results by path and status.")
+            for (path, status), count in sorted(self._outcomes.items()):
+                lines.append(f"avsarsetu_recommendations_total{{{_labels(path=path, status=status)}}} {count}")
+            family("avsarsetu_http_requests_total", "counter", "HTTP requests by route, method and status code.")
+            for (route, method, code), count in sorted(self._http.items()):
+                lines.append(f"avsarsetu_http_requests_total{{{_labels(route=route, method=method, code=code)}}} {count}")
+            family("avsarsetu_http_request_seconds", "histogram", "HTTP request latency by route.")
+            for route, histogram in sorted(self._http_latency.items()):
+                lines.extend(histogram.lines("avsarsetu_http_request_seconds", _labels(route=route)))
+            for name, value in sorted(self._gauges.items()):
+                family(name, "gauge", name.replace("avsarsetu_", "").replace("_", " ") + ".")
+                lines.append(f"{name} {value}")
+
+        if artifacts:
+            n_rows = rm.catalog_rows(artifacts)
+            active = artifacts.get("active")
+            vocabulary = getattr(artifacts["vectorizer"], "vocabulary_", None) or {}
+            family("avsarsetu_catalog_rows", "gauge", "Internship rows in the served index (including removed).")
+            lines.append(f"avsarsetu_catalog_rows {n_rows}")
+            family("avsarsetu_catalog_active_rows", "gauge", "Internships that can be recommended.")
+            lines.append(f"avsarsetu_catalog_active_rows {int(active.sum()) if active is not None else n_rows}")
+            family("avsarsetu_vocabulary_size", "gauge", "TF-IDF features of the served model.")
+            lines.append(f"avsarsetu_vocabulary_size {len(vocabulary)}")
+            family("avsarsetu_model_info", "gauge", "Served model version.")
+            lines.append(f"avsarsetu_model_info{{{_labels(version=rm.artifact_version(artifacts))}}} 1")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            for table in (self._stages, self._latency, self._outcomes, self._http, self._http_latency, self._gauges):
+                table.clear()
+
+METRICS = Metrics()
@@ -0,0 +1,213 @@
+"""
+response_cache.py
+
+AVSARSETU - Result cache for POST /recommend/profile
+- Key: preprocessed profile text + top_n (clipped to 3-5) + match_threshold + engine + attribute
+  filters (normalized, see attribute_filters.py), prefixed with
+  the artifact version (recommendation_model.artifact_version). Every response (including the
+  upskilling courses) depends on the profile only through preprocess_text, so
+  "Python, Machine Learning" and "python machine-learning" share one entry.
+- Bounded LRU (max_entries) with a TTL; publishing new artifacts (reload, incremental update)
+  changes the version, so new lookups miss the old entries, which then age out through the LRU
+  and the TTL. Requests still holding the old artifacts keep hitting their own entries.
+- Optional shared store: a local SQLite file (shared_path) that every worker process on the
+  host reads and writes, so a result computed by one worker is a hit for the others.
+- Counters: hits (local / shared), misses, evictions, expirations, hit ratio.
+
+Environment:
+   AVSARSETU_RESPONSE_CACHE=10000        max entries (0 disables the cache)
+   AVSARSETU_RESPONSE_CACHE_TTL=300      seconds
+   AVSARSETU_RESPONSE_CACHE_DB=/tmp/avsarsetu-responses.sqlite   shared store (optional)
+"""
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, List
+
+import recommendation_model as rm
+from attribute_filters import normalize_filters
+
+MAX_ENTRIES = int(os.environ.get("AVSARSETU_RESPONSE_CACHE", "10000"))
+TTL_SECONDS = float(os.environ.get("AVSARSETU_RESPONSE_CACHE_TTL", "300"))
+SHARED_PATH = os.environ.get("AVSARSETU_RESPONSE_CACHE_DB") or None
+SHARED_PRUNE_EVERY = 1000  # puts between expiry / size sweeps of the shared store
+
+class ResponseCache:
+    """
+    LRU + TTL cache of JSON-encoded responses keyed by (artifact version, request key).
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl_seconds: float = TTL_SECONDS,
+                 shared_path: Optional[str] = SHARED_PATH):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.shared_path = shared_path
+        self._entries = OrderedDict()  # (version, *key) -> (expires_at, json)
+        self._version = None  # latest version seen (reported in stats)
+        self._lock = threading.Lock()
+        self._db = None
+        self._puts = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if shared_path:
+            self._open_shared(shared_path)
+
+    # ---------------------------
+    # Lookups
+    # ---------------------------
+    def get(self, version: str, key: Tuple) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        key = (version, *key)
+        with self._lock:
+            self._version = version
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(entry[1])
+                del self._entries[key]
+                self.expirations += 1
+            if self._db is not None:
+                row = self._db.execute("SELECT value, expires FROM responses WHERE key = ?",
+                                       (self._shared_key(key),)).fetchone()
+                if row is not None and row[1] > now:
+                    self._store(key, row[1], row[0])
+                    self.hits += 1
+                    self.shared_hits += 1
+                    return json.loads(row[0])
+            self.misses += 1
+            return None
+
+    def put(self, version: str, key: Tuple, value: Dict[str, Any]) -> None:
+        encoded = json.dumps(value)
+        expires = time.time() + self.ttl
+        key = (version, *key)
+        with self._lock:
+            self._version = version
+            self._store(key, expires, encoded)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO responses (key, value, expires) VALUES (?, ?, ?)",
+                                 (self._shared_key(key), encoded, expires))
+                self._db.commit()
+                self._puts += 1
+                if self._puts % SHARED_PRUNE_EVERY == 0:
+                    self._prune_shared()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "version": self._version,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "shared_store": self.shared_path
+            }
+
+    def _store(self, key: Tuple, expires: float, encoded: str) -> None:
+        self._entries[key] = (expires, encoded)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # ---------------------------
+    # Shared SQLite store
+    # ---------------------------
+    def _open_shared(self, path: str) -> None:
+        import sqlite3
+        self._db = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT, expires REAL)")
+        self._db.commit()
+
+    @staticmethod
+    def _shared_key(key: Tuple) -> str:
+        return json.dumps(list(key))
+
+    def _prune_shared(self) -> None:
+        self._db.execute("DELETE FROM responses WHERE expires <= ?", (time.time(),))
+        # all workers together keep at most max_entries rows (soonest-expiring go first)
+        self._db.execute("DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY expires DESC "
+                         "LIMIT -1 OFFSET ?)", (self.max_entries,))
+        self._db.commit()
+
+# ---------------------------
+# Cached recommendation path
+# ---------------------------
+RESPONSE_CACHE = ResponseCache() if MAX_ENTRIES > 0 else None
+
+def _key(profile_text: str, top_n: int, match_threshold: float, engine: Optional[str],
+         filters: Optional[Dict[str, Any]] = None) -> Tuple:
+    return (rm.preprocess_text(profile_text), rm._clip_top_n(top_n), float(match_threshold),
+            engine or rm.SCORING_ENGINE, normalize_filters(filters))
+
+def cached_recommend(profile_text: str, artifacts: Dict[str, Any], top_n: int = 5, match_threshold: float = 0.4,
+                     engine: Optional[str] = None, cache: Optional[ResponseCache] = None,
+                     filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    recommend_with_artifacts through the response cache (plain call if the cache is disabled).
+    """
+    cache = cache or RESPONSE_CACHE
+    if cache is None:
+        return rm.recommend_with_artifacts(profile_text, artifacts, top_n=top_n, match_threshold=match_threshold,
+                                           engine=engine, filters=filters)
+    version = rm.artifact_version(artifacts)
+    key = _key(profile_text, top_n, match_threshold, engine, filters)
+    result = cache.get(version, key)
+    if result is None:
+        result = rm.recommend_with_artifacts(profile_text, artifacts, top_n=top_n, match_threshold=match_threshold,
+                                             engine=engine, filters=filters)
+        cache.put(version, key, result)
+    else:
+        rm._record("cache", [result], {})
+    return result
+
+def cached_recommend_batch(profiles: List[str], artifacts: Dict[str, Any], top_n: int = 5,
+                           match_threshold: float = 0.4, engine: Optional[str] = None,
+                           cache: Optional[ResponseCache] = None,
+                           filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    recommend_batch through the response cache: only the misses are scored (in one batch).
+    """
+    cache = cache or RESPONSE_CACHE
+    if cache is None:
+        return rm.recommend_batch(profiles, artifacts, top_n=top_n, match_threshold=match_threshold, engine=engine,
+                                  filters=filters)
+    version = rm.artifact_version(artifacts)
+    keys = [_key(p, top_n, match_threshold, engine, filters) for p in profiles]
+    results = [cache.get(version, key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if len(missing) < len(results):
+        rm._record("cache", [result for result in results if result is not None], {})
+    if missing:
+        scored = rm.recommend_batch([profiles[i] for i in missing], artifacts, top_n=top_n,
+                                    match_threshold=match_threshold, engine=engine, filters=filters)
+        for i, result in zip(missing, scored):
+            results[i] = result
+            cache.put(version, keys[i], result)
+    return results
+
+def response_cache_stats() -> Dict[str, Any]:
+    return RESPONSE_CACHE.stats() if RESPONSE_CACHE is not None else {"enabled": False}
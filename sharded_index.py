@@ -0,0 +1,258 @@
+"""
+sharded_index.py
+
+AVSARSETU - Sharded multi-process scoring (scatter / gather top-k merge)
+- The internship matrix is split into N contiguous row shards (balanced by non-zeros), each
+  held by its own worker process. Workers memory-map the CSR arrays of an mmap artifact
+  directory (artifact_store.py) and keep only their row range, so N workers share one
+  page-cache copy of the matrix. In-memory artifacts are written to a temporary directory once.
+- A query batch is sent to every shard at once (scatter). Each shard ranks its rows with the
+  "exact" engine (same cosine_similarity, same partial top-k, ties in row order) and the
+  per-shard top-k lists are merged with heapq.merge on (-score, row) (gather), so rows, scores
+  and ordering are identical to the single-process path.
+- Tombstone / filter masks are sliced per shard. Catalogs smaller than MIN_SHARD_ROWS per shard
+  use fewer shards; a single shard is scored in-process.
+- Workers for a newly published matrix start in a background thread; until they are up, queries
+  on that matrix are scored in-process (exact engine) and requests still holding the previous
+  artifacts keep using its shards. A replaced index is shut down after its last search returns.
+
+How to use:
+   AVSARSETU_ENGINE=sharded AVSARSETU_SHARDS=8 AVSARSETU_ARTIFACTS=avsarsetu_model.mmap uvicorn recommendation_model:app
+   python benchmark_recommendations.py engines --sizes 100000 1000000 --engines exact sharded
+"""
+
+import os
+import heapq
+import atexit
+import shutil
+import tempfile
+import itertools
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+import recommendation_model as rm
+
+SHARDS = int(os.environ.get("AVSARSETU_SHARDS", "0")) or os.cpu_count() or 1
+MIN_SHARD_ROWS = 10000  # below this, process round trips cost more than the scoring they spread
+KEEP_INDEXES = 2        # sharded matrices kept alive (the served one and the previous, for in-flight requests)
+VECTOR_FILES = ("data", "indices", "indptr")
+
+# ---------------------------
+# Worker side
+# ---------------------------
+_SHARD = None  # this worker's rows as a CSR matrix over memory-mapped arrays
+
+def _init_shard(directory: str, start: int, end: int, n_features: int) -> None:
+    global _SHARD
+    import scipy.sparse as sp
+    arrays = {name: np.load(os.path.join(directory, f"vectors.{name}.npy"), mmap_mode="r") for name in VECTOR_FILES}
+    indptr = np.asarray(arrays["indptr"][start:end + 1])
+    lo, hi = int(indptr[0]), int(indptr[-1])
+    _SHARD = sp.csr_matrix((arrays["data"][lo:hi], arrays["indices"][lo:hi], indptr - lo),
+                           shape=(end - start, n_features), copy=False)
+
+def _score_shard(query_vectors, k: int, mask: Optional[np.ndarray]) -> List[Tuple[np.ndarray, np.ndarray]]:
+    return rm._exact_engine(query_vectors, {"internship_vectors": _SHARD}, k, mask)
+
+# ---------------------------
+# Parent side
+# ---------------------------
+def _mmap_directory(internship_vectors) -> Optional[str]:
+    """
+    The artifact directory whose vectors.*.npy files back this matrix unchanged, if any.
+    """
+    files = []
+    for name in VECTOR_FILES:
+        array = getattr(internship_vectors, name)
+        while array is not None and not isinstance(array, np.memmap):
+            array = array.base
+        files.append(getattr(array, "filename", None))
+    if None in files:
+        return None
+    directory = os.path.dirname(files[0])
+    expected = [os.path.join(directory, f"vectors.{name}.npy") for name in VECTOR_FILES]
+    if [os.path.abspath(f) for f in files] != [os.path.abspath(f) for f in expected]:
+        return None
+    on_disk = np.load(expected[2], mmap_mode="r")
+    if on_disk.shape[0] != internship_vectors.shape[0] + 1 or internship_vectors.indptr.shape[0] != on_disk.shape[0]:
+        return None
+    return directory
+
+def _shard_bounds(indptr: np.ndarray, n_shards: int) -> List[Tuple[int, int]]:
+    """
+    Contiguous row ranges with about the same number of non-zeros each.
+    """
+    n_rows = indptr.shape[0] - 1
+    targets = np.linspace(0, int(indptr[-1]), n_shards + 1)
+    cuts = np.unique(np.concatenate([[0], np.searchsorted(indptr, targets[1:-1]), [n_rows]]))
+    return [(int(a), int(b)) for a, b in zip(cuts[:-1], cuts[1:]) if b > a]
+
+class ShardedIndex:
+    """
+    Worker processes holding row shards of one internship matrix; search() has the engine signature.
+    """
+
+    def __init__(self, internship_vectors, n_shards: Optional[int] = None, directory: Optional[str] = None):
+        n_rows, n_features = internship_vectors.shape
+        n_shards = max(1, min(int(n_shards or SHARDS), n_rows // MIN_SHARD_ROWS))
+        self.vectors = internship_vectors
+        self.bounds = _shard_bounds(np.asarray(internship_vectors.indptr), n_shards)
+        self._pools = []
+        self._tmp_dir = None
+        self.refs = 0         # in-flight searches (see _acquire / _release)
+        self.retired = False  # dropped from _INDEXES; shut down when refs reaches 0
+        if len(self.bounds) <= 1:
+            return
+        try:
+            directory = directory or _mmap_directory(internship_vectors)
+            if directory is None:
+                self._tmp_dir = directory = tempfile.mkdtemp(prefix="avsarsetu-shards-")
+                for name in VECTOR_FILES:
+                    np.save(os.path.join(directory, f"vectors.{name}.npy"),
+                            np.asarray(getattr(internship_vectors, name)))
+            # spawn: the API process runs threads (executor, model watcher) that fork would copy mid-lock
+            context = multiprocessing.get_context("spawn")
+            self._pools = [ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_init_shard,
+                                               initargs=(directory, start, end, n_features))
+                           for start, end in self.bounds]
+            for future in [pool.submit(int, 0) for pool in self._pools]:
+                future.result()  # workers have mapped their shard before the first query
+        except BaseException:
+            self.shutdown()
+            raise
+
+    def search(self, query_vectors, k: int, mask: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        if not self._pools:
+            return rm._exact_engine(query_vectors, {"internship_vectors": self.vectors}, k, mask)
+        futures = [pool.submit(_score_shard, query_vectors, k, None if mask is None else np.asarray(mask[start:end]))
+                   for pool, (start, end) in zip(self._pools, self.bounds)]
+        shard_results = [future.result() for future in futures]
+
+        merged = []
+        for q in range(query_vectors.shape[0]):
+            # each shard list is sorted by (-score, row); so is their merge
+            streams = [zip((-top_scores).tolist(), (top + start).tolist())
+                       for (top, top_scores), (start, _) in ((results[q], bounds)
+                                                             for results, bounds in zip(shard_results, self.bounds))]
+            best = list(itertools.islice(heapq.merge(*streams), k))
+            merged.append((np.array([row for _, row in best], dtype=np.int64),
+                           np.array([-score for score, _ in best], dtype=np.float64)))
+        return merged
+
+    def shutdown(self) -> None:
+        for pool in self._pools:
+            pool.shutdown(wait=True)
+        self._pools = []
+        if self._tmp_dir is not None:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            self._tmp_dir = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"shards": len(self.bounds), "processes": len(self._pools),
+                "rows": [end - start for start, end in self.bounds]}
+
+# ---------------------------
+# Scoring engine "sharded"
+# ---------------------------
+# Shard workers are started off the request path: the first query against a new matrix starts a
+# build thread and is scored in-process (exact engine, same results) until the shards are up.
+# Indexes beyond KEEP_INDEXES are retired and shut down once their last in-flight search returns.
+_INDEXES = OrderedDict()  # id(internship_vectors) -> ready ShardedIndex (which keeps the matrix alive)
+_BUILDS = {}              # id(internship_vectors) -> (matrix, build thread) while starting up
+_FAILED = {}              # id(internship_vectors) -> matrix whose build failed (served in-process)
+_INDEXES_LOCK = threading.Lock()
+
+def _build(vectors) -> None:
+    try:
+        index = ShardedIndex(vectors)
+    except Exception as e:
+        print(f"Sharded index build failed ({e}); scoring in-process for this catalog.")
+        with _INDEXES_LOCK:
+            _BUILDS.pop(id(vectors), None)
+            _FAILED[id(vectors)] = vectors
+        return
+    with _INDEXES_LOCK:
+        _BUILDS.pop(id(vectors), None)
+        _INDEXES[id(vectors)] = index
+        retired = []
+        while len(_INDEXES) > KEEP_INDEXES:
+            old = _INDEXES.popitem(last=False)[1]
+            old.retired = True
+            if old.refs == 0:
+                retired.append(old)
+    for old in retired:
+        old.shutdown()
+
+def _start_build(vectors) -> threading.Thread:
+    # caller holds _INDEXES_LOCK
+    _FAILED.clear()
+    thread = threading.Thread(target=_build, args=(vectors,), name="sharded-index-build", daemon=True)
+    _BUILDS[id(vectors)] = (vectors, thread)
+    thread.start()
+    return thread
+
+def _acquire(vectors) -> Optional[ShardedIndex]:
+    """
+    The ready index of this matrix with one more in-flight search counted, or None (build started if needed).
+    """
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(id(vectors))
+        if index is not None and index.vectors is vectors:
+            index.refs += 1
+            _INDEXES.move_to_end(id(vectors))
+            return index
+        building = _BUILDS.get(id(vectors))
+        if (building is None or building[0] is not vectors) and _FAILED.get(id(vectors)) is not vectors:
+            _start_build(vectors)
+        return None
+
+def _release(index: ShardedIndex) -> None:
+    with _INDEXES_LOCK:
+        index.refs -= 1
+        drained = index.retired and index.refs == 0
+    if drained:
+        index.shutdown()
+
+def get_sharded_index(artifacts: Dict[str, Any], wait: bool = False) -> Optional[ShardedIndex]:
+    """
+    The sharded index of artifacts["internship_vectors"], or None while its workers are starting
+    (the build is started on first use). wait=True blocks until it is ready.
+    """
+    vectors = artifacts["internship_vectors"]
+    while True:
+        index = _acquire(vectors)
+        if index is not None:
+            _release(index)
+            return index
+        with _INDEXES_LOCK:
+            building = _BUILDS.get(id(vectors))
+        if not wait or building is None:
+            return None
+        building[1].join()
+
+def shutdown_sharded_indexes() -> None:
+    with _INDEXES_LOCK:
+        indexes = list(_INDEXES.values())
+        _INDEXES.clear()
+    for index in indexes:
+        index.shutdown()
+
+atexit.register(shutdown_sharded_indexes)
+
+def sharded_engine(query_vectors, artifacts: Dict[str, Any], k: int,
+                   mask: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Scoring-engine adapter (see recommendation_model.get_engine): scatter to the shards, merge top-k.
+    """
+    index = _acquire(artifacts["internship_vectors"])
+    if index is None:
+        return rm._exact_engine(query_vectors, artifacts, k, mask)
+    try:
+        return index.search(query_vectors, k, mask)
+    finally:
+        _release(index)
@@ -1,30 +1,12 @@
 #!/usr/bin/env python3
 """
 Simple AvsarSetu Recommendation Demo
-Bypasses NLTK dependencies for demonstration
+Bypasses NLTK dependencies for demonstration (uses the "simple" analyzer of recommendation_engine.py)
 """
 
 import pandas as pd
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import json
 
-def simple_preprocess(text):
-    """Simple text preprocessing without NLTK"""
-    if text is None:
-        text = ""
-    text = str(text).lower()
-    # Remove non-alphanumeric characters except spaces
-    import re
-    text = re.sub(r'[^a-z0-9\s]', ' ', text)
-    # Simple tokenization and stopword removal
-    tokens = text.split()
-    stopwords = {'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from',
-                'has', 'he', 'in', 'is', 'it', 'its', 'of', 'on', 'that', 'the',
-                'to', 'was', 'will', 'with', 'i', 'you', 'this', 'but', 'they', 'have'}
-    tokens = [t for t in tokens if t not in stopwords and len(t) > 1]
-    return " ".join(tokens)
+from recommendation_engine import shared_engine, simple_preprocess  # noqa: F401 (simple_preprocess kept importable)
 
 def load_data(students_path, internships_path):
     """Load CSV data"""
@@ -45,7 +27,7 @@ def build_internship_document(row):
     skills = str(row.get("required_skills", ""))
     return f"{title} {description} {skills}".strip()
 
-def get_recommendations(student_id, students_df, internships_df, top_n=5):
+def get_recommendations(student_id, students_df, internships_df, top_n=5, analyzer="simple"):
     """Get internship recommendations for a student"""
     # Find student
     student_row = students_df[students_df["student_id"] == str(student_id)]
@@ -54,42 +36,9 @@ def get_recommendations(student_id, students_df, internships_df, top_n=5):
 
     # Build student profile
     student_doc = build_student_document(student_row.iloc[0])
-    student_doc = simple_preprocess(student_doc)
 
-    # Build internship documents
-    internship_docs = []
-    for _, row in internships_df.iterrows():
-        doc = build_internship_document(row)
-        internship_docs.append(simple_preprocess(doc))
-
-    # Create TF-IDF vectors
-    vectorizer = TfidfVectorizer()
-    all_docs = [student_doc] + internship_docs
-    tfidf_matrix = vectorizer.fit_transform(all_docs)
-
-    # Calculate similarities
-    student_vector = tfidf_matrix[0:1]
-    internship_vectors = tfidf_matrix[1:]
-    similarities = cosine_similarity(student_vector, internship_vectors).flatten()
-
-    # Rank internships
-    internships_df = internships_df.copy()
-    internships_df["match_score"] = similarities
-    ranked = internships_df.sort_values(by="match_score", ascending=False).reset_index(drop=True)
-
-    # Return top recommendations
-    recommendations = []
-    for _, row in ranked.head(top_n).iterrows():
-        recommendations.append({
-            "internship_id": row.get("internship_id"),
-            "title": row.get("title"),
-            "match_score": round(float(row.get("match_score", 0.0)), 4)
-        })
-
-    return {
-        "status": "success",
-        "recommendations": recommendations
-    }
+    # Internship index is built once per catalog and reused for every student
+    return shared_engine(internships_df, analyzer=analyzer).recommend(student_doc, top_n=top_n)
 
 def main():
     print("🚀 AvsarSetu - Rural Internship Portal AI Demo")
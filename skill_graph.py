@@ -0,0 +1,316 @@
+"""
+skill_graph.py
+
+AVSARSETU - Skill-graph collaborative filtering over user_skills.csv / skills.csv
+- user_skills.csv (user_id -> skill_id edges) is loaded into a binary CSR user x skill matrix
+  with integer-encoded ids (pd.factorize / Index.get_indexer, no per-edge Python loop), so
+  millions of edges take a few bytes each.
+- Offline, skill co-occurrence is computed as X^T X and normalized to cosine similarity
+  (count(a and b) / sqrt(count(a) * count(b))); only the SKILL_NEIGHBORS strongest neighbours
+  of each skill are kept.
+- Lookups are sparse row operations:
+     similar_skills(skill)   one row of the co-occurrence matrix
+     similar_users(user_id)  the user's skill row times the skill x user matrix (shared skills, cosine)
+     internship_scores(text) profile skills (+ co-occurring skills, EXPANSION_WEIGHT) against an
+                             internship x skill matrix built from required_skills
+- recommend_with_artifacts(..., skill_weight=0.3) (or AVSARSETU_SKILL_BLEND=0.3) ranks by
+  (1 - w) * TF-IDF cosine + w * skill score. Profiles without a known skill keep the plain
+  cosine ranking.
+
+Skills are recognised in profiles and internships as whole words (lowercased, punctuation
+removed), with the same compiled matcher as the course catalog (course_matcher.KeywordMatcher).
+
+How to use:
+   AVSARSETU_SKILL_BLEND=0.3 uvicorn recommendation_model:app
+   GET /skills/python/similar?k=10        GET /users/<user_id>/similar?k=10
+   python skill_graph.py user_skills.csv skills.csv Skill_1
+"""
+
+import os
+import re
+import sys
+import itertools
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+import recommendation_model as rm
+from course_matcher import KeywordMatcher
+
+USER_SKILLS_PATH = os.environ.get("AVSARSETU_USER_SKILLS", "user_skills.csv")
+SKILLS_PATH = os.environ.get("AVSARSETU_SKILLS", "skills.csv")
+SKILL_NEIGHBORS = int(os.environ.get("AVSARSETU_SKILL_NEIGHBORS", "50"))  # co-occurrence neighbours kept per skill
+EXPANSION_WEIGHT = 0.5  # weight of co-occurring skills when expanding a profile's skills
+
+_GRAPH_IDS = itertools.count(1)
+
+_NON_SKILL_CHARS = re.compile(r"[^a-z0-9+#]+")
+
+def _clean_name(text: str) -> str:
+    """
+    Lowercase words (letters, digits, + and #) separated by single spaces: "Node.js" -> "node js",
+    "Skill_12" -> "skill 12". Unlike preprocess_text, digits and short names ("C", "R") survive.
+    """
+    return " ".join(_NON_SKILL_CHARS.sub(" ", str(text).lower()).split())
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions of the k largest scores, best first (ties: lower position first).
+    """
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.size:
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(scores.size)
+    return top[np.lexsort((top, -scores[top]))]
+
+class SkillGraph:
+    """
+    Binary user x skill matrix with its skill co-occurrence matrix.
+    """
+
+    def __init__(self, user_ids: np.ndarray, skill_ids: List[str], skill_names: List[str],
+                 user_rows: np.ndarray, skill_cols: np.ndarray, neighbors: int = SKILL_NEIGHBORS):
+        self.user_ids = np.asarray(user_ids, dtype=object)
+        self.skill_ids = [str(s) for s in skill_ids]
+        self.skill_names = [str(n) for n in skill_names]
+        self.graph_id = next(_GRAPH_IDS)
+        n_users, n_skills = len(self.user_ids), len(self.skill_ids)
+
+        matrix = sp.csr_matrix((np.ones(len(user_rows), dtype=np.float32), (user_rows, skill_cols)),
+                               shape=(n_users, n_skills))
+        matrix.sum_duplicates()
+        matrix.data[:] = 1.0  # repeated edges count once
+        self.user_skills = matrix
+        self.skill_users = matrix.T.tocsr()  # (n_skills, n_users) for similar_users
+        self.user_degree = np.diff(matrix.indptr).astype(np.float32)
+        self.skill_degree = np.diff(self.skill_users.indptr).astype(np.float32)
+        self.cooccurrence = self._cooccurrence(neighbors)
+
+        self.user_index = {str(u): i for i, u in enumerate(self.user_ids)}
+        self.skill_index = {s: j for j, s in enumerate(self.skill_ids)}
+        cleaned = [_clean_name(n) for n in self.skill_names]
+        self.name_index = {}
+        for j, name in enumerate(cleaned):
+            self.name_index.setdefault(name, j)
+        # whole-word matching: " python " in " ... python ... "
+        self._matcher = KeywordMatcher([f" {name} " for name in cleaned])
+
+    @classmethod
+    def from_csv(cls, user_skills_path: str, skills_path: Optional[str] = None,
+                 neighbors: int = SKILL_NEIGHBORS) -> "SkillGraph":
+        """
+        Load user_skills.csv (user_id, skill_id) and optionally skills.csv (id, name).
+        Skill ids missing from skills.csv are kept, named by their id.
+        """
+        import pandas as pd
+        edges = pd.read_csv(user_skills_path, usecols=["user_id", "skill_id"], dtype=str).dropna()
+        user_rows, user_ids = pd.factorize(edges["user_id"].str.strip())
+        edge_skills = edges["skill_id"].str.strip()
+
+        if skills_path and os.path.exists(skills_path):
+            skills = pd.read_csv(skills_path, dtype=str).fillna("")
+            skill_ids = skills["id"].str.strip().tolist()
+            skill_names = skills["name"].tolist() if "name" in skills.columns else list(skill_ids)
+        else:
+            skill_ids, skill_names = [], []
+        known = pd.Index(skill_ids)
+        extra = pd.Index(edge_skills.unique()).difference(known)
+        skill_ids = skill_ids + extra.tolist()
+        skill_names = skill_names + extra.tolist()
+        skill_cols = pd.Index(skill_ids).get_indexer(edge_skills)
+        return cls(np.asarray(user_ids), skill_ids, skill_names, user_rows, skill_cols, neighbors)
+
+    def _cooccurrence(self, neighbors: int) -> sp.csr_matrix:
+        """
+        Cosine skill co-occurrence (diagonal removed), the `neighbors` strongest entries per row.
+        """
+        counts = (self.skill_users @ self.user_skills).tocsr()  # (n_skills, n_skills) shared users
+        counts.setdiag(0)
+        counts.eliminate_zeros()
+        norms = np.sqrt(np.maximum(self.skill_degree, 1.0))
+        rows = np.repeat(np.arange(counts.shape[0]), np.diff(counts.indptr))
+        counts.data = counts.data / (norms[rows] * norms[counts.indices])
+        if neighbors <= 0:
+            return counts
+        indptr, indices, data = [0], [], []
+        for j in range(counts.shape[0]):
+            start, end = counts.indptr[j], counts.indptr[j + 1]
+            keep = start + _top_k(counts.data[start:end], neighbors)
+            indices.append(counts.indices[keep])
+            data.append(counts.data[keep])
+            indptr.append(indptr[-1] + keep.size)
+        return sp.csr_matrix((np.concatenate(data) if data else np.empty(0, dtype=np.float32),
+                              np.concatenate(indices) if indices else np.empty(0, dtype=np.int32), indptr),
+                             shape=counts.shape)
+
+    # ---------------------------
+    # Lookups
+    # ---------------------------
+    def skill_position(self, skill: str) -> Optional[int]:
+        """
+        Column of a skill given its id or its name.
+        """
+        skill = str(skill).strip()
+        position = self.skill_index.get(skill)
+        return position if position is not None else self.name_index.get(_clean_name(skill))
+
+    def skills_in_text(self, text: str) -> np.ndarray:
+        """
+        Columns of the skills whose (cleaned) name occurs as whole words in text.
+        """
+        return np.array(sorted(self._matcher.find(f" {_clean_name(text)} ")), dtype=np.int64)
+
+    def similar_skills(self, skill: str, k: int = 10) -> List[Dict[str, Any]]:
+        j = self.skill_position(skill)
+        if j is None:
+            raise KeyError(skill)
+        start, end = self.cooccurrence.indptr[j], self.cooccurrence.indptr[j + 1]
+        columns, scores = self.cooccurrence.indices[start:end], self.cooccurrence.data[start:end]
+        top = _top_k(scores, k)
+        return [{"skill_id": self.skill_ids[c], "name": self.skill_names[c], "score": round(float(s), 4)}
+                for c, s in zip(columns[top], scores[top])]
+
+    def similar_users(self, user_id: str, k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Users sharing the most skills (cosine over binary skill rows), excluding the user.
+        """
+        i = self.user_index.get(str(user_id))
+        if i is None:
+            raise KeyError(user_id)
+        shared = (self.user_skills[i] @ self.skill_users).tocsr()  # (1, n_users) shared-skill counts
+        users, counts = shared.indices, shared.data
+        others = users != i
+        users, counts = users[others], counts[others]
+        scores = counts / np.sqrt(self.user_degree[users] * self.user_degree[i])
+        top = _top_k(scores, k)
+        return [{"user_id": str(self.user_ids[u]), "shared_skills": int(c), "score": round(float(s), 4)}
+                for u, c, s in zip(users[top], counts[top], scores[top])]
+
+    def skill_profile(self, skills: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Dense, L2-normalized skill weights: the given skills plus their co-occurring skills.
+        """
+        if skills.size == 0:
+            return None
+        weights = np.zeros(len(self.skill_ids), dtype=np.float32)
+        weights += EXPANSION_WEIGHT * np.asarray(self.cooccurrence[skills].sum(axis=0)).ravel()
+        weights[skills] = 1.0
+        return weights / np.linalg.norm(weights)
+
+    def internship_matrix(self, artifacts: Dict[str, Any]) -> sp.csr_matrix:
+        """
+        L2-normalized internship x skill matrix (skills named in required_skills, else the document),
+        built once per internship matrix.
+        """
+        def build(a: Dict[str, Any]) -> sp.csr_matrix:
+            df = a["internships_df"]
+            if "required_skills" in df.columns:
+                texts = df["required_skills"].fillna("").astype(str).tolist()
+            else:
+                texts = df.apply(rm.build_internship_document, axis=1).astype(str).tolist()
+            rows, cols = [], []
+            for row, text in enumerate(texts):
+                found = self.skills_in_text(text)
+                rows.append(np.full(found.size, row, dtype=np.int64))
+                cols.append(found)
+            rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+            cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.int64)
+            matrix = sp.csr_matrix((np.ones(rows.size, dtype=np.float32), (rows, cols)),
+                                   shape=(len(texts), len(self.skill_ids)))
+            norms = np.sqrt(np.diff(matrix.indptr)).astype(np.float32)
+            norms[norms == 0] = 1.0
+            return sp.diags(1.0 / norms) @ matrix
+
+        return rm.derived_artifact(artifacts, f"skill_matrix_{self.graph_id}", build)
+
+    def internship_scores(self, profile_text: str, artifacts: Dict[str, Any]) -> Optional[np.ndarray]:
+        """
+        Skill-based score of every internship for a raw profile (None if no known skill is mentioned).
+        """
+        profile = self.skill_profile(self.skills_in_text(profile_text))
+        if profile is None:
+            return None
+        # incremental snapshots: per segment, so the base segment's matrix survives updates
+        return np.concatenate([self.internship_matrix(part) @ profile for part in _segments(artifacts)])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self.user_ids),
+            "skills": len(self.skill_ids),
+            "edges": int(self.user_skills.nnz),
+            "cooccurrence_entries": int(self.cooccurrence.nnz),
+            "bytes": int(sum(m.data.nbytes + m.indices.nbytes + m.indptr.nbytes
+                             for m in (self.user_skills, self.skill_users, self.cooccurrence)))
+        }
+
+# ---------------------------
+# Blending with the TF-IDF ranking
+# ---------------------------
+def _segments(artifacts: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    The non-empty segments of an incremental snapshot in row order, else [artifacts].
+    """
+    segments = artifacts.get("segments")
+    if segments is None:
+        return [artifacts]
+    parts = [part for part in (segments["base"], segments["delta"]) if part["internship_vectors"].shape[0]]
+    return parts or [segments["base"]]
+
+def blended_ranking(profile_text: str, query_vector, artifacts: Dict[str, Any], k: int,
+                    mask: Optional[np.ndarray], weight: float, engine: Optional[str] = None,
+                    graph: Optional[SkillGraph] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Engine-shaped result for one profile ranked by (1 - weight) * cosine + weight * skill score.
+    Without a skill graph, or a known skill in the profile, this is the plain engine ranking.
+    """
+    graph = graph or get_skill_graph()
+    skill_scores = graph.internship_scores(profile_text, artifacts) if graph is not None else None
+    if skill_scores is None:
+        return rm.get_engine(engine)(query_vector, artifacts, k, mask)
+    from sklearn.metrics.pairwise import cosine_similarity
+    text_scores = np.concatenate([cosine_similarity(query_vector, part["internship_vectors"]).ravel()
+                                  for part in _segments(artifacts)])
+    return [rm._select_top_k((1.0 - weight) * text_scores + weight * skill_scores, k, mask)]
+
+# ---------------------------
+# Process-wide graph
+# ---------------------------
+_GRAPH = None
+_GRAPH_LOADED = False
+_GRAPH_LOCK = threading.Lock()
+
+def get_skill_graph() -> Optional[SkillGraph]:
+    """
+    The graph from AVSARSETU_USER_SKILLS / AVSARSETU_SKILLS (loaded once), or None if there is no edge file.
+    """
+    global _GRAPH, _GRAPH_LOADED
+    if not _GRAPH_LOADED:
+        with _GRAPH_LOCK:
+            if not _GRAPH_LOADED:
+                if os.path.exists(USER_SKILLS_PATH):
+                    _GRAPH = SkillGraph.from_csv(USER_SKILLS_PATH, SKILLS_PATH)
+                    print(f"Skill graph loaded from {USER_SKILLS_PATH}: {_GRAPH.stats()}")
+                _GRAPH_LOADED = True
+    return _GRAPH
+
+def set_skill_graph(graph: Optional[SkillGraph]) -> None:
+    """
+    Replace the process-wide graph (None: load from the default paths on next use).
+    """
+    global _GRAPH, _GRAPH_LOADED
+    with _GRAPH_LOCK:
+        _GRAPH = graph
+        _GRAPH_LOADED = graph is not None
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python skill_graph.py <user_skills.csv> [skills.csv] [skill] [k]")
+        sys.exit(2)
+    graph = SkillGraph.from_csv(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    print(graph.stats())
+    if len(sys.argv) > 3:
+        print(graph.similar_skills(sys.argv[3], int(sys.argv[4]) if len(sys.argv) > 4 else 10))
@@ -0,0 +1,328 @@
+"""
+streaming_ingest.py
+
+AVSARSETU - Streaming, chunked ingestion of large internship / student CSVs
+Two passes of generator stages, one chunk of rows in memory at a time:
+    pass 1: read CSV chunk (pd.read_csv(chunksize=...))
+              -> build internship documents (column-wise, no DataFrame.apply)
+              -> clean documents (preprocess_document)
+              -> spill cleaned documents to disk (artifact_store text format)
+              -> count 1-2-gram frequencies of the chunk and merge them into a bounded term table
+    fix the vocabulary: the max_features most frequent terms (cut exactly as TfidfVectorizer cuts)
+    pass 2: read the spilled documents back chunk by chunk
+              -> count the fixed vocabulary (CountVectorizer(vocabulary=...))   -> document frequencies
+    IDF from the document frequencies, then TF-IDF weighting + L2 normalisation of the count rows
+
+What stays in memory: the metadata columns ranking and filtering use (METADATA_COLUMNS, not the
+descriptions), the term table (at most TERM_BUDGET entries), the sparse count / TF-IDF matrix of
+the final vocabulary and one chunk of documents. The cleaned documents live in a file
+(artifacts["documents_path"], a temporary file unless documents_path is given) unless
+keep_documents=True.
+
+The vocabulary, IDF and matrix are identical to build_internship_index on the same CSV as long as
+the catalog has at most TERM_BUDGET distinct 1-2-grams. Beyond that the term table is pruned to its
+most frequent half whenever it overflows, so terms near the max_features cut-off may differ
+(the frequent terms that make up the vocabulary are kept).
+
+Reports rows/sec per stage and peak RSS.
+
+How to use:
+   python recommendation_model.py --streaming --chunk_size 50000 --artifact_format mmap --model_out model.mmap
+   python streaming_ingest.py internships_big.csv --chunk_size 50000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from typing import List, Dict, Any, Optional, Iterator, Iterable
+
+import numpy as np
+
+import recommendation_model as rm
+
+CHUNK_SIZE = 50_000
+INTERNSHIP_FIELDS = rm.INTERNSHIP_FIELDS
+# kept per row: ids / titles for ranking, attribute columns for filters, required_skills for the skill graph
+METADATA_COLUMNS = ["internship_id", "title", "required_skills", "location", "sector", "education_level"]
+MAX_FEATURES = 5000        # same vectorizer settings as index_from_documents
+NGRAM_RANGE = (1, 2)
+TERM_BUDGET = 2_000_000    # distinct terms counted before the term table is pruned
+READ_BLOCK = 1 << 20       # characters read at a time from the spilled documents
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    Peak resident set size of this process, or None where it cannot be read (no `resource`
+    module, e.g. on Windows, and psutil is not installed).
+    """
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss)  # Windows reports the peak working set
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # kilobytes on Linux
+
+def peak_rss_mb() -> Optional[float]:
+    peak = peak_rss_bytes()
+    return None if peak is None else round(peak / 1e6, 1)
+
+# ---------------------------
+# Stages
+# ---------------------------
+def iter_csv_chunks(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator["pd.DataFrame"]:
+    """
+    The CSV as string DataFrames of at most chunk_size rows (NaN -> "", like load_data).
+    """
+    import pandas as pd
+    for chunk in pd.read_csv(path, dtype=str, chunksize=chunk_size):
+        yield chunk.fillna("")
+
+class StageTimer:
+    """
+    Accumulated seconds and rows per pipeline stage.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.rows = {}
+
+    def add(self, stage: str, seconds: float, rows: int) -> None:
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+        self.rows[stage] = self.rows.get(stage, 0) + rows
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {"seconds": round(seconds, 3), "rows": self.rows[stage],
+                    "rows_per_second": round(self.rows[stage] / seconds, 1) if seconds > 0 else None}
+            for stage, seconds in self.seconds.items()
+        }
+
+def _timed(stage: str, timer: StageTimer, items: Iterable, rows=len) -> Iterator:
+    """
+    Pass items through, charging the time spent producing each one to `stage`.
+    """
+    iterator = iter(items)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        timer.add(stage, time.perf_counter() - start, rows(item))
+        yield item
+
+def iter_text_column(path: str, chunk_size: int, n_values: int) -> Iterator[List[str]]:
+    """
+    A text column written by artifact_store (values joined by SEPARATOR), chunk_size values at a time.
+    """
+    from artifact_store import SEPARATOR
+    with open(path, "r", encoding="utf-8") as fh:
+        pending, tail, seen = [], "", False
+        for block in iter(lambda: fh.read(READ_BLOCK), ""):
+            seen = True
+            parts = (tail + block).split(SEPARATOR)
+            tail = parts.pop()
+            pending.extend(parts)
+            while len(pending) >= chunk_size:
+                yield pending[:chunk_size]
+                pending = pending[chunk_size:]
+    if not seen:
+        # "" is both zero values and n empty values (see read_text_column)
+        pending, tail = [""] * n_values, None
+    if tail is not None:
+        pending.append(tail)
+    for i in range(0, len(pending), chunk_size):
+        yield pending[i:i + chunk_size]
+
+class TermCounter:
+    """
+    Corpus frequency of every 1-2-gram, in at most `budget` entries: when the table overflows it
+    keeps its most frequent half, so memory does not grow with the number of distinct n-grams.
+    """
+
+    def __init__(self, budget: int = TERM_BUDGET):
+        self.budget = budget
+        self.counts = {}
+        self.pruned = 0
+
+    def add(self, docs: List[str]) -> None:
+        from sklearn.feature_extraction.text import CountVectorizer
+        counter = CountVectorizer(ngram_range=NGRAM_RANGE)  # the analyzer TfidfVectorizer uses
+        try:
+            counts = counter.fit_transform(docs)
+        except ValueError:
+            return  # only empty documents / no terms in this chunk
+        totals = np.asarray(counts.sum(axis=0)).ravel()
+        table = self.counts
+        for term, total in zip(counter.get_feature_names_out().tolist(), totals.tolist()):
+            table[term] = table.get(term, 0) + total
+        if len(table) > self.budget:
+            keep = sorted(table.items(), key=lambda item: (-item[1], item[0]))[:self.budget // 2]
+            self.pruned += len(table) - len(keep)
+            self.counts = dict(keep)
+
+    def vocabulary(self, max_features: int = MAX_FEATURES) -> Dict[str, int]:
+        """
+        The max_features most frequent terms, indexed in alphabetical order. The cut is made the way
+        CountVectorizer._limit_features makes it (argsort of the totals in alphabetical term order),
+        so ties at the cut-off are resolved identically.
+        """
+        terms = sorted(self.counts)
+        if len(terms) > max_features:
+            totals = np.array([self.counts[term] for term in terms], dtype=np.int64)
+            keep = np.zeros(len(terms), dtype=bool)
+            keep[(-totals).argsort()[:max_features]] = True
+            terms = [term for term, kept in zip(terms, keep) if kept]
+        return {term: i for i, term in enumerate(terms)}
+
+# ---------------------------
+# Streaming index build
+# ---------------------------
+def stream_internship_index(internships_csv: str,
+                            chunk_size: int = CHUNK_SIZE,
+                            documents_path: Optional[str] = None,
+                            keep_documents: bool = False) -> Dict[str, Any]:
+    """
+    build_internship_index for a CSV that does not fit in memory several times over.
+    Cleaned documents are written to documents_path (default: a temporary file the caller owns) and
+    referenced as artifacts["documents_path"]; keep_documents=True also keeps them in memory.
+    Returns artifacts with an extra "ingest_stats" entry (stage timings, rows/sec, peak RSS).
+    """
+    import pandas as pd
+    import scipy.sparse as sp
+    from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+    from sklearn.preprocessing import normalize
+    from artifact_store import SEPARATOR
+
+    if documents_path is None:
+        fd, documents_path = tempfile.mkstemp(prefix="avsarsetu-", suffix=".documents.txt")
+        os.close(fd)
+    timer = StageTimer()
+    metadata = []
+    kept = [] if keep_documents else None
+    terms = TermCounter()
+    started = time.perf_counter()
+
+    # pass 1: clean, spill and count
+    n_docs = 0
+    with open(documents_path, "w", encoding="utf-8") as out:
+        for chunk in _timed("read", timer, iter_csv_chunks(internships_csv, chunk_size)):
+            metadata.append(chunk[[c for c in METADATA_COLUMNS if c in chunk.columns]])
+            start = time.perf_counter()
+            docs = rm.build_internship_documents(chunk)
+            timer.add("build", time.perf_counter() - start, len(docs))
+            del chunk
+            start = time.perf_counter()
+            cleaned = [rm.preprocess_document(d) for d in docs]
+            timer.add("clean", time.perf_counter() - start, len(cleaned))
+            start = time.perf_counter()
+            if cleaned:
+                out.write(("" if n_docs == 0 else SEPARATOR) + SEPARATOR.join(cleaned))
+            n_docs += len(cleaned)
+            if kept is not None:
+                kept.extend(cleaned)
+            timer.add("spill", time.perf_counter() - start, len(cleaned))
+            start = time.perf_counter()
+            terms.add(cleaned)
+            timer.add("count", time.perf_counter() - start, len(cleaned))
+
+    # pass 2: count the fixed vocabulary, then IDF-weight
+    start = time.perf_counter()
+    vocabulary = terms.vocabulary()
+    terms = None
+    counter = CountVectorizer(ngram_range=NGRAM_RANGE, vocabulary=vocabulary)
+    count_chunks = [counter.transform(docs) for docs in iter_text_column(documents_path, chunk_size, n_docs)]
+    counts = sp.vstack(count_chunks, format="csr") if count_chunks else sp.csr_matrix((0, len(vocabulary)))
+    count_chunks = None
+    df = np.bincount(counts.indices, minlength=len(vocabulary))
+    idf = np.log((1 + n_docs) / (1 + df)) + 1.0  # TfidfVectorizer(smooth_idf=True)
+    counts = counts.astype(np.float64)
+    counts.data *= idf[counts.indices]
+    internship_vectors = normalize(counts, norm="l2", copy=False)
+    tfidf = TfidfVectorizer(ngram_range=NGRAM_RANGE, max_features=MAX_FEATURES)
+    tfidf.vocabulary_ = vocabulary
+    tfidf.idf_ = idf
+    timer.add("vectorize", time.perf_counter() - start, n_docs)
+
+    internships_df = pd.concat(metadata, ignore_index=True) if metadata else pd.DataFrame(columns=METADATA_COLUMNS[:2])
+    metadata.clear()
+    artifacts = {
+        "vectorizer": tfidf,
+        "internship_vectors": internship_vectors,
+        "internships_df": internships_df,
+        "documents_path": documents_path,
+        "internship_ids": rm._column_values(internships_df, "internship_id"),
+        "internship_titles": rm._column_values(internships_df, "title")
+    }
+    if kept is not None:
+        artifacts["documents"] = kept
+    from attribute_filters import attach_filter_index
+    attach_filter_index(artifacts)
+
+    total = time.perf_counter() - started
+    rows = internship_vectors.shape[0]
+    artifacts["ingest_stats"] = {
+        "rows": rows,
+        "seconds": round(total, 3),
+        "rows_per_second": round(rows / total, 1) if total > 0 else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "vocabulary_size": len(vocabulary),
+        "stages": timer.report()
+    }
+    return artifacts
+
+def print_ingest_stats(stats: Dict[str, Any]) -> None:
+    peak = "unavailable" if stats["peak_rss_mb"] is None else f"{stats['peak_rss_mb']} MB"
+    print(f"Ingested {stats['rows']} internships in {stats['seconds']}s "
+          f"({stats['rows_per_second']} rows/s), peak RSS {peak}")
+    for stage, s in stats["stages"].items():
+        print(f"   {stage:>10}: {s['seconds']:>8.3f}s  {s['rows_per_second'] or 0:>12.1f} rows/s")
+
+def stream_train_and_save(internships_csv: str, save_path: str, artifact_format: str = "joblib",
+                          chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Streaming counterpart of train_and_save_model (reads the CSV itself instead of taking a DataFrame).
+    The mmap format copies the spilled documents file into the artifact directory; the joblib
+    format is a single pickle, so the documents are read back into it.
+    """
+    spill_path = f"{save_path}.documents.tmp"
+    artifacts = stream_internship_index(internships_csv, chunk_size=chunk_size, documents_path=spill_path)
+    print_ingest_stats(artifacts["ingest_stats"])
+    stats = artifacts.pop("ingest_stats")
+    try:
+        if artifact_format == "joblib":
+            from artifact_store import read_text_column
+            artifacts["documents"] = read_text_column(spill_path, len(artifacts["internship_ids"]))
+            artifacts.pop("documents_path")
+        rm.save_model_artifacts(artifacts, save_path, artifact_format=artifact_format)
+    finally:
+        os.remove(spill_path)
+    if artifact_format == "mmap":
+        from artifact_store import data_directory
+        artifacts["documents_path"] = os.path.join(data_directory(save_path), "documents.txt")
+    artifacts["ingest_stats"] = stats
+    return artifacts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AVSARSETU - streaming internship ingestion")
+    parser.add_argument("internships", help="Internships CSV")
+    parser.add_argument("--chunk_size", type=int, default=CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument("--model_out", type=str, default=None, help="Also save artifacts here")
+    parser.add_argument("--artifact_format", type=str, default="joblib", choices=["joblib", "mmap"])
+    parser.add_argument("--documents_path", type=str, default=None,
+                        help="Keep the cleaned documents in this file (default: a temporary file, removed)")
+    args = parser.parse_args()
+    if args.model_out:
+        stream_train_and_save(args.internships, args.model_out, args.artifact_format, args.chunk_size)
+    else:
+        ingested = stream_internship_index(args.internships, chunk_size=args.chunk_size,
+                                           documents_path=args.documents_path)
+        print_ingest_stats(ingested["ingest_stats"])
+        if args.documents_path is None:
+            os.remove(ingested["documents_path"])
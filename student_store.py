@@ -0,0 +1,247 @@
+"""
+student_store.py
+
+AVSARSETU - Indexed student store with cached profile documents and vectors
+- students.csv is loaded once into a dict keyed by student_id (O(1) lookups, no column scans).
+- Each student's cleaned document and TF-IDF vector are computed on first use and cached
+  (LRU, STUDENT_CACHE_SIZE entries); vectors are tied to the vectorizer that produced them.
+- Every row carries a fingerprint of its fields: when the CSV changes (or upsert() is called)
+  only students whose row actually changed lose their cached document/vector.
+
+Example:
+    store = get_student_store("students.csv")
+    store.recommend("101", INTERNSHIP_INDEX_CACHE.get_for_path("internships.csv"))
+    get_recommendations("101", store, internships_df)      # a store is accepted in place of students_df
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+import recommendation_model as rm
+
+STUDENT_CACHE_SIZE = 100_000
+# students CSVs kept loaded per process (least recently used first out; pinned stores stay)
+MAX_STORES = int(os.environ.get("AVSARSETU_STUDENT_STORES", "8"))
+
+def _fingerprint(record: Dict[str, Any]) -> int:
+    return hash(tuple(sorted((str(k), str(v)) for k, v in record.items())))
+
+class StudentStore:
+    """
+    Students by id, with per-student caches of the cleaned profile document and TF-IDF vector.
+    Counters: hits (cached vector reused), misses (document/vector computed), invalidations.
+    `version` goes up whenever a row is added, changed or removed.
+    """
+
+    def __init__(self, records: Optional[List[Dict[str, Any]]] = None, cache_size: int = STUDENT_CACHE_SIZE,
+                 path: Optional[str] = None):
+        self.cache_size = cache_size
+        self.path = path
+        self._stamp = None
+        self._rows = {}              # student_id -> record
+        self._fingerprints = {}      # student_id -> fingerprint of the record
+        self._cache = OrderedDict()  # student_id -> {"doc", "vectorizer", "vector"}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.version = 0
+        for record in records or []:
+            self._put(record)
+
+    @classmethod
+    def from_csv(cls, students_path: str, cache_size: int = STUDENT_CACHE_SIZE) -> "StudentStore":
+        store = cls(cache_size=cache_size, path=os.path.abspath(students_path))
+        store.refresh()
+        return store
+
+    @classmethod
+    def from_dataframe(cls, students_df: "pd.DataFrame", cache_size: int = STUDENT_CACHE_SIZE) -> "StudentStore":
+        return cls(students_df.fillna("").astype(str).to_dict("records"), cache_size=cache_size)
+
+    # ---------------------------
+    # Rows
+    # ---------------------------
+    def refresh(self) -> int:
+        """
+        Re-read the CSV if its (mtime, size) changed; returns the number of students added, changed or removed.
+        """
+        if self.path is None:
+            return 0
+        st = os.stat(self.path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self._stamp:
+            return 0
+        import pandas as pd
+        records = pd.read_csv(self.path, dtype=str).fillna("").to_dict("records")
+        with self._lock:
+            changed = 0
+            seen = set()
+            for record in records:
+                seen.add(str(record["student_id"]))
+                changed += self._put(record)
+            for student_id in [s for s in self._rows if s not in seen]:
+                self._drop(student_id)
+                changed += 1
+            self._stamp = stamp
+        return changed
+
+    def upsert(self, record: Dict[str, Any]) -> bool:
+        """
+        Insert or replace a student row; returns True if anything changed (cached entry invalidated).
+        """
+        with self._lock:
+            return bool(self._put({k: "" if v is None else str(v) for k, v in record.items()}))
+
+    def remove(self, student_id: str) -> bool:
+        with self._lock:
+            if str(student_id) not in self._rows:
+                return False
+            self._drop(str(student_id))
+            return True
+
+    def get(self, student_id: str) -> Optional[Dict[str, Any]]:
+        return self._rows.get(str(student_id))
+
+    def fingerprint(self, student_id: str) -> Optional[int]:
+        return self._fingerprints.get(str(student_id))
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._rows)
+
+    def __contains__(self, student_id) -> bool:
+        return str(student_id) in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _put(self, record: Dict[str, Any]) -> int:
+        student_id = str(record["student_id"])
+        fingerprint = _fingerprint(record)
+        if self._fingerprints.get(student_id) == fingerprint:
+            return 0
+        if self._cache.pop(student_id, None) is not None:
+            self.invalidations += 1
+        self._rows[student_id] = record
+        self._fingerprints[student_id] = fingerprint
+        self.version += 1
+        return 1
+
+    def _drop(self, student_id: str) -> None:
+        self._rows.pop(student_id, None)
+        self._fingerprints.pop(student_id, None)
+        self.version += 1
+        if self._cache.pop(student_id, None) is not None:
+            self.invalidations += 1
+
+    # ---------------------------
+    # Cached documents / vectors
+    # ---------------------------
+    def document(self, student_id: str) -> Optional[str]:
+        """
+        Cleaned profile document (build_student_document + preprocess_text), cached.
+        """
+        entry = self._entry(str(student_id))
+        return None if entry is None else entry["doc"]
+
+    def vector(self, student_id: str, vectorizer):
+        """
+        TF-IDF vector of the student under `vectorizer`, cached until the row or the vectorizer changes.
+        """
+        student_id = str(student_id)
+        entry = self._entry(student_id)
+        if entry is None:
+            return None
+        if entry["vectorizer"] is vectorizer:
+            self.hits += 1
+            return entry["vector"]
+        vector = vectorizer.transform([entry["doc"]])
+        with self._lock:
+            entry["vectorizer"], entry["vector"] = vectorizer, vector
+        return vector
+
+    def _entry(self, student_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._cache.get(student_id)
+            if entry is not None:
+                self._cache.move_to_end(student_id)
+                return entry
+            record = self._rows.get(student_id)
+        if record is None:
+            return None
+        self.misses += 1
+        doc = rm.preprocess_text(rm.build_student_document(record))
+        entry = {"doc": doc, "vectorizer": None, "vector": None}
+        with self._lock:
+            if self._rows.get(student_id) is record:  # row not replaced meanwhile
+                self._cache[student_id] = entry
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return entry
+
+    # ---------------------------
+    # Recommendations
+    # ---------------------------
+    def recommend(self, student_id: str, index: Dict[str, Any], top_n: int = 5, match_threshold: float = 0.4,
+                  engine: Optional[str] = None, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Same result as get_recommendations, from the cached student vector.
+        """
+        record = self.get(student_id)
+        if record is None:
+            result = {"status": "error", "message": f"Student ID {student_id} not found."}
+            rm._record("student", [result], {})
+            return result
+        mask = rm.eligible_mask(index, filters)
+        started = time.perf_counter()
+        vector = self.vector(student_id, index["vectorizer"])
+        vectorized = time.perf_counter()
+        ranked = rm.get_engine(engine)(vector, index, rm._clip_top_n(top_n), mask)
+        stages = {"vector": vectorized - started, "score": time.perf_counter() - vectorized}
+        results = rm._timed_results(ranked, index, match_threshold,
+                                    [record.get("skills", "") + " " + record.get("interests", "")], stages)
+        rm._record("student", results, stages)
+        return results[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "students": len(self._rows),
+                "cached": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations
+            }
+
+# ---------------------------
+# Process-wide stores per CSV
+# ---------------------------
+_STORES = OrderedDict()  # absolute path -> StudentStore, least recently used first
+_PINNED = set()
+_STORES_LOCK = threading.Lock()
+
+def get_student_store(students_path: str, pin: bool = False) -> StudentStore:
+    """
+    The store for a students CSV (loaded once per process, refreshed when the file changes).
+    At most MAX_STORES stores are kept; pin=True keeps this one loaded (e.g. while a top-k table uses it).
+    """
+    source = os.path.abspath(students_path)
+    with _STORES_LOCK:
+        store = _STORES.get(source)
+        if store is None:
+            store = _STORES[source] = StudentStore(path=source)
+        _STORES.move_to_end(source)
+        if pin:
+            _PINNED.add(source)
+        for path in [p for p in _STORES if p not in _PINNED][:max(0, len(_STORES) - MAX_STORES)]:
+            del _STORES[path]
+    store.refresh()
+    return store
+
+def student_store_stats() -> Dict[str, Dict[str, Any]]:
+    with _STORES_LOCK:
+        return {path: store.stats() for path, store in _STORES.items()}
@@ -0,0 +1,61 @@
+"""
+Shared fixtures: a synthetic catalog built from the sample CSVs, and the reference ranking every
+engine / snapshot is checked against (the exact engine over one flat matrix).
+
+Run from the repository root with the NLTK data available (see recommendation_model.ensure_nltk_resources):
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import recommendation_model as rm  # noqa: E402
+import benchmark_recommendations as bench  # noqa: E402
+
+PROFILES = ["Python, Machine Learning, Data Analysis", "excel finance accounting",
+            "react javascript web development", "cloud aws devops", "no known words here"]
+
+def synthetic_catalog(n: int, seed: int = 5, id_prefix: str = ""):
+    """
+    n internships with location / sector columns (so attribute filters have something to index).
+    """
+    catalog = bench.synthetic_internships(n, seed=seed, internships_path=os.path.join(ROOT, "internships.csv"))
+    if id_prefix:
+        catalog["internship_id"] = [f"{id_prefix}{i}" for i in range(n)]
+    catalog["location"] = [("Delhi", "Pune", "Mumbai")[i % 3] for i in range(n)]
+    catalog["sector"] = [("IT", "Finance")[(i // 3) % 2] for i in range(n)]
+    return catalog
+
+def exact_ranking(artifacts, query_vectors, k, mask=None):
+    """
+    The reference: the exact engine over a flat copy of the artifacts' full matrix.
+    """
+    flat = {"vectorizer": artifacts["vectorizer"], "internship_vectors": artifacts["internship_vectors"]}
+    return rm._exact_engine(query_vectors, flat, k, mask)
+
+def assert_same_ranking(got, expected):
+    assert len(got) == len(expected)
+    for (rows, scores), (expected_rows, expected_scores) in zip(got, expected):
+        np.testing.assert_array_equal(rows, expected_rows)
+        np.testing.assert_allclose(scores, expected_scores, rtol=1e-6, atol=1e-9)
+
+@pytest.fixture(scope="session", autouse=True)
+def nltk_data():
+    try:
+        rm.ensure_nltk_resources()
+    except Exception as e:
+        pytest.skip(f"NLTK data unavailable: {e}")
+
+@pytest.fixture
+def catalog():
+    return synthetic_catalog(1200)
+
+@pytest.fixture
+def artifacts(catalog):
+    return rm.build_internship_index(catalog)
@@ -0,0 +1,80 @@
+"""
+artifact_store.py: mmap artifacts load like the joblib file of the same catalog (dtypes, non-string
+ids and missing values included) and give the same recommendations; saving over a served directory
+swaps the version in without a window where it is missing.
+"""
+
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+import recommendation_model as rm
+import artifact_store
+from conftest import PROFILES, synthetic_catalog
+
+@pytest.fixture
+def mixed_artifacts():
+    catalog = synthetic_catalog(300, seed=8)
+    catalog["internship_id"] = np.arange(1000, 1300)  # integer ids
+    catalog["stipend"] = [np.nan if i % 7 == 0 else 1000.0 * (i % 5) for i in range(300)]
+    catalog["openings"] = [i % 4 for i in range(300)]
+    catalog["remote"] = [i % 2 == 0 for i in range(300)]
+    catalog["location"] = pd.Series([None if i % 11 == 0 else np.nan if i % 13 == 0 else loc
+                                     for i, loc in enumerate(catalog["location"])], dtype=object)
+    catalog["tags"] = [["python", i] if i % 5 == 0 else "plain" for i in range(300)]
+    return rm.build_internship_index(catalog)
+
+def test_mmap_loads_like_joblib(mixed_artifacts, tmp_path):
+    rm.save_model_artifacts(mixed_artifacts, str(tmp_path / "model.joblib"))
+    rm.save_model_artifacts(mixed_artifacts, str(tmp_path / "model.mmap"), artifact_format="mmap")
+    pickled = rm.load_model_artifacts(str(tmp_path / "model.joblib"))
+    mapped = rm.load_model_artifacts(str(tmp_path / "model.mmap"))
+
+    assert list(mapped["internship_ids"]) == list(pickled["internship_ids"])
+    assert all(type(a) is type(b) for a, b in zip(mapped["internship_ids"], pickled["internship_ids"]))
+    assert list(mapped["internship_titles"]) == list(pickled["internship_titles"])
+    pd.testing.assert_frame_equal(mapped["internships_df"], pickled["internships_df"])
+    location = mapped["internships_df"]["location"].tolist()
+    assert location[0] is None and np.isnan(location[13])
+    assert [type(v) for v in location] == [type(v) for v in pickled["internships_df"]["location"]]
+
+    for profile in PROFILES:
+        assert (rm.recommend_with_artifacts(profile, mapped, engine="exact")
+                == rm.recommend_with_artifacts(profile, pickled, engine="exact"))
+    for filters in ({"location": "Pune"}, {"sector": ["IT"]}):
+        assert (rm.recommend_with_artifacts(PROFILES[0], mapped, engine="exact", filters=filters)
+                == rm.recommend_with_artifacts(PROFILES[0], pickled, engine="exact", filters=filters))
+
+    # mapped artifacts pickle as plain ones
+    joblib.dump(mapped, tmp_path / "again.joblib")
+    pd.testing.assert_frame_equal(joblib.load(tmp_path / "again.joblib")["internships_df"], pickled["internships_df"])
+
+def test_dataframe_is_built_on_first_read(artifacts, tmp_path):
+    path = str(tmp_path / "model.mmap")
+    artifact_store.save_mmap_artifacts(artifacts, path)
+    mapped = artifact_store.load_mmap_artifacts(path)
+    assert not dict.__contains__(mapped, "internships_df")
+    assert isinstance(mapped["internship_ids"], artifact_store.MappedColumn)
+    assert rm.recommend_with_artifacts(PROFILES[0], mapped, engine="exact")["status"] in ("success", "upskill")
+    assert not dict.__contains__(mapped, "internships_df")  # serving reads the mapped ids / titles only
+    assert len(mapped["internships_df"]) == len(artifacts["internship_ids"])
+
+def test_save_over_a_served_directory(artifacts, tmp_path):
+    path = str(tmp_path / "model.mmap")
+    artifact_store.save_mmap_artifacts(artifacts, path)
+    served = rm.load_model_artifacts(path)
+    smaller = rm.build_internship_index(synthetic_catalog(100, seed=2))
+    for _ in range(2):
+        data = artifact_store.save_mmap_artifacts(smaller, path)
+        # the manifest always names a complete data directory
+        assert artifact_store.data_directory(path) == data
+        assert len(artifact_store.load_mmap_artifacts(path)["internship_ids"]) == 100
+    # the current and the previous data directory are kept, older ones are removed
+    names = os.listdir(path)
+    assert len(names) == 3 and "manifest.json" in names and os.path.basename(data) in names
+    # the version loaded first still serves from its own mapped arrays
+    assert rm.recommend_with_artifacts(PROFILES[0], served, engine="exact")["status"] in ("success", "upskill")
+    assert rm.load_model_artifacts(path)["version"] != served["version"]
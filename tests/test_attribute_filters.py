@@ -0,0 +1,117 @@
+"""
+attribute_filters.py: filter_mask equals a brute-force filter over internships_df (comma-separated
+cells, case-insensitive values, OR within an attribute, AND across attributes, tombstones) on flat
+artifacts and on incremental snapshots, including attributes only one segment has a column for.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+import recommendation_model as rm
+import incremental_index as ii
+import attribute_filters as af
+from conftest import synthetic_catalog
+
+VALUES = {"location": ["Delhi", "pune", "MUMBAI", " Remote ", "Chennai"],
+          "sector": ["IT", "finance", "Health"],
+          "education_level": ["UG", "pg", "Diploma"]}
+
+def brute_force_mask(artifacts, filters):
+    """
+    Row by row over the catalog; a column the catalog lacks (or an empty cell) matches nothing.
+    """
+    df = artifacts["internships_df"]
+    mask = np.ones(len(df), dtype=bool)
+    for attribute, wanted in (filters or {}).items():
+        wanted = wanted.split(",") if isinstance(wanted, str) else wanted
+        wanted = {str(v).strip().lower() for v in wanted} - {""}
+        if not wanted:
+            continue
+        cells = df[attribute].tolist() if attribute in df.columns else [None] * len(df)
+        for row, cell in enumerate(cells):
+            if cell is None or (isinstance(cell, float) and np.isnan(cell)):
+                mask[row] = False
+                continue
+            values = {v.strip().lower() for v in str(cell).split(",")}
+            mask[row] &= bool(values & wanted)
+    active = artifacts.get("active")
+    return mask if active is None else mask & np.asarray(active, dtype=bool)
+
+def random_filters(rng, attributes):
+    filters = {}
+    for attribute in rng.sample(attributes, rng.randint(1, len(attributes))):
+        values = rng.sample(VALUES[attribute], rng.randint(1, 3))
+        choice = rng.random()
+        filters[attribute] = values[0] if choice < 0.3 else ",".join(values) if choice < 0.6 else values
+    return filters
+
+def assert_masks_match(artifacts, attributes, n=60, seed=0):
+    rng = random.Random(seed)
+    for _ in range(n):
+        filters = random_filters(rng, attributes)
+        np.testing.assert_array_equal(af.filter_mask(artifacts, filters), brute_force_mask(artifacts, filters),
+                                      err_msg=str(filters))
+
+@pytest.fixture
+def catalog():
+    catalog = synthetic_catalog(400, seed=9)
+    rng = random.Random(3)
+    catalog["location"] = [",".join(rng.sample(VALUES["location"], rng.randint(1, 2))) if i % 9 else ""
+                           for i in range(400)]
+    catalog["sector"] = [v.upper() if i % 4 == 0 else v for i, v in enumerate(catalog["sector"])]
+    return catalog
+
+def test_flat_masks_match_brute_force(catalog):
+    artifacts = rm.build_internship_index(catalog)
+    assert_masks_match(artifacts, ["location", "sector"])
+    assert af.filter_mask(artifacts, None) is None
+    assert af.filter_mask(artifacts, {"location": " , "}) is None  # nothing left after normalizing
+    with pytest.raises(ValueError, match="education_level"):
+        af.filter_mask(artifacts, {"education_level": "UG"})
+
+    # tombstones of a flat (compacted or copy-on-write) snapshot
+    tombstoned = dict(artifacts, active=np.arange(len(catalog)) % 5 != 0)
+    assert_masks_match(tombstoned, ["location", "sector"], seed=1)
+
+def test_incremental_masks_match_brute_force(catalog):
+    index = ii.IncrementalIndex(rm.build_internship_index(catalog), compact_ratio=1.0)
+    added = synthetic_catalog(40, seed=12, id_prefix="new-")
+    added["location"] = [("Remote", "delhi,Chennai", "")[i % 3] for i in range(40)]
+    # a column the base catalog does not have: indexed in the delta segment only
+    added["education_level"] = [("UG", "PG,diploma", "")[i % 3] for i in range(40)]
+    index.add_internships(added)
+    for internship_id in ("new-3", "new-4", str(catalog["internship_id"].iloc[10])):
+        index.remove_internship(internship_id)
+    index.update_internship(str(catalog["internship_id"].iloc[20]), {"sector": "Health"})
+    snapshot = index.artifacts
+    assert "segments" in snapshot
+    assert "education_level" not in af.get_filter_index(snapshot)["attributes"]
+
+    assert_masks_match(snapshot, ["location", "sector", "education_level"], n=80, seed=2)
+    # not strict per segment: base rows simply match nothing
+    mask = af.filter_mask(snapshot, {"education_level": "ug"})
+    n_base = len(catalog)
+    assert not mask[:n_base].any() and mask[n_base:].any()
+    # an attribute no segment indexes is still an error
+    with pytest.raises(ValueError, match="stipend"):
+        af.filter_mask(snapshot, {"stipend": "1000"})
+
+    # compacted: one base segment whose bitmaps now include the delta's column
+    index.compact()
+    assert index.stats()["delta_rows"] == 0
+    assert "education_level" in af.get_filter_index(index.artifacts)["attributes"]
+    assert_masks_match(index.artifacts, ["location", "sector", "education_level"], n=40, seed=3)
+
+def test_cached_masks_follow_tombstones(catalog):
+    index = ii.IncrementalIndex(rm.build_internship_index(catalog), compact_ratio=1.0)
+    index.add_internships(synthetic_catalog(5, seed=13, id_prefix="new-"))
+    filters = {"sector": "it"}
+    before = af.filter_mask(index.artifacts, filters)
+    assert af.filter_mask(index.artifacts, filters) is before  # cached per snapshot
+    index.remove_internship("new-0")
+    after = af.filter_mask(index.artifacts, filters)
+    np.testing.assert_array_equal(after, brute_force_mask(index.artifacts, filters))
+    assert not after[len(catalog)] and before[len(catalog)]
+    assert not after.flags.writeable
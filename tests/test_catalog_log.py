@@ -0,0 +1,65 @@
+"""
+catalog_log.py: replay is an upsert, and catalog updates made through the API survive a reload /
+rollback of the served version and reach a worker that did not take the request.
+"""
+
+import pytest
+
+import recommendation_model as rm
+import incremental_index as ii
+from catalog_log import CatalogLog, apply_ops
+from conftest import synthetic_catalog
+
+def test_replay_is_an_upsert(artifacts, tmp_path):
+    log = CatalogLog(str(tmp_path / "catalog.sqlite"))
+    existing = str(artifacts["internship_ids"][0])
+    log.append([("add", "new-1", {"title": "python intern"}), ("add", "new-2", {"title": "sql intern"}),
+                ("update", "new-1", {"description": "machine learning"}), ("remove", "new-2", None),
+                ("add", existing, {"title": "data science intern"}), ("remove", "missing", None),
+                ("update", "missing", {"title": "x"})])
+    entries = log.read()
+    assert [seq for seq, *_ in entries] == sorted(seq for seq, *_ in entries)
+    assert log.read(after=entries[2][0]) == entries[3:]
+
+    index = ii.IncrementalIndex(artifacts)
+    for _ in range(2):  # replaying twice ends in the same catalog
+        apply_ops(index, [entry[1:] for entry in entries])
+        live = index.artifacts["id_to_row"]
+        assert "new-1" in live and "new-2" not in live and "missing" not in live
+        assert len(live) == len(artifacts["internship_ids"]) + 1
+        new_1 = index.artifacts["internships_df"].iloc[live["new-1"]]
+        assert (new_1["title"], new_1["description"]) == ("python intern", "machine learning")
+        assert index.artifacts["internships_df"].iloc[live[existing]]["title"] == "data science intern"
+
+@pytest.fixture
+def client(monkeypatch, artifacts, tmp_path):
+    from fastapi.testclient import TestClient
+    monkeypatch.setattr(rm, "ADMIN_TOKEN", "s3cret")
+    monkeypatch.setattr(rm, "TOPK_STORE", False)
+    monkeypatch.setattr(rm, "CATALOG_LOG_PATH", str(tmp_path / "catalog.sqlite"))
+    monkeypatch.setattr(rm, "CATALOG_LOG", None)
+    monkeypatch.setattr(rm, "INCREMENTAL_INDEX", None)
+    monkeypatch.setattr(rm, "MODEL_ARTIFACTS", None)
+    rm._serve_artifacts(artifacts)
+    yield TestClient(rm.app, headers={"X-Admin-Token": "s3cret"})
+    rm.CATALOG_LOG.close()
+
+def test_updates_survive_reload_and_reach_other_workers(client, artifacts):
+    rows = synthetic_catalog(3, seed=21, id_prefix="api-")[["internship_id", "title", "description", "required_skills"]]
+    assert client.post("/internships", json=rows.to_dict("records")).status_code == 200
+    assert client.post("/internships", json=rows.iloc[:1].to_dict("records")).status_code == 409
+    assert client.delete("/internships/api-1").status_code == 200
+    assert client.put("/internships/api-2", json={"title": "python intern"}).status_code == 200
+    assert client.delete("/internships/api-1").status_code == 404
+
+    # a reload / rollback serves the plain artifacts again: the log is replayed onto them
+    rm._serve_artifacts(artifacts)
+    live = rm.MODEL_ARTIFACTS["id_to_row"]
+    assert "api-0" in live and "api-2" in live and "api-1" not in live
+    assert rm.MODEL_ARTIFACTS["internships_df"].iloc[live["api-2"]]["title"] == "python intern"
+
+    # another worker appends to the same log; this one replays it on its next sync
+    CatalogLog(rm.CATALOG_LOG_PATH).append([("remove", "api-0", None)])
+    rm._sync_catalog(force=True)
+    assert "api-0" not in rm.MODEL_ARTIFACTS["id_to_row"]
+    assert len(rm.MODEL_ARTIFACTS["id_to_row"]) == len(artifacts["internship_ids"]) + 1
@@ -0,0 +1,44 @@
+"""
+course_matcher.py: the compiled catalog suggests exactly what the original keyword loop
+(benchmark_recommendations.legacy_courses) did, substring matches and the fallback included.
+"""
+
+import os
+
+import pytest
+
+import recommendation_model as rm
+import benchmark_recommendations as bench
+import course_matcher
+from course_matcher import CourseCatalog, FALLBACK_COURSES
+from conftest import ROOT, PROFILES
+
+EDGE_CASES = ["", "nothing relevant", "html5 and css3", "cybersecurity analyst", "mldata pipelines",
+              "deep learning for nlp", "data data data", "iot cloud blockchain excel web javascript python"]
+
+@pytest.fixture(scope="module")
+def profiles():
+    students = bench.synthetic_students(300, seed=3, students_path=os.path.join(ROOT, "students.csv"))
+    texts = PROFILES + [s + " " + i for s, i in zip(students["skills"], students["interests"])]
+    return [rm.preprocess_text(t) for t in texts] + EDGE_CASES
+
+@pytest.mark.parametrize("top_k", [1, 3, 10])
+def test_default_catalog_matches_keyword_loop(profiles, top_k):
+    catalog = CourseCatalog.from_mapping(rm.COURSE_MAPPING)
+    for text in profiles:
+        assert catalog.recommend(text, top_k) == bench.legacy_courses(text, rm.COURSE_MAPPING,
+                                                                      FALLBACK_COURSES, top_k), text
+
+def test_large_catalog_matches_keyword_loop(profiles):
+    mapping = bench.synthetic_course_mapping(500, seed=4)
+    catalog = CourseCatalog.from_mapping(mapping)
+    for text in profiles + ["".join(list(mapping)[-40:])]:  # many made-up keywords, back to back
+        assert catalog.recommend(text, 5) == bench.legacy_courses(text, mapping, FALLBACK_COURSES, 5), text
+
+def test_recommend_courses_from_skills(profiles, monkeypatch):
+    monkeypatch.setattr(course_matcher, "COURSE_CATALOG_PATH", None)
+    course_matcher.set_course_catalog(None)
+    for text in PROFILES:
+        assert rm.recommend_courses_from_skills(text) == bench.legacy_courses(
+            rm.preprocess_text(text), rm.COURSE_MAPPING, FALLBACK_COURSES)
+    course_matcher.set_course_catalog(None)
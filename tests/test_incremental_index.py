@@ -0,0 +1,264 @@
+"""
+incremental_index.py: copy-on-write snapshots, per-segment tombstones, delta merge / compaction,
+and segment-aware engines ranking exactly like the exact engine over the combined matrix.
+"""
+
+import random
+import threading
+
+import joblib
+import numpy as np
+import pytest
+
+import recommendation_model as rm
+import incremental_index as ii
+import attribute_filters as af
+import inverted_index
+from conftest import PROFILES, synthetic_catalog, exact_ranking, assert_same_ranking
+
+FILTERS = [None, {"location": "Pune"}, {"location": ["Delhi", "Mumbai"], "sector": "IT"}]
+
+def assert_matches_exact(artifacts, engines=("exact", "inverted")):
+    query = artifacts["vectorizer"].transform([rm.preprocess_text(p) for p in PROFILES])
+    for filters in FILTERS:
+        mask = rm.eligible_mask(artifacts, filters)
+        expected = exact_ranking(artifacts, query, 7, mask)
+        for name in engines:
+            assert_same_ranking(rm.get_engine(name)(query, artifacts, 7, mask), expected)
+
+def expected_mask(artifacts, filters):
+    df = artifacts["internships_df"]
+    mask = np.ones(len(df), dtype=bool)
+    for attribute, values in (filters or {}).items():
+        mask &= df[attribute].isin([values] if isinstance(values, str) else values).to_numpy()
+    active = artifacts.get("active")
+    return mask if active is None else mask & active
+
+@pytest.fixture
+def index(artifacts):
+    return ii.IncrementalIndex(artifacts)
+
+@pytest.fixture
+def new_rows():
+    rows = synthetic_catalog(300, seed=11, id_prefix="new-")
+    rows["location"] = "Pune"
+    return rows
+
+# ---------------------------
+# Copy-on-write snapshots
+# ---------------------------
+def test_add_goes_to_delta_and_shares_base(index, new_rows):
+    before = index.artifacts
+    base = rm.base_artifacts(before)
+    index.add_internships(new_rows.iloc[:5])
+    after = index.artifacts
+    assert after is not before
+    assert rm.base_artifacts(after) is base
+    assert index.stats()["delta_rows"] == 5
+    assert rm.catalog_rows(after) == rm.catalog_rows(before) + 5
+    assert after["id_to_row"]["new-0"] == rm.catalog_rows(before)
+    # the previous snapshot is untouched
+    assert "new-0" not in before["id_to_row"]
+    assert before["internship_vectors"].shape[0] == rm.catalog_rows(before)
+
+def test_remove_copies_only_the_touched_bitmap(index, new_rows):
+    index.add_internships(new_rows.iloc[:3])
+    before = index.artifacts
+    segments = before["segments"]
+    index.remove_internship("new-1")
+    after = index.artifacts["segments"]
+    assert after["base_active"] is segments["base_active"]
+    assert after["delta"]["active"] is not segments["delta"]["active"]
+    assert segments["delta"]["active"].all()
+    base_id = str(before["internship_ids"][0])
+    index.remove_internship(base_id)
+    latest = index.artifacts["segments"]
+    assert latest["delta"] is after["delta"]
+    assert not latest["base_active"][0] and after["base_active"] is None
+    assert "new-1" not in index.artifacts["id_to_row"] and base_id not in index.artifacts["id_to_row"]
+    assert index.stats()["tombstones"] == 2
+    assert before["active"] is None
+
+def test_updates_keep_base_indexes(index, new_rows):
+    query = index.artifacts["vectorizer"].transform(["python machine learning"])
+    rm.get_engine("inverted")(query, index.artifacts, 5)
+    inverted = inverted_index.get_inverted_index(rm.base_artifacts(index.artifacts))
+    index.add_internships(new_rows.iloc[:4])
+    index.update_internship(str(index.artifacts["internship_ids"][3]), {"title": "Python data intern"})
+    index.remove_internship("new-2")
+    rm.get_engine("inverted")(query, index.artifacts, 5, index.artifacts.get("active"))
+    assert inverted_index.get_inverted_index(rm.base_artifacts(index.artifacts)) is inverted
+    # nothing on the query path built the combined matrix
+    assert not dict.__contains__(index.artifacts, "internship_vectors")
+
+def test_update_retires_old_row_and_appends(index):
+    internship_id = str(index.artifacts["internship_ids"][10])
+    assert index.update_internship(internship_id, {"title": "Quantum computing intern", "location": "Goa"})
+    artifacts = index.artifacts
+    row = artifacts["id_to_row"][internship_id]
+    assert row == rm.catalog_rows(artifacts) - 1
+    assert not artifacts["active"][10]
+    assert artifacts["internship_titles"][row] == "Quantum computing intern"
+    assert index.update_internship(internship_id, {"title": "Quantum intern"})
+    assert index.artifacts["id_to_row"][internship_id] == rm.catalog_rows(index.artifacts) - 1
+    assert not index.update_internship("missing", {"title": "x"})
+    np.testing.assert_array_equal(af.filter_mask(index.artifacts, {"location": "Goa"}),
+                                  expected_mask(index.artifacts, {"location": "Goa"}))
+
+def test_duplicate_ids_are_rejected(index, new_rows):
+    index.add_internships(new_rows.iloc[:2])
+    with pytest.raises(ValueError):
+        index.add_internships(new_rows.iloc[1:3])
+    index.remove_internship("new-1")
+    index.add_internships(new_rows.iloc[1:2])  # a retired id can be added again
+    assert index.artifacts["id_to_row"]["new-1"] == rm.catalog_rows(index.artifacts) - 1
+
+# ---------------------------
+# Compaction and delta merge
+# ---------------------------
+def test_compact_drops_tombstones(index, new_rows):
+    index.add_internships(new_rows.iloc[:10])
+    for internship_id in ["new-3", str(index.artifacts["internship_ids"][0])]:
+        index.remove_internship(internship_id)
+    live_ids = [i for i in index.artifacts["internship_ids"] if i in index.artifacts["id_to_row"]]
+    changes = []
+    index.add_listener(lambda artifacts, c: changes.extend(c))
+    index.compact()
+    artifacts = index.artifacts
+    assert list(artifacts["internship_ids"]) == live_ids
+    assert index.stats()["tombstones"] == 0 and index.stats()["delta_rows"] == 0
+    assert changes[0][0] == "compact" and len(changes[0][1]) == len(live_ids)
+    assert_matches_exact(artifacts)
+
+def test_tombstone_threshold_compacts(artifacts):
+    index = ii.IncrementalIndex(artifacts, compact_ratio=0.02)
+    ids = [str(i) for i in artifacts["internship_ids"][:ii.COMPACT_MIN_TOMBSTONES]]
+    for internship_id in ids:
+        index.remove_internship(internship_id)
+    index.join()  # the merge runs in the background
+    assert index.stats()["tombstones"] == 0
+    assert rm.catalog_rows(index.artifacts) == len(artifacts["internship_ids"]) - len(ids)
+    assert_matches_exact(index.artifacts)
+
+def test_delta_merges_into_base(index, new_rows, monkeypatch):
+    monkeypatch.setattr(ii, "DELTA_MIN_ROWS", 20)
+    base = rm.base_artifacts(index.artifacts)
+    rows_before = rm.catalog_rows(index.artifacts)
+    changes = []
+    index.add_listener(lambda artifacts, c: changes.extend(c))
+    index.add_internships(new_rows.iloc[:60])  # 60 >= max(20, 5% of 1200)
+    index.join()
+    assert rm.base_artifacts(index.artifacts) is not base
+    assert index.stats()["delta_rows"] == 0
+    # no tombstones: rows keep their positions, so there is no "compact" change
+    assert changes == [("add", rows_before, rows_before + 60)]
+    assert_matches_exact(index.artifacts)
+
+def test_updates_during_a_merge_are_replayed(index, new_rows, monkeypatch):
+    monkeypatch.setattr(ii, "DELTA_MIN_ROWS", 20)
+    started, release = threading.Event(), threading.Event()
+    compact = ii._compact
+
+    def slow_compact(artifacts):
+        started.set()
+        release.wait(10)
+        return compact(artifacts)
+
+    monkeypatch.setattr(ii, "_compact", slow_compact)
+    index.remove_internship(str(index.artifacts["internship_ids"][0]))
+    index.add_internships(new_rows.iloc[:60])
+    assert started.wait(10) and index.stats()["merging"]
+    # writes are not blocked by the merge, and land in the merged snapshot
+    index.add_internships(new_rows.iloc[60:65])
+    index.remove_internship("new-1")
+    index.update_internship("new-61", {"title": "python data science intern"})
+    changes = []
+    index.add_listener(lambda artifacts, c: changes.extend(c))
+    release.set()
+    index.join()
+    artifacts = index.artifacts
+    assert changes[0][0] == "compact" and index.stats()["tombstones"] <= 2
+    assert "new-1" not in artifacts["id_to_row"] and "new-64" in artifacts["id_to_row"]
+    assert len(artifacts["id_to_row"]) == len(artifacts["internship_ids"]) - index.stats()["tombstones"]
+    assert_matches_exact(artifacts)
+
+# ---------------------------
+# Engines and filters against the exact engine
+# ---------------------------
+def test_random_operations_match_exact(index, new_rows, monkeypatch):
+    monkeypatch.setattr(ii, "DELTA_MIN_ROWS", 40)
+    rng = random.Random(7)
+    ids = [str(i) for i in index.artifacts["internship_ids"]]
+    added = 0
+    for step in range(150):
+        op = rng.random()
+        if op < 0.4 and added < len(new_rows):
+            index.add_internships(new_rows.iloc[added:added + 3])
+            ids += list(new_rows["internship_id"].iloc[added:added + 3])
+            added += 3
+        elif op < 0.75:
+            assert index.remove_internship(ids.pop(rng.randrange(len(ids))))
+        else:
+            index.update_internship(ids[rng.randrange(len(ids))],
+                                    {"title": "python data science intern", "location": "Delhi"})
+        if step % 15 == 0:
+            assert_matches_exact(index.artifacts)
+            for filters in FILTERS[1:]:
+                np.testing.assert_array_equal(af.filter_mask(index.artifacts, filters),
+                                              expected_mask(index.artifacts, filters))
+    artifacts = index.artifacts
+    assert len(artifacts["id_to_row"]) == len(ids)
+    assert all(str(artifacts["internship_ids"][artifacts["id_to_row"][i]]) == i for i in ids)
+    assert_matches_exact(artifacts)
+
+def test_lsa_respects_tombstones_and_filters(index, new_rows):
+    rm.prepare_engine(index.artifacts, "lsa", wait=True)
+    index.add_internships(new_rows.iloc[:20])
+    for internship_id in ["new-0", str(index.artifacts["internship_ids"][5])]:
+        index.remove_internship(internship_id)
+    artifacts = index.artifacts
+    query = artifacts["vectorizer"].transform([rm.preprocess_text(p) for p in PROFILES])
+    for filters in FILTERS:
+        mask = rm.eligible_mask(artifacts, filters)
+        for rows, _ in rm.get_engine("lsa")(query, artifacts, 10, mask):
+            assert mask is None or mask[rows].all()
+
+def test_recommend_with_snapshot(index, new_rows):
+    rows = new_rows.iloc[:1].copy()
+    rows["title"] = "Python Machine Learning Data Analysis Intern"
+    rows["description"] = "python machine learning data analysis"
+    rows["required_skills"] = "Python, Machine Learning, Data Analysis"
+    index.add_internships(rows)
+    result = rm.recommend_with_artifacts(PROFILES[0], index.artifacts, filters={"location": "Pune"})
+    assert result["recommendations"][0]["internship_id"] == "new-0"
+
+def test_refresh_vocabulary_replaces_snapshot(index, new_rows):
+    index.add_internships(new_rows.iloc[:5])
+    index.remove_internship("new-4")
+    vectorizer = index.artifacts["vectorizer"]
+    index.refresh_vocabulary(background=False)
+    artifacts = index.artifacts
+    assert artifacts["vectorizer"] is not vectorizer
+    assert index.stats()["tombstones"] == 0 and "new-4" not in artifacts["id_to_row"]
+    assert_matches_exact(artifacts)
+
+# ---------------------------
+# Saving a snapshot
+# ---------------------------
+def test_snapshot_saves_as_plain_artifacts(index, new_rows, tmp_path):
+    index.add_internships(new_rows.iloc[:8])
+    index.remove_internship("new-2")
+    snapshot = index.artifacts
+    path = tmp_path / "model.joblib"
+    joblib.dump(snapshot, path)
+    loaded = joblib.load(path)
+    assert type(loaded) is dict and "segments" not in loaded
+    assert list(loaded["internship_ids"]) == list(snapshot["internship_ids"])
+    np.testing.assert_array_equal(loaded["active"], snapshot["active"])
+    assert_matches_exact(loaded, engines=("exact",))
+
+    import artifact_store
+    artifact_store.save_mmap_artifacts(snapshot, str(tmp_path / "model.mmap"))
+    mapped = artifact_store.load_mmap_artifacts(str(tmp_path / "model.mmap"))
+    assert mapped["internship_vectors"].shape == snapshot["internship_vectors"].shape
+    assert_matches_exact(mapped, engines=("exact",))
@@ -0,0 +1,43 @@
+"""
+recommendation_model.InternshipIndexCache: a build runs outside the cache lock (hits on other
+catalogs are not blocked by it) and concurrent callers for the same catalog share one build.
+"""
+
+import threading
+
+import recommendation_model as rm
+from conftest import synthetic_catalog
+
+def test_builds_do_not_block_other_sources(monkeypatch, tmp_path):
+    cache = rm.InternshipIndexCache()
+    ready = synthetic_catalog(50, seed=1)
+    cache.get_for_dataframe(ready)
+    slow_path = tmp_path / "internships.csv"
+    synthetic_catalog(60, seed=2).to_csv(slow_path, index=False)
+
+    build = rm.build_internship_index
+    started, release = threading.Event(), threading.Event()
+    builds = []
+
+    def slow_build(internships_df):
+        builds.append(len(internships_df))
+        started.set()
+        release.wait(10)
+        return build(internships_df)
+
+    monkeypatch.setattr(rm, "build_internship_index", slow_build)
+    results = []
+    callers = [threading.Thread(target=lambda: results.append(cache.get_for_path(str(slow_path))))
+               for _ in range(3)]
+    for caller in callers:
+        caller.start()
+    assert started.wait(10)
+    # the fit in flight does not hold the lock: another catalog is still a hit
+    assert cache.get_for_dataframe(ready) is cache.get_for_dataframe(ready)
+    release.set()
+    for caller in callers:
+        caller.join(10)
+    assert builds == [60]  # one build for the three concurrent callers
+    assert len(results) == 3 and results[0] is results[1] is results[2]
+    stats = cache.stats()
+    assert stats["misses"] == 2 and stats["hits"] == 4 and stats["entries"] == 2
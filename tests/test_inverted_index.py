@@ -0,0 +1,59 @@
+"""
+inverted_index.py: the MaxScore engine ranks exactly like the exact engine (rows, scores and
+tie-breaking) for real profiles and random queries, with and without masks, for small and large k,
+including queries without known terms and masks leaving fewer than k eligible rows.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+import pytest
+
+import recommendation_model as rm
+import inverted_index
+from conftest import PROFILES, exact_ranking, assert_same_ranking
+
+def random_queries(n_terms, n, seed):
+    """
+    Sparse queries with 0 to 30 terms: rare and common terms, duplicate weights (ties), empty rows.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n):
+        nnz = 0 if i % 7 == 0 else int(rng.integers(1, 31))
+        row = np.zeros(n_terms)
+        terms = rng.choice(n_terms, size=nnz, replace=False)
+        row[terms] = 1.0 if i % 3 == 0 else rng.random(nnz)
+        rows.append(row)
+    return sp.csr_matrix(np.vstack(rows))
+
+def masks(n_rows):
+    rng = np.random.default_rng(4)
+    few = np.zeros(n_rows, dtype=bool)
+    few[[3, 500, n_rows - 1]] = True
+    return [None, rng.random(n_rows) < 0.5, rng.random(n_rows) < 0.05, few,
+            np.zeros(n_rows, dtype=bool)]
+
+@pytest.mark.parametrize("k", [1, 5, 40])
+def test_matches_exact_ranking(artifacts, k):
+    vectors = artifacts["internship_vectors"]
+    profiles = artifacts["vectorizer"].transform([rm.preprocess_text(p) for p in PROFILES])
+    queries = sp.vstack([profiles, random_queries(vectors.shape[1], 40, seed=k)], format="csr")
+    for mask in masks(vectors.shape[0]):
+        got = inverted_index.inverted_engine(queries, artifacts, k, mask)
+        assert_same_ranking(got, exact_ranking(artifacts, queries, k, mask))
+        for rows, _ in got:
+            assert rows.size == min(k, vectors.shape[0] if mask is None else int(mask.sum()))
+
+def test_k_larger_than_the_catalog(artifacts):
+    n_rows = artifacts["internship_vectors"].shape[0]
+    queries = random_queries(artifacts["internship_vectors"].shape[1], 6, seed=9)
+    for mask in (None, masks(n_rows)[2]):
+        assert_same_ranking(inverted_index.inverted_engine(queries, artifacts, n_rows + 10, mask),
+                            exact_ranking(artifacts, queries, n_rows + 10, mask))
+
+def test_registered_engine_and_memoized_index(artifacts):
+    query = artifacts["vectorizer"].transform([rm.preprocess_text(PROFILES[0])])
+    assert_same_ranking(rm.get_engine("inverted")(query, artifacts, 10), exact_ranking(artifacts, query, 10))
+    index = inverted_index.get_inverted_index(artifacts)
+    assert inverted_index.get_inverted_index(artifacts) is index
+    assert index.n_rows == artifacts["internship_vectors"].shape[0]
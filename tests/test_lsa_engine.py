@@ -0,0 +1,34 @@
+"""
+lsa_engine.py: queries without known terms get the exact engine's zero-score rows, short result
+lists are filled the same way, and degenerate catalogs (one term) still build and search.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+
+import recommendation_model as rm
+import lsa_engine
+from conftest import PROFILES, exact_ranking, assert_same_ranking
+
+def test_queries_without_known_terms_match_exact(artifacts):
+    lsa_engine.attach_lsa_index(artifacts, n_components=16)
+    empty = sp.csr_matrix((2, artifacts["internship_vectors"].shape[1]))
+    assert_same_ranking(lsa_engine.lsa_search(empty, artifacts, 5), exact_ranking(artifacts, empty, 5))
+    mask = np.zeros(artifacts["internship_vectors"].shape[0], dtype=bool)
+    mask[7::50] = True
+    assert_same_ranking(lsa_engine.lsa_search(empty, artifacts, 5, mask), exact_ranking(artifacts, empty, 5, mask))
+
+    query = artifacts["vectorizer"].transform([rm.preprocess_text(p) for p in PROFILES])
+    for (rows, scores), (expected_rows, _) in zip(lsa_engine.lsa_search(query, artifacts, 8, mask),
+                                                  exact_ranking(artifacts, query, 8, mask)):
+        # a filter leaving fewer matches than k: topped up with zero-score rows like the exact engine
+        assert rows.size == expected_rows.size == 8 and mask[rows].all()
+        assert np.all(np.diff(scores) <= 0)
+
+def test_single_term_catalog(artifacts):
+    vectors = sp.csr_matrix(np.array([[0.5], [0.0], [1.0], [0.2]]))
+    lsa = lsa_engine.build_lsa_index(vectors, n_components=8)
+    assert lsa["components"].shape == (1, 1)
+    flat = {"vectorizer": artifacts["vectorizer"], "internship_vectors": vectors, "lsa": lsa}
+    query = sp.csr_matrix(np.array([[1.0]]))
+    assert_same_ranking(lsa_engine.lsa_search(query, flat, 3), exact_ranking(flat, query, 3))
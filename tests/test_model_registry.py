@@ -0,0 +1,107 @@
+"""
+model_registry.py: validated hot reloads, rollback to kept versions, bad versions leaving the served
+one in place, and the admin token on /admin/* and the catalog write endpoints.
+"""
+
+import os
+
+import pytest
+
+import recommendation_model as rm
+import model_registry as mr
+from conftest import synthetic_catalog
+
+def save_version(artifacts, path, mtime):
+    rm.save_model_artifacts(artifacts, path)
+    os.utime(path, ns=(mtime, mtime))  # a distinct (mtime, size) stamp, hence a new version
+
+@pytest.fixture
+def registry(tmp_path):
+    served = []
+    registry = mr.ModelRegistry(str(tmp_path / "model.joblib"), on_swap=served.append, keep=2)
+    registry.served = served
+    return registry
+
+def test_reload_and_rollback(registry, artifacts):
+    save_version(artifacts, registry.path, 1_000_000_000)
+    registry.reload(background=False)
+    first = registry.active_version
+    save_version(rm.build_internship_index(synthetic_catalog(300, seed=9)), registry.path, 2_000_000_000)
+    registry.reload(background=False)
+    second = registry.active_version
+    assert first != second
+    assert registry.served[-1] is registry.artifacts(second)
+    assert len(registry.artifacts(second)["internship_ids"]) == 300
+
+    assert registry.rollback() == first
+    assert registry.active_version == first
+    assert registry.served[-1] is registry.artifacts(first)
+    with pytest.raises(KeyError):
+        registry.rollback()  # nothing older than the first version
+    assert registry.rollback(second) == second
+
+    save_version(artifacts, registry.path, 3_000_000_000)
+    registry.reload(background=False)
+    # keep=2: the oldest version is dropped
+    assert [v["version"] for v in registry.status()["versions"]] == [second, registry.active_version]
+    with pytest.raises(KeyError):
+        registry.rollback(first)
+
+def test_invalid_version_keeps_the_served_one(registry, artifacts):
+    save_version(artifacts, registry.path, 1_000_000_000)
+    registry.reload(background=False)
+    served = registry.active_version
+    broken = dict(artifacts)
+    broken["internship_vectors"] = artifacts["internship_vectors"][:10]
+    save_version(broken, registry.path, 2_000_000_000)
+    with pytest.raises(mr.ModelValidationError):
+        registry.reload(background=False)
+    assert registry.active_version == served
+    assert registry.failures == 1 and "ModelValidationError" in registry.last_error
+    assert len(registry.served) == 1
+    # the broken file is not retried until it changes again
+    assert not registry.check_for_update()
+
+def test_validation_is_not_recorded_in_metrics(artifacts, monkeypatch):
+    recorded = []
+    monkeypatch.setattr(rm, "_record", lambda *args: recorded.append(args))
+    mr.validate_artifacts(artifacts)
+    assert recorded == []
+    rm.recommend_with_artifacts("python", artifacts)
+    assert recorded
+
+def test_validation_rejects_mismatched_vocabulary(artifacts):
+    other = rm.build_internship_index(synthetic_catalog(50, seed=2))
+    broken = dict(artifacts, vectorizer=other["vectorizer"])
+    with pytest.raises(mr.ModelValidationError):
+        mr.validate_artifacts(broken)
+
+# ---------------------------
+# Admin token
+# ---------------------------
+@pytest.fixture
+def client(monkeypatch, registry, artifacts):
+    from fastapi.testclient import TestClient
+    save_version(artifacts, registry.path, 1_000_000_000)
+    monkeypatch.setattr(rm, "MODEL_REGISTRY", registry)
+    monkeypatch.setattr(rm, "ADMIN_TOKEN", "s3cret")
+    return TestClient(rm.app)  # no startup: the registry above is the one served
+
+def test_admin_routes_need_the_token(client):
+    assert client.get("/admin/models").status_code == 401
+    assert client.get("/admin/models", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    assert client.post("/internships", json=[]).status_code == 401
+    assert client.delete("/internships/1").status_code == 401
+    assert client.get("/admin/models", headers={"X-Admin-Token": "s3cret"}).status_code == 200
+
+def test_admin_routes_disabled_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(rm, "ADMIN_TOKEN", "")
+    assert client.get("/admin/models", headers={"X-Admin-Token": ""}).status_code == 403
+    assert client.post("/admin/reload").status_code == 403
+
+def test_reload_ignores_client_paths(client, registry, tmp_path):
+    other = tmp_path / "other.joblib"
+    response = client.post("/admin/reload", params={"wait": "true", "path": str(other)},
+                           headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code == 200
+    assert response.json()["registry"]["versions"][0]["path"] == os.path.abspath(registry.path)
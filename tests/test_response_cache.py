@@ -0,0 +1,78 @@
+"""
+response_cache.py: entries are keyed by artifact version (a new version misses without clearing
+the old one's entries), LRU / TTL bounds, the shared SQLite store, and cached results equal to
+recommend_with_artifacts.
+"""
+
+import pytest
+
+import recommendation_model as rm
+import response_cache as rc
+from conftest import PROFILES
+
+KEY = ("python machine learning", 5, 0.4, "exact", ())
+
+def test_versions_are_part_of_the_key():
+    cache = rc.ResponseCache(max_entries=10, ttl_seconds=60, shared_path=None)
+    cache.put("v1", KEY, {"x": 1})
+    assert cache.get("v2", KEY) is None
+    cache.put("v2", KEY, {"x": 2})
+    # requests still holding the old artifacts keep their own entries
+    assert cache.get("v1", KEY) == {"x": 1}
+    assert cache.get("v2", KEY) == {"x": 2}
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["version"] == "v2"
+    assert stats["hits"] == 2 and stats["misses"] == 1
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    cache = rc.ResponseCache(max_entries=2, ttl_seconds=10, shared_path=None)
+    now = [1000.0]
+    monkeypatch.setattr(rc.time, "time", lambda: now[0])
+    for i in range(3):
+        cache.put("v", (i,), {"i": i})
+    assert cache.get("v", (0,)) is None
+    assert cache.get("v", (2,)) == {"i": 2}
+    assert cache.stats()["evictions"] == 1
+    now[0] += 11
+    assert cache.get("v", (2,)) is None
+    assert cache.stats()["expirations"] == 1
+
+def test_shared_store_is_versioned(tmp_path):
+    path = str(tmp_path / "responses.sqlite")
+    writer = rc.ResponseCache(max_entries=10, ttl_seconds=60, shared_path=path)
+    reader = rc.ResponseCache(max_entries=10, ttl_seconds=60, shared_path=path)
+    writer.put("v1", KEY, {"ok": 1})
+    assert reader.get("v2", KEY) is None
+    assert reader.get("v1", KEY) == {"ok": 1}
+    assert reader.stats()["shared_hits"] == 1
+    assert reader.get("v1", KEY) == {"ok": 1}  # now a local hit
+    assert reader.stats()["shared_hits"] == 1
+
+def test_cached_results_equal_direct_results(artifacts):
+    cache = rc.ResponseCache(max_entries=100, ttl_seconds=60, shared_path=None)
+    direct = [rm.recommend_with_artifacts(p, artifacts, engine="exact") for p in PROFILES]
+    first = [rc.cached_recommend(p, artifacts, engine="exact", cache=cache) for p in PROFILES]
+    again = rc.cached_recommend_batch(PROFILES, artifacts, engine="exact", cache=cache)
+    assert first == direct and again == direct
+    assert cache.stats()["hits"] == len(PROFILES)
+    # equivalent spellings of a profile share one entry
+    assert rc.cached_recommend("python, MACHINE learning; data analysis", artifacts, engine="exact",
+                               cache=cache) == direct[0]
+
+def test_new_artifact_version_misses(artifacts):
+    cache = rc.ResponseCache(max_entries=100, ttl_seconds=60, shared_path=None)
+    rc.cached_recommend(PROFILES[0], artifacts, engine="exact", cache=cache)
+    replaced = dict(artifacts)
+    replaced.pop("version", None)
+    assert rm.artifact_version(replaced) != rm.artifact_version(artifacts)
+    rc.cached_recommend(PROFILES[0], replaced, engine="exact", cache=cache)
+    assert cache.stats()["misses"] == 2 and cache.stats()["entries"] == 2
+
+@pytest.mark.parametrize("filters", [None, {"location": "Pune"}])
+def test_filters_are_part_of_the_key(artifacts, filters):
+    cache = rc.ResponseCache(max_entries=100, ttl_seconds=60, shared_path=None)
+    result = rc.cached_recommend(PROFILES[0], artifacts, engine="exact", cache=cache, filters=filters)
+    assert result == rm.recommend_with_artifacts(PROFILES[0], artifacts, engine="exact", filters=filters)
+    other = rc.cached_recommend(PROFILES[0], artifacts, engine="exact", cache=cache, filters={"location": "Delhi"})
+    assert other == rm.recommend_with_artifacts(PROFILES[0], artifacts, engine="exact", filters={"location": "Delhi"})
+    assert cache.stats()["hits"] == 0
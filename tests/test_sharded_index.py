@@ -0,0 +1,73 @@
+"""
+sharded_index.py: the merged shard results equal the exact engine (scores, rows and tie order across
+shard boundaries), the engine scores in-process until the workers are up, and retired indexes
+shut down only after their last in-flight search.
+"""
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+import recommendation_model as rm
+import sharded_index as si
+from conftest import PROFILES, synthetic_catalog, assert_same_ranking
+
+@pytest.fixture(autouse=True)
+def small_shards(monkeypatch):
+    monkeypatch.setattr(si, "MIN_SHARD_ROWS", 10)
+    monkeypatch.setattr(si, "SHARDS", 2)
+    yield
+    si.shutdown_sharded_indexes()
+    with si._INDEXES_LOCK:
+        si._BUILDS.clear()
+        si._FAILED.clear()
+
+@pytest.fixture
+def tied_artifacts():
+    # every row appears three times, a third of the catalog apart: equal scores in different shards
+    artifacts = rm.build_internship_index(synthetic_catalog(40, seed=4))
+    vectors = artifacts["internship_vectors"]
+    return {"vectorizer": artifacts["vectorizer"], "internship_vectors": sp.vstack([vectors] * 3, format="csr")}
+
+def queries(artifacts):
+    return artifacts["vectorizer"].transform([rm.preprocess_text(p) for p in PROFILES])
+
+def test_merge_matches_exact_including_ties(tied_artifacts):
+    index = si.ShardedIndex(tied_artifacts["internship_vectors"], n_shards=3)
+    try:
+        assert index.stats()["processes"] == 3
+        query = queries(tied_artifacts)
+        for k in (1, 5, 12, 200):
+            assert_same_ranking(index.search(query, k), rm._exact_engine(query, tied_artifacts, k))
+        mask = np.zeros(120, dtype=bool)
+        mask[::7] = True
+        assert_same_ranking(index.search(query, 9, mask), rm._exact_engine(query, tied_artifacts, 9, mask))
+    finally:
+        index.shutdown()
+    assert index.stats()["processes"] == 0
+
+def test_engine_scores_in_process_until_ready(artifacts):
+    query = queries(artifacts)
+    expected = rm._exact_engine(query, artifacts, 5)
+    assert si.get_sharded_index(artifacts) is None  # starts the build, does not wait for it
+    assert_same_ranking(si.sharded_engine(query, artifacts, 5), expected)
+    index = si.get_sharded_index(artifacts, wait=True)
+    assert index is not None and index.stats()["processes"] > 1
+    assert_same_ranking(si.sharded_engine(query, artifacts, 5), expected)
+
+def test_retired_index_outlives_in_flight_searches(artifacts, monkeypatch):
+    monkeypatch.setattr(si, "KEEP_INDEXES", 1)
+    old = si.get_sharded_index(artifacts, wait=True)
+    in_flight = si._acquire(artifacts["internship_vectors"])
+    assert in_flight is old and old.refs == 1
+
+    replaced = artifacts["internship_vectors"].copy()
+    new = si.get_sharded_index({"internship_vectors": replaced}, wait=True)
+    assert new is not old and old.retired
+    # the search that started on the old matrix can still finish on its workers
+    query = queries(artifacts)
+    assert_same_ranking(old.search(query, 5), rm._exact_engine(query, artifacts, 5))
+    assert old.stats()["processes"] > 1
+    si._release(old)
+    assert old.stats()["processes"] == 0
+    assert new.stats()["processes"] > 1
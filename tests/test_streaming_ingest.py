@@ -0,0 +1,69 @@
+"""
+streaming_ingest.py: the chunked two-pass build matches build_internship_index, the term table
+stays within its budget, and the spilled documents land where they were asked to (and are cleaned up).
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+import recommendation_model as rm
+import streaming_ingest as si
+from artifact_store import SEPARATOR
+from conftest import PROFILES, synthetic_catalog, assert_same_ranking
+
+@pytest.fixture
+def catalog_csv(tmp_path):
+    path = tmp_path / "internships.csv"
+    synthetic_catalog(700, seed=3).to_csv(path, index=False)
+    return str(path)
+
+def test_stream_matches_in_memory_build(catalog_csv, tmp_path):
+    import pandas as pd
+    expected = rm.build_internship_index(pd.read_csv(catalog_csv, dtype=str).fillna(""))
+    documents_path = str(tmp_path / "docs.txt")
+    streamed = si.stream_internship_index(catalog_csv, chunk_size=97, documents_path=documents_path)
+
+    assert streamed["documents_path"] == documents_path and os.path.exists(documents_path)
+    assert streamed["vectorizer"].vocabulary_ == expected["vectorizer"].vocabulary_
+    np.testing.assert_allclose(streamed["vectorizer"].idf_, expected["vectorizer"].idf_)
+    assert abs(streamed["internship_vectors"] - expected["internship_vectors"]).max() < 1e-9
+    assert list(streamed["internship_ids"]) == list(expected["internship_ids"])
+    assert "description" not in streamed["internships_df"].columns
+
+    query = streamed["vectorizer"].transform([rm.preprocess_text(p) for p in PROFILES])
+    assert_same_ranking(rm._exact_engine(query, streamed, 5), rm._exact_engine(query, expected, 5))
+
+def test_spilled_documents_round_trip(catalog_csv, monkeypatch):
+    monkeypatch.setattr(si, "READ_BLOCK", 64)  # values straddle read blocks
+    artifacts = si.stream_internship_index(catalog_csv, chunk_size=50, keep_documents=True)
+    try:
+        chunks = list(si.iter_text_column(artifacts["documents_path"], 33, len(artifacts["documents"])))
+        assert all(len(chunk) <= 33 for chunk in chunks)
+        assert [doc for chunk in chunks for doc in chunk] == artifacts["documents"]
+    finally:
+        os.remove(artifacts["documents_path"])
+
+def test_iter_text_column_empty_values(tmp_path):
+    path = tmp_path / "column.txt"
+    path.write_text(SEPARATOR.join(["a", "", "b c", ""]), encoding="utf-8")
+    assert [v for chunk in si.iter_text_column(str(path), 3, 4) for v in chunk] == ["a", "", "b c", ""]
+    path.write_text("", encoding="utf-8")
+    assert [v for chunk in si.iter_text_column(str(path), 3, 2) for v in chunk] == ["", ""]
+
+def test_term_counter_stays_within_budget():
+    counter = si.TermCounter(budget=40)
+    for i in range(20):
+        counter.add([f"common word unique{i}a unique{i}b", f"common word rare{i}"])
+        assert len(counter.counts) <= 40
+    assert counter.pruned > 0
+    assert counter.counts["common"] == 40 and counter.counts["common word"] == 40
+    assert list(counter.vocabulary(max_features=2)) == ["common", "common word"]
+
+def test_stream_train_and_save_removes_spill(catalog_csv, tmp_path):
+    save_path = str(tmp_path / "model.joblib")
+    artifacts = si.stream_train_and_save(catalog_csv, save_path, chunk_size=200)
+    assert not os.path.exists(f"{save_path}.documents.tmp")
+    loaded = rm.load_model_artifacts(save_path)
+    assert len(loaded["documents"]) == len(artifacts["internship_ids"]) == 700
@@ -0,0 +1,40 @@
+"""
+student_store.py: process-wide stores are an LRU bounded by MAX_STORES (client-supplied CSV paths
+cannot grow it without bound), and pinned stores are never evicted.
+"""
+
+import os
+
+import pytest
+
+import student_store as ss
+import benchmark_recommendations as bench
+from conftest import ROOT
+
+@pytest.fixture
+def student_csvs(tmp_path, monkeypatch):
+    monkeypatch.setattr(ss, "MAX_STORES", 2)
+    monkeypatch.setattr(ss, "_STORES", ss.OrderedDict())
+    monkeypatch.setattr(ss, "_PINNED", set())
+    students_df = bench.synthetic_students(5, seed=1, students_path=os.path.join(ROOT, "students.csv"))
+    paths = []
+    for i in range(4):
+        path = str(tmp_path / f"students{i}.csv")
+        students_df.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+def test_stores_are_evicted_least_recently_used_first(student_csvs):
+    first = ss.get_student_store(student_csvs[0])
+    ss.get_student_store(student_csvs[1])
+    assert ss.get_student_store(student_csvs[0]) is first  # a hit moves it to the end
+    ss.get_student_store(student_csvs[2])
+    assert list(ss.student_store_stats()) == [os.path.abspath(p) for p in (student_csvs[0], student_csvs[2])]
+    assert len(first) == 5
+
+def test_pinned_stores_stay(student_csvs):
+    pinned = ss.get_student_store(student_csvs[0], pin=True)
+    for path in student_csvs[1:]:
+        ss.get_student_store(path)
+    assert ss.get_student_store(student_csvs[0]) is pinned
+    assert list(ss.student_store_stats()) == [os.path.abspath(p) for p in (student_csvs[3], student_csvs[0])]
@@ -0,0 +1,142 @@
+"""
+topk_store.py: per-student top-k lists patched from IncrementalIndex changes equal a fresh exact
+ranking, unpatchable changes invalidate the table, and process-wide tables are built in the
+background (None until ready) and catch up with changes made meanwhile.
+"""
+
+import os
+import random
+
+import pytest
+
+import recommendation_model as rm
+import incremental_index as ii
+import topk_store as ts
+import benchmark_recommendations as bench
+from student_store import StudentStore
+from conftest import ROOT, synthetic_catalog, exact_ranking, assert_same_ranking
+
+@pytest.fixture
+def students_df():
+    return bench.synthetic_students(40, seed=3, students_path=os.path.join(ROOT, "students.csv"))
+
+@pytest.fixture
+def index(artifacts):
+    return ii.IncrementalIndex(artifacts)
+
+@pytest.fixture
+def new_rows():
+    rows = synthetic_catalog(200, seed=13, id_prefix="new-")
+    # rows that rank high for many students, so merges change the lists
+    rows.loc[::4, "description"] = "python machine learning sql data science web development"
+    return rows
+
+def assert_table_is_exact(table, artifacts, depth=ts.REPAIR_DEPTH):
+    student_ids = table.students.ids()
+    vectors = artifacts["vectorizer"].transform([table.students.document(s) for s in student_ids])
+    expected = exact_ranking(artifacts, vectors, depth, artifacts.get("active"))
+    assert_same_ranking([table.top_k(s, depth) for s in student_ids], expected)
+
+def test_patched_table_matches_exact(index, students_df, new_rows, monkeypatch):
+    monkeypatch.setattr(ii, "DELTA_MIN_ROWS", 30)
+    table = ts.TopKStore(StudentStore.from_dataframe(students_df), index.artifacts)
+    index.add_listener(lambda artifacts, changes: table.apply_changes(artifacts, changes))
+    rng = random.Random(5)
+    ids = [str(i) for i in index.artifacts["internship_ids"]]
+    added = 0
+    for step in range(120):
+        op = rng.random()
+        if op < 0.45 and added < len(new_rows):
+            index.add_internships(new_rows.iloc[added:added + 2])
+            ids += list(new_rows["internship_id"].iloc[added:added + 2])
+            added += 2
+        elif op < 0.8:
+            # removing listed rows shortens lists: exercises the repair path
+            student = table.students.ids()[rng.randrange(len(table.students))]
+            listed = [str(index.artifacts["internship_ids"][r]) for r in table.top_k(student, 1)[0]]
+            victim = listed[0] if listed and rng.random() < 0.5 else ids[rng.randrange(len(ids))]
+            ids.remove(victim)
+            index.remove_internship(victim)
+        else:
+            index.update_internship(ids[rng.randrange(len(ids))], {"description": "python sql machine learning"})
+        index.join()  # background merges patch the table too
+        assert table.valid and table.artifacts is index.artifacts
+        if step % 10 == 0:
+            assert_table_is_exact(table, index.artifacts)
+    index.compact()
+    assert table.valid
+    assert_table_is_exact(table, index.artifacts)
+    assert table.merged_rows > 0 and table.rebuilds == 1
+
+def test_student_changes_are_rescored(artifacts, students_df):
+    students = StudentStore.from_dataframe(students_df)
+    table = ts.TopKStore(students, artifacts)
+    students.upsert({"student_id": "new", "skills": "Python, SQL", "interests": "Data Science"})
+    students.upsert(dict(students.get(students.ids()[0]), skills="Excel, Accounting"))
+    students.remove(students.ids()[1])
+    assert_table_is_exact(table, artifacts)
+    assert table.top_k("missing") is None
+
+def test_recommend_matches_live_scoring(artifacts, students_df):
+    students = StudentStore.from_dataframe(students_df)
+    table = ts.TopKStore(students, artifacts)
+    for student_id in students.ids()[:5]:
+        live = rm.get_recommendations(student_id, students_df, artifacts["internships_df"], index=artifacts,
+                                      engine="exact")
+        assert table.recommend(student_id) == live
+
+def test_vocabulary_refresh_invalidates(index, students_df):
+    table = ts.TopKStore(StudentStore.from_dataframe(students_df), index.artifacts)
+    index.add_listener(lambda artifacts, changes: table.apply_changes(artifacts, changes))
+    index.refresh_vocabulary(background=False)
+    assert not table.valid
+    assert table.recommend(table.students.ids()[0]) is None  # callers score live
+    assert not table.adopt(index.artifacts)
+
+# ---------------------------
+# Process-wide tables
+# ---------------------------
+@pytest.fixture
+def students_csv(tmp_path, students_df):
+    path = str(tmp_path / "students.csv")
+    students_df.to_csv(path, index=False)
+    yield path
+    for build in list(ts._BUILDS.values()):
+        build["thread"].join()
+    with ts._STORES_LOCK:
+        ts._STORES.clear()
+
+def test_tables_build_in_background_and_catch_up(index, students_csv, new_rows):
+    index.add_listener(ts.on_catalog_change)
+    assert ts.get_topk_store(students_csv, index.artifacts) is None  # build started, request scores live
+    assert ts.topk_store_stats()[os.path.abspath(students_csv)].get("building")
+    index.add_internships(new_rows.iloc[:6])
+    index.remove_internship("new-2")
+    table = ts.get_topk_store(students_csv, index.artifacts, wait=True)
+    assert table is not None and table.artifacts is index.artifacts
+    assert_table_is_exact(table, index.artifacts)
+
+    # later changes are patched into the published table
+    index.add_internships(new_rows.iloc[6:10])
+    assert ts.get_topk_store(students_csv, index.artifacts) is table
+    assert_table_is_exact(table, index.artifacts)
+
+    # a change the table cannot patch drops it; it is rebuilt in the background
+    index.refresh_vocabulary(background=False)
+    rebuilt = ts.get_topk_store(students_csv, index.artifacts, wait=True)
+    assert rebuilt is not table
+    assert_table_is_exact(rebuilt, index.artifacts)
+
+def test_api_keeps_a_table_for_the_served_csv_only(index, students_csv, tmp_path, monkeypatch, students_df):
+    other = str(tmp_path / "other.csv")
+    students_df.to_csv(other, index=False)
+    monkeypatch.setattr(rm, "MODEL_ARTIFACTS", index.artifacts)
+    monkeypatch.setattr(rm, "STUDENTS_PATH", students_csv)
+    student_id = str(students_df["student_id"].iloc[0])
+    assert rm._topk_result(student_id, other, None, 5, 0.4, {}) is None
+    assert os.path.abspath(other) not in ts.topk_store_stats()  # no table started for a client path
+    assert rm._topk_result(student_id, None, None, 5, 0.4, {}) is None  # starts the served CSV's build
+    ts.get_topk_store(students_csv, index.artifacts, wait=True)
+    assert rm._topk_result(student_id, None, None, 5, 0.4, {}) == rm.get_recommendations(
+        student_id, students_df, index.artifacts["internships_df"], index=index.artifacts, engine="exact")
+    assert list(ts.topk_store_stats()) == [os.path.abspath(students_csv)]
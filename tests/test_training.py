@@ -0,0 +1,27 @@
+"""
+Training pipeline: the vectorized build_internship_documents equals the row-wise
+build_internship_document, and preprocess_documents in a process pool equals the serial loop.
+"""
+
+import numpy as np
+
+import recommendation_model as rm
+from conftest import synthetic_catalog
+
+def test_documents_match_row_wise_build():
+    catalog = synthetic_catalog(300, seed=6)
+    catalog["internship_id"] = np.arange(300)  # non-string cells are str()-ed like row.get(f)
+    catalog.loc[::5, "title"] = ""
+    catalog.loc[::7, "description"] = "   "
+    catalog.loc[::11, "required_skills"] = None
+    catalog.loc[::13, "title"] = np.nan
+    expected = catalog.apply(rm.build_internship_document, axis=1).tolist()
+    assert rm.build_internship_documents(catalog) == expected
+    assert rm.build_internship_documents(catalog[["internship_id"]]) == [""] * 300
+
+def test_parallel_preprocessing_matches_serial():
+    docs = rm.build_internship_documents(synthetic_catalog(250, seed=7))
+    serial = rm.preprocess_documents(docs, workers=1)
+    assert serial == [rm.preprocess_document(d) for d in docs]
+    # several chunks per worker, and a last chunk shorter than the others
+    assert rm.preprocess_documents(docs, workers=2, chunk_size=40) == serial
@@ -0,0 +1,434 @@
+"""
+topk_store.py
+
+AVSARSETU - Materialized per-student top-k table
+- Every student of a StudentStore (students.csv) is scored once against the served artifacts,
+  one sparse product per block of students, and keeps its best TOPK_SIZE internships, best first
+  (ties in row order, exactly like the "exact" engine). GET /recommend/student/{id} is then a lookup.
+- Catalog changes arrive from incremental_index.py as change lists (IncrementalIndex.add_listener):
+    add      only the new rows are scored, against all stored student vectors in one product,
+             and merged into each student's list
+    remove   the row is dropped from the lists that hold it; only students left with fewer than
+             REPAIR_DEPTH entries are rescored against the catalog
+    compact  stored rows are renumbered, nothing is scored
+    rebuild  vocabulary / IDF refresh: every student vector changes, so the table is rebuilt
+- Students added or changed in the CSV are scored on the next lookup; the rows they held in the
+  table are tombstoned and dropped once they are COMPACT_RATIO of the table.
+- Full builds (first use, a reloaded model that ranks differently, a change that cannot be patched)
+  run in a background thread; requests are scored live until the table is ready.
+The table is ranked exactly (cosine over the full matrix) whatever AVSARSETU_ENGINE is; requests
+with attribute filters are scored live. The API keeps a table only for the students CSV it serves
+(AVSARSETU_STUDENTS); requests naming another students_csv are scored live.
+
+How to use:
+   AVSARSETU_TOPK_STORE=1 AVSARSETU_TOPK_SIZE=10 AVSARSETU_STUDENTS=students.csv uvicorn recommendation_model:app
+   table = TopKStore(get_student_store("students.csv"), load_model_artifacts("avsarsetu_model.joblib"))
+   table.recommend("101", top_n=5)
+   get_topk_store("students.csv", artifacts)      (served tables: None until built in the background)
+"""
+
+import os
+import time
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+import recommendation_model as rm
+
+TOPK_SIZE = int(os.environ.get("AVSARSETU_TOPK_SIZE", "10"))  # kept per student; the slack absorbs removals
+REPAIR_DEPTH = 5          # the largest top_n a request can get (_clip_top_n); shorter lists are rescored
+BLOCK_CELLS = 4_000_000   # dense similarity cells per product block
+COMPACT_RATIO = 0.25      # drop tombstoned student rows once they are this share of the table
+
+def _same_rows(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    """
+    True if two artifacts snapshots rank the same rows the same way (e.g. a copy made by IncrementalIndex).
+    """
+    if a["vectorizer"] is not b["vectorizer"] or rm.catalog_rows(a) != rm.catalog_rows(b):
+        return False
+    active_a, active_b = a.get("active"), b.get("active")
+    if active_a is None or active_b is None:
+        return (active_a is None or bool(active_a.all())) and (active_b is None or bool(active_b.all()))
+    return bool(np.array_equal(active_a, active_b))
+
+def _live_rows(artifacts: Dict[str, Any]) -> int:
+    active = artifacts.get("active")
+    return rm.catalog_rows(artifacts) if active is None else int(np.count_nonzero(active))
+
+class TopKStore:
+    """
+    The top-k internships of every student, patched in place as the catalog and the students change.
+    Counters: lookups, merged_rows (new internships scored), repairs (students rescored), rebuilds.
+    """
+
+    def __init__(self, students, artifacts: Dict[str, Any], k: int = TOPK_SIZE):
+        self.students = students
+        self.k = max(int(k), REPAIR_DEPTH)
+        self._lock = threading.RLock()
+        self.lookups = 0
+        self.merged_rows = 0
+        self.repairs = 0
+        self.rebuilds = 0
+        self.build(artifacts)
+
+    # ---------------------------
+    # Build
+    # ---------------------------
+    def build(self, artifacts: Dict[str, Any]) -> None:
+        """
+        Score every student against `artifacts` (full rebuild).
+        """
+        with self._lock:
+            version = self.students.version
+            student_ids = self.students.ids()
+            vectors = artifacts["vectorizer"].transform([self.students.document(s) for s in student_ids])
+            self.artifacts = artifacts
+            self._vectors = vectors.tocsr()
+            self._rows, self._scores = self._score(self._vectors, artifacts)
+            self._slot = {student_id: slot for slot, student_id in enumerate(student_ids)}
+            self._fingerprints = {student_id: self.students.fingerprint(student_id) for student_id in student_ids}
+            self._live = np.ones(len(student_ids), dtype=bool)
+            self._n_rows = rm.catalog_rows(artifacts)
+            self._n_live_rows = _live_rows(artifacts)
+            self._students_version = version
+            self.valid = True
+            self.rebuilds += 1
+
+    def _score(self, vectors, artifacts: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact top-k (rows, scores) of each student vector, padded with -1 / -inf to k columns.
+        """
+        rows = np.full((vectors.shape[0], self.k), -1, dtype=np.int64)
+        scores = np.full((vectors.shape[0], self.k), -np.inf)
+        block = max(1, BLOCK_CELLS // max(1, rm.catalog_rows(artifacts)))
+        exact = rm.get_engine("exact")  # segment-aware: incremental snapshots are not flattened
+        for lo in range(0, vectors.shape[0], block):
+            ranked = exact(vectors[lo:lo + block], artifacts, self.k, artifacts.get("active"))
+            for offset, (top, top_scores) in enumerate(ranked):
+                rows[lo + offset, :top.size] = top
+                scores[lo + offset, :top.size] = top_scores
+        return rows, scores
+
+    def adopt(self, artifacts: Dict[str, Any]) -> bool:
+        """
+        Serve `artifacts` from this table if it ranks the same rows as the table's snapshot.
+        """
+        with self._lock:
+            if not self.valid:
+                return False
+            if artifacts is self.artifacts:
+                return True
+            if not _same_rows(artifacts, self.artifacts):
+                return False
+            self.artifacts = artifacts
+            return True
+
+    # ---------------------------
+    # Catalog changes (IncrementalIndex listener)
+    # ---------------------------
+    def apply_changes(self, artifacts: Dict[str, Any], changes: List[Tuple]) -> bool:
+        """
+        Patch the table from the change list that turned the table's snapshot into `artifacts`.
+        Returns False for anything that cannot be patched (a refit vocabulary, a snapshot the table
+        never saw); the table is then invalid and has to be rebuilt (see on_catalog_change).
+        """
+        with self._lock:
+            if not self.valid:
+                return False
+            if artifacts["vectorizer"] is not self.artifacts["vectorizer"] or not self._patch(artifacts, changes):
+                self.valid = False
+                return False
+            self.artifacts = artifacts
+            return True
+
+    def _patch(self, artifacts: Dict[str, Any], changes: List[Tuple]) -> bool:
+        n_rows = self._n_rows
+        for i, change in enumerate(changes):
+            kind = change[0]
+            if kind == "add":
+                start, end = change[1], change[2]
+                final = _forward(np.arange(start, end), changes[i + 1:])
+                if start != n_rows or final is None:
+                    return False
+                self._merge(np.arange(start, end), rm.internship_rows(artifacts, final))
+                n_rows = end
+            elif kind == "remove":
+                self._remove(change[1])
+            elif kind == "compact":
+                keep = change[1]
+                listed = self._rows >= 0
+                self._rows[listed] = np.searchsorted(keep, self._rows[listed])
+                n_rows = keep.size
+            else:
+                return False
+        if n_rows != rm.catalog_rows(artifacts):
+            return False
+        self._n_rows = n_rows
+        self._repair(artifacts)
+        return True
+
+    def _merge(self, rows: np.ndarray, vectors) -> None:
+        """
+        Merge new rows (scored against every stored student vector) into the lists.
+        A list shorter than the live catalog only takes rows that beat its last entry: whatever it
+        dropped earlier could rank between them.
+        """
+        from sklearn.metrics.pairwise import cosine_similarity
+        m = rows.size
+        n_live_rows = self._n_live_rows
+        block = max(1, BLOCK_CELLS // (self.k + m))
+        for lo in range(0, self._rows.shape[0], block):
+            hi = min(lo + block, self._rows.shape[0])
+            similarities = cosine_similarity(self._vectors[lo:hi], vectors)  # (n_students, n_new)
+            depth = np.count_nonzero(self._rows[lo:hi] >= 0, axis=1)
+            last = np.where(depth > 0, self._scores[lo:hi][np.arange(hi - lo), np.maximum(depth - 1, 0)], np.inf)
+            truncated = depth < n_live_rows
+            similarities[truncated[:, None] & (similarities <= last[:, None])] = -np.inf
+            scores = np.hstack([self._scores[lo:hi], similarities])
+            candidates = np.hstack([self._rows[lo:hi], np.broadcast_to(rows, (hi - lo, m))])
+            # stable: ties keep listed rows (lower row numbers) first, new rows in row order
+            order = np.argsort(-scores, axis=1, kind="stable")[:, :self.k]
+            self._scores[lo:hi] = np.take_along_axis(scores, order, axis=1)
+            self._rows[lo:hi] = np.where(np.isfinite(self._scores[lo:hi]),
+                                         np.take_along_axis(candidates, order, axis=1), -1)
+        self._n_live_rows += m
+        self.merged_rows += m
+
+    def _remove(self, row: int) -> None:
+        slots = np.flatnonzero((self._rows == row).any(axis=1))
+        if slots.size:
+            hit = self._rows[slots] == row
+            order = np.argsort(hit, axis=1, kind="stable")  # the removed entry moves to the end
+            self._rows[slots] = np.take_along_axis(self._rows[slots], order, axis=1)
+            self._scores[slots] = np.take_along_axis(self._scores[slots], order, axis=1)
+            self._rows[slots, -1] = -1
+            self._scores[slots, -1] = -np.inf
+        self._n_live_rows -= 1
+
+    def _repair(self, artifacts: Dict[str, Any]) -> None:
+        """
+        Rescore the students whose lists got shorter than a request can ask for.
+        """
+        depth = np.count_nonzero(self._rows >= 0, axis=1)
+        slots = np.flatnonzero(self._live & (depth < min(REPAIR_DEPTH, self._n_live_rows)))
+        if slots.size:
+            self._rows[slots], self._scores[slots] = self._score(self._vectors[slots], artifacts)
+            self.repairs += int(slots.size)
+
+    # ---------------------------
+    # Student changes
+    # ---------------------------
+    def sync_students(self) -> None:
+        """
+        Score students that were added or changed since the last sync; tombstone removed ones.
+        """
+        if self.students.version == self._students_version:
+            return
+        with self._lock:
+            version = self.students.version
+            changed = [s for s in self.students.ids() if self.students.fingerprint(s) != self._fingerprints.get(s)]
+            removed = [s for s in self._slot if s not in self.students]
+            for student_id in changed + removed:
+                slot = self._slot.pop(student_id, None)
+                self._fingerprints.pop(student_id, None)
+                if slot is not None:
+                    self._live[slot] = False
+            if changed:
+                import scipy.sparse as sp
+                vectors = self.artifacts["vectorizer"].transform([self.students.document(s) for s in changed])
+                rows, scores = self._score(vectors, self.artifacts)
+                first = self._rows.shape[0]
+                self._vectors = sp.vstack([self._vectors, vectors], format="csr")
+                self._rows = np.vstack([self._rows, rows])
+                self._scores = np.vstack([self._scores, scores])
+                self._live = np.concatenate([self._live, np.ones(len(changed), dtype=bool)])
+                for offset, student_id in enumerate(changed):
+                    self._slot[student_id] = first + offset
+                    self._fingerprints[student_id] = self.students.fingerprint(student_id)
+            self._students_version = version
+            if np.count_nonzero(~self._live) > COMPACT_RATIO * self._live.size:
+                self._compact_students()
+
+    def _compact_students(self) -> None:
+        keep = np.flatnonzero(self._live)
+        new_slot = np.cumsum(self._live) - 1
+        self._vectors = self._vectors[keep]
+        self._rows = self._rows[keep]
+        self._scores = self._scores[keep]
+        self._live = np.ones(keep.size, dtype=bool)
+        self._slot = {student_id: int(new_slot[slot]) for student_id, slot in self._slot.items()}
+
+    # ---------------------------
+    # Lookups
+    # ---------------------------
+    def top_k(self, student_id: str, k: Optional[int] = None) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        The stored (rows, scores) of a student, best first, or None if the student is unknown.
+        """
+        self.sync_students()
+        with self._lock:
+            slot = self._slot.get(str(student_id))
+            if slot is None:
+                return None
+            k = k or self.k
+            rows, scores = self._rows[slot, :k], self._scores[slot, :k]
+            listed = rows >= 0
+            return rows[listed], scores[listed]
+
+    def recommend(self, student_id: str, top_n: int = 5, match_threshold: float = 0.4) -> Optional[Dict[str, Any]]:
+        """
+        Same result as get_recommendations (without filters), read from the table; None if a change
+        the table could not patch invalidated it meanwhile (score live instead).
+        """
+        started = time.perf_counter()
+        with self._lock:
+            if not self.valid:
+                return None
+            artifacts = self.artifacts
+            ranked = self.top_k(student_id, rm._clip_top_n(top_n))
+        record = self.students.get(student_id)
+        if ranked is None or record is None:
+            result = {"status": "error", "message": f"Student ID {student_id} not found."}
+            rm._record("topk", [result], {})
+            return result
+        self.lookups += 1
+        stages = {"lookup": time.perf_counter() - started}
+        results = rm._timed_results([ranked], artifacts, match_threshold,
+                                    [record.get("skills", "") + " " + record.get("interests", "")], stages)
+        rm._record("topk", results, stages)
+        return results[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "students": len(self._slot),
+                "tombstones": int(np.count_nonzero(~self._live)),
+                "k": self.k,
+                "catalog_rows": self._n_rows,
+                "lookups": self.lookups,
+                "merged_rows": self.merged_rows,
+                "repairs": self.repairs,
+                "rebuilds": self.rebuilds
+            }
+
+def _forward(rows: np.ndarray, later: List[Tuple]) -> Optional[np.ndarray]:
+    """
+    Positions of `rows` after the compactions in `later` (None if one of them drops a row).
+    """
+    for change in later:
+        if change[0] == "compact":
+            keep = change[1]
+            positions = np.searchsorted(keep, rows)
+            if positions.size and (positions[-1] >= keep.size or not np.array_equal(keep[positions], rows)):
+                return None
+            rows = positions
+    return rows
+
+# ---------------------------
+# Process-wide tables per students CSV
+# ---------------------------
+# Tables are built in a background thread, never in a request: until the table for the served
+# artifacts is ready, get_topk_store returns None and /recommend/student is scored live.
+_STORES = {}  # students path -> ready TopKStore
+_BUILDS = {}  # students path -> {"artifacts": wanted snapshot, "changes": [(artifacts, changes)], "thread"}
+_STORES_LOCK = threading.Lock()
+
+def _build(students, artifacts: Dict[str, Any]) -> None:
+    """
+    Build the table for `artifacts`, then catch up with the catalog changes and model swaps
+    that happened meanwhile before publishing it.
+    """
+    path = students.path
+    try:
+        table = TopKStore(students, artifacts)
+        while True:
+            with _STORES_LOCK:
+                build = _BUILDS[path]
+                pending, build["changes"] = build["changes"], []
+                if not pending:
+                    if table.adopt(build["artifacts"]):
+                        _STORES[path] = table
+                        del _BUILDS[path]
+                        return
+                    wanted = build["artifacts"]
+            if pending:
+                for changed, changes in pending:
+                    table.apply_changes(changed, changes)
+            else:
+                # a different model was served meanwhile
+                table = TopKStore(students, wanted)
+    except Exception as e:
+        print(f"Top-k table build for {path} failed ({e}); /recommend/student is scored live.")
+        with _STORES_LOCK:
+            _BUILDS.pop(path, None)
+
+def _start_build(students, artifacts: Dict[str, Any]) -> None:
+    # caller holds _STORES_LOCK
+    build = _BUILDS.get(students.path)
+    if build is not None:
+        build["artifacts"] = artifacts  # the running build catches up before it publishes
+        return
+    thread = threading.Thread(target=_build, args=(students, artifacts), name="topk-build", daemon=True)
+    _BUILDS[students.path] = {"artifacts": artifacts, "changes": [], "thread": thread}
+    thread.start()
+
+def get_topk_store(students_path: str, artifacts: Dict[str, Any], wait: bool = False) -> Optional[TopKStore]:
+    """
+    The table for a students CSV serving `artifacts`, or None while it is being built (the build
+    is started on first use, and again when the artifacts are replaced by a model that ranks
+    differently). wait=True blocks until it is ready.
+    """
+    from student_store import get_student_store
+    students = get_student_store(students_path, pin=True)
+    while True:
+        with _STORES_LOCK:
+            table = _STORES.get(students.path)
+            if table is not None and table.adopt(artifacts):
+                return table
+            _start_build(students, artifacts)
+            thread = _BUILDS[students.path]["thread"]
+        if not wait:
+            return None
+        thread.join()
+
+def prepare_topk_stores(artifacts: Dict[str, Any], students_paths: List[str] = ()) -> None:
+    """
+    Start (re)building, in the background, the tables of these students CSVs and of every CSV
+    already served, for newly published artifacts.
+    """
+    from student_store import get_student_store
+    with _STORES_LOCK:
+        paths = set(_STORES) | set(_BUILDS)
+    for path in paths | set(students_paths):
+        if os.path.exists(path):
+            students = get_student_store(path, pin=True)
+            with _STORES_LOCK:
+                table = _STORES.get(students.path)
+                if table is None or not table.adopt(artifacts):
+                    _start_build(students, artifacts)
+
+def on_catalog_change(artifacts: Dict[str, Any], changes: List[Tuple]) -> None:
+    """
+    IncrementalIndex listener: patch every table that serves the snapshot being changed; tables
+    that cannot be patched are dropped and rebuilt in the background. Builds in flight replay
+    the changes before they publish.
+    """
+    with _STORES_LOCK:
+        tables = list(_STORES.items())
+        for build in _BUILDS.values():
+            build["changes"].append((artifacts, changes))
+            build["artifacts"] = artifacts
+    for path, table in tables:
+        if not table.apply_changes(artifacts, changes):
+            with _STORES_LOCK:
+                if _STORES.get(path) is table:
+                    del _STORES[path]
+                    _start_build(table.students, artifacts)
+
+def topk_store_stats() -> Dict[str, Dict[str, Any]]:
+    with _STORES_LOCK:
+        stats = {path: table.stats() for path, table in _STORES.items()}
+        for path in _BUILDS:
+            stats.setdefault(path, {})["building"] = True
+        return stats
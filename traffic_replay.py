@@ -0,0 +1,306 @@
+"""
+traffic_replay.py
+
+AVSARSETU - Captured traffic and a replay load harness for the recommendation APIs
+- TrafficCapture: opt-in ASGI middleware that samples /recommend/* requests (method, path, query
+  string, body, route template, status, latency) into a JSON-lines file. It is installed by
+  recommendation_model.app and ai_api.app when AVSARSETU_CAPTURE_SAMPLE > 0
+  (AVSARSETU_CAPTURE_SAMPLE=0.05 keeps 5% of requests; file: AVSARSETU_CAPTURE_LOG, default traffic.jsonl).
+- replay(): sends the captured requests again, in-process through the ASGI app (startup events
+  run, no sockets) or to a running server (--url), with `concurrency` requests in flight and an
+  optional fixed arrival rate. Reports throughput, p50/p95/p99 latency and error rates per
+  endpoint, and the change against a previous run (--baseline), to compare engines / settings
+  under the real query mix.
+
+How to use:
+   AVSARSETU_CAPTURE_SAMPLE=0.05 uvicorn recommendation_model:app
+   python traffic_replay.py traffic.jsonl --app recommendation_model:app --concurrency 16 --json exact.json
+   AVSARSETU_ENGINE=inverted python traffic_replay.py traffic.jsonl --concurrency 16 --baseline exact.json
+   python traffic_replay.py traffic.jsonl --url http://127.0.0.1:8000 --rate 200 --repeat 5
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import importlib
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+CAPTURE_SAMPLE = float(os.environ.get("AVSARSETU_CAPTURE_SAMPLE", "0"))  # share of requests kept (0 = off)
+CAPTURE_LOG = os.environ.get("AVSARSETU_CAPTURE_LOG", "traffic.jsonl")
+CAPTURE_PREFIXES = ("/recommend",)
+MAX_CAPTURED_BODY = 1 << 20  # larger bodies are not captured
+
+# ---------------------------
+# Capture
+# ---------------------------
+_LOG_FILES = {}  # path -> open file (line buffered)
+_LOG_LOCK = threading.Lock()
+
+def _write_record(path: str, record: Dict[str, Any]) -> None:
+    line = json.dumps(record) + "\n"
+    with _LOG_LOCK:
+        log_file = _LOG_FILES.get(path)
+        if log_file is None:
+            log_file = _LOG_FILES[path] = open(path, "a", encoding="utf-8", buffering=1)
+        log_file.write(line)
+
+class TrafficCapture:
+    """
+    ASGI middleware that writes a sample of the requests under `prefixes` to a JSON-lines file.
+    """
+
+    def __init__(self, app, sample: Optional[float] = None, log_path: Optional[str] = None,
+                 prefixes: Tuple[str, ...] = CAPTURE_PREFIXES):
+        self.app = app
+        self.sample = CAPTURE_SAMPLE if sample is None else sample
+        self.log_path = log_path or CAPTURE_LOG
+        self.prefixes = prefixes
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or not scope.get("path", "").startswith(self.prefixes)
+                or random.random() >= self.sample):
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        chunks = []
+        code = 500
+
+        async def receive_and_keep():
+            message = await receive()
+            if message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+            return message
+
+        async def send_with_status(message):
+            nonlocal code
+            if message["type"] == "http.response.start":
+                code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_and_keep, send_with_status)
+        finally:
+            body = b"".join(chunks)
+            headers = dict(scope.get("headers") or [])
+            route = scope.get("route")  # set by the router on the shared scope
+            _write_record(self.log_path, {
+                "ts": time.time(),
+                "method": scope.get("method", "GET"),
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "endpoint": getattr(route, "path", scope["path"]),
+                "content_type": headers.get(b"content-type", b"").decode("latin-1") or None,
+                "body": body.decode("utf-8", "replace") if body and len(body) <= MAX_CAPTURED_BODY else None,
+                "status": code,
+                "ms": round((time.perf_counter() - started) * 1000, 4)
+            })
+
+def load_traffic(path: str) -> List[Dict[str, Any]]:
+    """
+    Captured requests, in capture order (blank and malformed lines are skipped).
+    """
+    records = []
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and record.get("path"):
+                records.append(record)
+    return records
+
+# ---------------------------
+# Replay
+# ---------------------------
+def load_app(target: str):
+    """
+    "module:attribute" -> the ASGI app object (e.g. "recommendation_model:app").
+    """
+    module_name, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module_name), attribute or "app")
+
+class _Lifespan:
+    """
+    Runs the app's startup handlers before an in-process replay and its shutdown handlers after.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._events = asyncio.Queue()
+        self._replies = asyncio.Queue()
+        self._task = None
+
+    async def _receive(self):
+        return await self._events.get()
+
+    async def _send(self, message):
+        await self._replies.put(message)
+
+    async def __aenter__(self):
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+        self._task = asyncio.ensure_future(self.app(scope, self._receive, self._send))
+        await self._events.put({"type": "lifespan.startup"})
+        reply = await self._replies.get()
+        if reply["type"] == "lifespan.startup.failed":
+            raise RuntimeError(f"App startup failed: {reply.get('message', '')}")
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._events.put({"type": "lifespan.shutdown"})
+        await self._replies.get()
+        await self._task
+
+def _endpoint(record: Dict[str, Any]) -> str:
+    return f"{record.get('method', 'GET')} {record.get('endpoint') or record['path']}"
+
+async def _send_one(client, record: Dict[str, Any]) -> Optional[int]:
+    url = record["path"] + (f"?{record['query']}" if record.get("query") else "")
+    headers = {"content-type": record["content_type"]} if record.get("content_type") else None
+    body = record.get("body")
+    try:
+        response = await client.request(record.get("method", "GET"), url, headers=headers,
+                                        content=None if body is None else body.encode("utf-8"))
+    except Exception:
+        return None  # connection error / timeout: counted as an error
+    await response.aread()
+    return response.status_code
+
+async def replay_async(records: List[Dict[str, Any]], app=None, url: Optional[str] = None,
+                       concurrency: int = 8, rate: Optional[float] = None, repeat: int = 1,
+                       timeout: float = 30.0) -> Dict[str, Any]:
+    """
+    Send `records` (repeated `repeat` times) through `app` in-process, or to `url`.
+    At most `concurrency` requests are in flight; with `rate` (requests/sec) request i is not sent
+    before start + i / rate. Returns summarize() of the run.
+    """
+    import httpx
+    if (app is None) == (url is None):
+        raise ValueError("Pass either an ASGI app or a base URL.")
+    schedule = [record for _ in range(max(1, repeat)) for record in records]
+    samples = []  # (endpoint, status or None, seconds)
+    positions = iter(range(len(schedule)))
+
+    async def worker(client, started):
+        for i in positions:
+            if rate:
+                delay = started + i / rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            record = schedule[i]
+            sent = time.perf_counter()
+            status = await _send_one(client, record)
+            samples.append((_endpoint(record), status, time.perf_counter() - sent))
+
+    async def run(client):
+        started = time.perf_counter()
+        await asyncio.gather(*[worker(client, started) for _ in range(max(1, concurrency))])
+        return time.perf_counter() - started
+
+    limits = httpx.Limits(max_connections=max(1, concurrency))
+    if url is not None:
+        async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+            seconds = await run(client)
+    else:
+        transport = httpx.ASGITransport(app=app)
+        async with _Lifespan(app), httpx.AsyncClient(transport=transport, base_url="http://replay",
+                                                     timeout=timeout, limits=limits) as client:
+            seconds = await run(client)
+    return summarize(samples, seconds, concurrency=concurrency, rate=rate)
+
+def replay(records: List[Dict[str, Any]], app=None, url: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+    """
+    Synchronous replay_async().
+    """
+    return asyncio.run(replay_async(records, app=app, url=url, **kwargs))
+
+def _latency_stats(samples: List[Tuple[str, Optional[int], float]], seconds: float) -> Dict[str, Any]:
+    import numpy as np
+    latencies = np.array([s for _, _, s in samples])
+    errors = sum(1 for _, status, _ in samples if status is None or status >= 500)
+    client_errors = sum(1 for _, status, _ in samples if status is not None and 400 <= status < 500)
+    return {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / seconds, 2) if seconds > 0 else None,
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3),
+        "error_rate": round(errors / len(samples), 4),            # 5xx and failed connections
+        "client_error_rate": round(client_errors / len(samples), 4)  # 4xx (e.g. unknown student ids)
+    }
+
+def summarize(samples: List[Tuple[str, Optional[int], float]], seconds: float, **settings) -> Dict[str, Any]:
+    """
+    Overall and per-endpoint throughput, p50/p95/p99 latency and error rates of one run.
+    """
+    by_endpoint = {}
+    for sample in samples:
+        by_endpoint.setdefault(sample[0], []).append(sample)
+    return {
+        "settings": {**settings, "seconds": round(seconds, 3)},
+        "overall": _latency_stats(samples, seconds) if samples else None,
+        "endpoints": {endpoint: _latency_stats(group, seconds) for endpoint, group in sorted(by_endpoint.items())}
+    }
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    """
+    One line per endpoint; with a baseline report, latency changes in percent.
+    """
+    print(f"{'endpoint':<40} {'reqs':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'err %':>6} {'4xx %':>6}")
+    rows = list(report["endpoints"].items()) + [("overall", report["overall"])]
+    for endpoint, stats in rows:
+        if stats is None:
+            continue
+        print(f"{endpoint:<40} {stats['requests']:>7} {stats['throughput_rps'] or 0:>9.1f} {stats['p50_ms']:>9.3f} "
+              f"{stats['p95_ms']:>9.3f} {stats['p99_ms']:>9.3f} {stats['error_rate'] * 100:>6.2f} "
+              f"{stats['client_error_rate'] * 100:>6.2f}")
+        before = (baseline or {}).get("endpoints", {}).get(endpoint) if endpoint != "overall" \
+            else (baseline or {}).get("overall")
+        if before:
+            changes = []
+            for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+                if before.get(key):
+                    changes.append(f"{key} {(stats[key] - before[key]) / before[key] * 100:+.1f}%")
+            print(f"{'':<40} vs baseline: {', '.join(changes)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AVSARSETU - replay captured traffic against the API")
+    parser.add_argument("traffic", nargs="?", default=CAPTURE_LOG, help="Captured requests (JSON lines)")
+    parser.add_argument("--app", type=str, default="recommendation_model:app", help="ASGI app to drive in-process")
+    parser.add_argument("--url", type=str, default=None, help="Base URL of a running server (instead of --app)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight")
+    parser.add_argument("--rate", type=float, default=None, help="Arrival rate in requests/sec (default: as fast as possible)")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the captured requests this many times")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--json", type=str, default=None, help="Write the report as JSON")
+    parser.add_argument("--baseline", type=str, default=None, help="Previous --json report to compare against")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.traffic):
+        parser.error(f"Traffic file not found: {args.traffic}")
+    traffic = load_traffic(args.traffic)
+    if not traffic:
+        parser.error(f"No captured requests in {args.traffic} (capture with AVSARSETU_CAPTURE_SAMPLE > 0).")
+    print(f"Replaying {len(traffic)} requests x{args.repeat} "
+          f"({'url ' + args.url if args.url else 'in-process ' + args.app}), concurrency {args.concurrency}"
+          + (f", {args.rate} req/s" if args.rate else ""))
+    result = replay(traffic, app=None if args.url else load_app(args.app), url=args.url,
+                    concurrency=args.concurrency, rate=args.rate, repeat=args.repeat, timeout=args.timeout)
+    result["settings"].update(traffic=args.traffic, target=args.url or args.app)
+    baseline_report = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            baseline_report = json.load(fh)
+    print_report(result, baseline_report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+        print(f"Report written to {args.json}")